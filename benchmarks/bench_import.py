@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Benchmark startup cost of the maidenhead_map module and its plot-free commands
+
+Times fresh interpreters importing the module and running `--help` and
+`stats`, each net of bare interpreter startup, and checks that none of them
+loads matplotlib or cartopy. Exits non-zero if a check fails or a median
+exceeds --max-ms, so it can gate CI.
+
+    python benchmarks/bench_import.py --max-ms 500
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+EXAMPLE_LOG = os.path.join(ROOT, 'example_contest.cbr')
+
+# Run inside the child: exercise a command, then report any plotting modules that got imported
+PROBE = """
+import contextlib, io, sys
+sys.path.insert(0, {root!r})
+sys.argv = ['maidenhead-map'] + {argv!r}
+import maidenhead_map
+if len(sys.argv) > 1:
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            maidenhead_map.main()
+        except SystemExit:
+            pass
+loaded = sorted(name for name in sys.modules if name.split('.')[0] in ('matplotlib', 'cartopy'))
+print(','.join(loaded))
+"""
+
+CASES = [
+    ('import', []),
+    ('--help', ['--help']),
+    ('stats', ['stats', EXAMPLE_LOG]),
+]
+
+
+def run_child(code):
+    """Seconds to run `code` in a fresh interpreter, and its stdout"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, result.stdout.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=7, help='Runs per case (the median is reported)')
+    parser.add_argument('--max-ms', type=float, default=500,
+                        help='Fail if a case takes longer than this, net of interpreter startup')
+    args = parser.parse_args()
+
+    baseline = statistics.median(run_child('pass')[0] for _ in range(args.repeat))
+    print(f"interpreter startup: {baseline * 1000:.0f} ms")
+
+    failed = False
+    print(f"{'case':<8} {'median ms':>10}  plotting modules")
+    for name, argv in CASES:
+        code = PROBE.format(root=ROOT, argv=argv)
+        runs = [run_child(code) for _ in range(args.repeat)]
+        net_ms = (statistics.median(seconds for seconds, _ in runs) - baseline) * 1000
+        loaded = runs[-1][1]
+        print(f"{name:<8} {net_ms:>10.0f}  {loaded or '-'}")
+        if loaded:
+            print(f"  FAIL: {name} imported {loaded}")
+            failed = True
+        if net_ms > args.max_ms:
+            print(f"  FAIL: {name} took {net_ms:.0f} ms (limit {args.max_ms:.0f} ms)")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Benchmark the raster and vector map backends as the number of worked grids grows
+
+Renders one band of distinct 6-character grids spread over a region that
+keeps subsquare precision, once per backend, and reports the time to build
+and draw the grid layer (inside savefig) and the whole create_grid_map
+call. Background layers come from a warm basemap cache, so they cost the
+same for both backends.
+
+    python benchmarks/bench_raster.py --grids 5000 20000 50000 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import matplotlib
+matplotlib.use('Agg')
+
+import maidenhead_map as mm
+
+
+def spread_grid_counts(n_grids, seed=0):
+    """Distinct 6-character grids in a 25°×18° region around FN31, with skewed contact counts"""
+    rng = np.random.default_rng(seed)
+    # Cell indices in the 4320×4320 subsquare raster; the region has ~130k subsquares
+    lon_idx = rng.integers((180 - 90) * 12, (180 - 65) * 12, n_grids * 3)
+    lat_idx = rng.integers((90 + 30) * 24, (90 + 48) * 24, n_grids * 3)
+    ids = rng.permutation(np.unique(mm.GRID_ID_OFFSETS[2] + lat_idx * 4320 + lon_idx))[:n_grids]
+    counts = rng.geometric(0.3, len(ids)).astype(np.int64)
+    return mm.merge_grid_counts(mm.GridCounts(ids, counts))
+
+
+def time_backend(grids, backend, basemap_cache, output_dir, repeat):
+    """Best-of-`repeat` (grid layer seconds, create_grid_map seconds) for one backend"""
+    best_layer = best_total = float('inf')
+    for _ in range(repeat):
+        with open(os.devnull, 'w') as devnull, mm.StageProfiler() as profiler:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                with mm.stage('create_grid_map'):
+                    mm.create_grid_map(grids, 'BENCH', backend, ['north_america'], output_dir=output_dir,
+                                       reuse_figure=False, basemap_cache=basemap_cache, backend=backend)
+            finally:
+                sys.stdout = stdout
+        seconds = {}
+        for record in profiler.records:
+            seconds[record['stage']] = seconds.get(record['stage'], 0.0) + record['wall_s']
+        best_layer = min(best_layer, seconds.get('grid_squares', 0.0) + seconds.get('draw_grid_squares', 0.0))
+        best_total = min(best_total, seconds['create_grid_map'])
+    return best_layer, best_total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--grids', type=int, nargs='+', default=[1000, 10000, 50000, 100000],
+                        help='Distinct 6-character grids per map')
+    parser.add_argument('--repeat', type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        basemap_cache = mm.BasemapCache(os.path.join(output_dir, 'basemaps'))
+        print(f"{'grids':>7} {'vector layer s':>15} {'raster layer s':>15} {'vector map s':>13} "
+              f"{'raster map s':>13}")
+        for n_grids in args.grids:
+            grids = spread_grid_counts(n_grids)
+            vector = time_backend(grids, 'vector', basemap_cache, output_dir, args.repeat)
+            raster = time_backend(grids, 'raster', basemap_cache, output_dir, args.repeat)
+            print(f"{len(grids.ids):>7} {vector[0]:>15.3f} {raster[0]:>15.3f} {vector[1]:>13.2f} {raster[1]:>13.2f}")
+
+
+if __name__ == '__main__':
+    main()
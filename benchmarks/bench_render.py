@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Benchmark map rendering on dense microwave-style logs
+
+Compares drawing worked grids as one matplotlib patch per grid (the
+pre-collection approach) against the single PolyCollection used by
+create_grid_map, and measures figure reuse across bands sharing an extent.
+
+    python benchmarks/bench_render.py --grids 5000 --bands 4
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.patches as patches
+from matplotlib.collections import PolyCollection
+import matplotlib.pyplot as plt
+import cartopy.crs as ccrs
+
+import maidenhead_map as mm
+
+
+def dense_grid_counts(n_grids, seed=0):
+    """Distinct 6-character grids clustered around FN31 with skewed contact counts"""
+    rng = np.random.default_rng(seed)
+    # 6-character cell indices in the 4320×4320 subsquare raster around 41.5N 73W
+    lon_idx = np.clip(rng.normal((180 - 73) * 12, 60, n_grids * 2), 0, 4319).astype(np.int64)
+    lat_idx = np.clip(rng.normal((90 + 41.5) * 24, 60, n_grids * 2), 0, 4319).astype(np.int64)
+    ids = np.unique(mm.GRID_ID_OFFSETS[2] + lat_idx * 4320 + lon_idx)[:n_grids]
+    counts = rng.geometric(0.3, len(ids)).astype(np.int64)
+    return mm.GridCounts(ids, counts)
+
+
+def draw_patches(ax, grids, max_count):
+    """One Rectangle artist per grid, as create_grid_map used to draw them"""
+    lat_mins, lat_maxs, lon_mins, lon_maxs = mm.grid_id_bounds(grids.ids)
+    colors = plt.cm.Reds(0.3 + 0.7 * (grids.counts / max_count))
+    for i in range(len(grids.ids)):
+        ax.add_patch(patches.Rectangle((lon_mins[i], lat_mins[i]),
+                                       lon_maxs[i] - lon_mins[i], lat_maxs[i] - lat_mins[i],
+                                       linewidth=0.5, edgecolor='black', facecolor=colors[i],
+                                       alpha=0.8, transform=ccrs.PlateCarree()))
+
+
+def draw_collection(ax, grids, max_count):
+    """All grids as a single PolyCollection with per-face colors"""
+    lat_mins, lat_maxs, lon_mins, lon_maxs = mm.grid_id_bounds(grids.ids)
+    colors = plt.cm.Reds(0.3 + 0.7 * (grids.counts / max_count))
+    ax.add_collection(PolyCollection(mm._rectangle_vertices(lon_mins, lat_mins, lon_maxs, lat_maxs),
+                                     linewidths=0.5, edgecolors='black', facecolors=colors,
+                                     alpha=0.8, transform=ccrs.PlateCarree()), autolim=False)
+
+
+def time_overlay(draw, grids, dpi, repeat):
+    """Best-of-`repeat` seconds to draw the overlay and save at `dpi`"""
+    extent = mm.get_optimal_bounds(grids)
+    best = float('inf')
+    for _ in range(repeat):
+        base = mm._prepare_base_map(extent, reuse=False)
+        start = time.perf_counter()
+        draw(base['ax'], grids, int(grids.counts.max()))
+        base['fig'].savefig(io.BytesIO(), dpi=dpi, format='png')
+        best = min(best, time.perf_counter() - start)
+        plt.close(base['fig'])
+    return best
+
+
+def time_bands(grids, bands, reuse):
+    """Seconds for create_grid_map over `bands` bands that share one extent"""
+    with tempfile.TemporaryDirectory() as output_dir, open(os.devnull, 'w') as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            start = time.perf_counter()
+            for i in range(bands):
+                mm.create_grid_map(grids, 'BENCH', f'band{i}', ['north_america'],
+                                   output_dir=output_dir, reuse_figure=reuse)
+            return time.perf_counter() - start
+        finally:
+            sys.stdout = stdout
+            mm._base_map_cache.clear()
+            plt.close('all')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--grids', type=int, nargs='+', default=[500, 2000, 5000],
+                        help='Distinct 6-character grids per map')
+    parser.add_argument('--bands', type=int, default=4, help='Bands sharing one extent for the reuse test')
+    parser.add_argument('--dpi', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'grids':>7} {'patches s':>10} {'collection s':>13} {'speedup':>8}")
+    for n_grids in args.grids:
+        grids = dense_grid_counts(n_grids)
+        patch_s = time_overlay(draw_patches, grids, args.dpi, args.repeat)
+        collection_s = time_overlay(draw_collection, grids, args.dpi, args.repeat)
+        print(f"{len(grids.ids):>7} {patch_s:>10.3f} {collection_s:>13.3f} {patch_s / collection_s:>7.1f}x")
+
+    grids = dense_grid_counts(args.grids[-1])
+    fresh_s = time_bands(grids, args.bands, reuse=False)
+    reuse_s = time_bands(grids, args.bands, reuse=True)
+    print(f"\n{args.bands} bands, shared extent: fresh figures {fresh_s:.2f}s, "
+          f"reused figure {reuse_s:.2f}s ({fresh_s / reuse_s:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
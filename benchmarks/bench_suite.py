@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""Stage-by-stage benchmark suite on synthetic logs from 1k to 10M QSOs
+
+Times parse_cabrillo_grids, parse_csv_grids, parse_adif_grids, continent filtering,
+get_optimal_bounds, distance scoring and create_grid_map separately for each log size,
+records peak traced memory per stage, and writes the results as JSON.
+A previous results file can be compared against to spot regressions.
+
+    python benchmarks/bench_suite.py --sizes 1k 10k 100k 1M -o results.json
+    python benchmarks/bench_suite.py --sizes 1k 10k 100k 1M --compare results.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+sys.path.insert(0, HERE)
+
+import maidenhead_map as mm
+import maidenhead_score
+import synthetic_logs
+
+SIZE_SUFFIXES = {'k': 10 ** 3, 'm': 10 ** 6}
+RESULTS_VERSION = 1
+
+
+def parse_size(text):
+    """'1k' -> 1000, '10M' -> 10000000, '2500' -> 2500"""
+    suffix = text[-1].lower()
+    if suffix in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[suffix])
+    return int(float(text))
+
+
+def measure(func, repeat, trace_memory=True):
+    """(best seconds, best CPU seconds, peak traced bytes, result) of calling func()
+
+    Timing runs are untraced; peak memory comes from one extra traced run.
+    """
+    best_wall = best_cpu = float('inf')
+    result = None
+    for _ in range(repeat):
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = func()
+        best_wall = min(best_wall, time.perf_counter() - wall)
+        best_cpu = min(best_cpu, time.process_time() - cpu)
+    peak = None
+    if trace_memory:
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return best_wall, best_cpu, peak, result
+
+
+def synthetic_log(data_dir, log_format, qsos, seed):
+    """Path of a cached synthetic log, generating it on first use"""
+    extension = {'csv': 'csv', 'adif': 'adi'}.get(log_format, 'cbr')
+    path = os.path.join(data_dir, f"synthetic_{qsos}_seed{seed}.{extension}")
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        synthetic_logs.write_log(path + '.tmp', qsos, log_format, seed=seed)
+        os.replace(path + '.tmp', path)
+        print(f"  generated {path} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return path
+
+
+def quiet(func):
+    """Run func() with stdout discarded (create_grid_map and the parsers print progress)"""
+    def run():
+        with open(os.devnull, 'w') as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                return func()
+            finally:
+                sys.stdout = stdout
+    return run
+
+
+def run_size(qsos, args, output_dir):
+    """Benchmark every stage on logs of `qsos` QSOs; returns result rows"""
+    rows = []
+
+    def record(stage, func, repeat=args.repeat, **extra):
+        wall, cpu, peak, result = measure(quiet(func), repeat, not args.no_memory)
+        rows.append(dict(stage=stage, qsos=qsos, seconds=round(wall, 6), cpu_seconds=round(cpu, 6),
+                         peak_bytes=peak, **extra))
+        peak_text = f"{peak / 2 ** 20:8.1f} MiB" if peak is not None else ''
+        print(f"{qsos:>10} {stage:<26} {wall:9.4f}s {peak_text}")
+        return result
+
+    cabrillo = synthetic_log(args.data_dir, 'cabrillo', qsos, args.seed)
+    csv_log = synthetic_log(args.data_dir, 'csv', qsos, args.seed)
+    adif = synthetic_log(args.data_dir, 'adif', qsos, args.seed)
+    grids_by_band, _ = record('parse_cabrillo_grids', lambda: mm.parse_cabrillo_grids(cabrillo))
+    record('parse_csv_grids', lambda: mm.parse_csv_grids(csv_log))
+    record('parse_adif_grids', lambda: mm.parse_adif_grids(adif))
+
+    unique_grids = sum(len(grids.ids) for grids in grids_by_band.values())
+    record('auto_select_continents',
+           lambda: {band: mm.auto_select_continents(grids) for band, grids in grids_by_band.items()},
+           unique_grids=unique_grids)
+    record('filter_grids_by_continents',
+           lambda: {band: mm.filter_grids_by_continents(grids, ['north_america', 'europe'])
+                    for band, grids in grids_by_band.items()},
+           unique_grids=unique_grids)
+    record('get_optimal_bounds',
+           lambda: {band: mm.get_optimal_bounds(grids) for band, grids in grids_by_band.items()},
+           unique_grids=unique_grids)
+    contacts, _, _ = record('parse_cabrillo_contacts', lambda: maidenhead_score.parse_cabrillo_contacts(cabrillo))
+    record('score_contacts', lambda: maidenhead_score.score_contacts(contacts))
+
+    if not args.skip_render and qsos <= args.render_max:
+        # The busiest band, restricted to North America like a typical VHF contest map
+        band, grids = max(grids_by_band.items(), key=lambda item: len(item[1].ids))
+        mm._load_plotting()
+        mm.plt.switch_backend('Agg')
+        record('create_grid_map', lambda: mm.create_grid_map(grids, 'BENCH', band, ['north_america'],
+                                                             output_dir=output_dir, reuse_figure=False),
+               repeat=1, unique_grids=int(len(grids.ids)))
+    return rows
+
+
+def environment():
+    """Machine and code version the results were recorded with"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'version': RESULTS_VERSION,
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(results, baseline_file, threshold, min_seconds=0.005):
+    """Print per-stage ratios against a baseline results file; returns the number of regressions
+
+    Stages faster than `min_seconds` in both runs are timer noise and never
+    count as time regressions.
+    """
+    with open(baseline_file, 'r') as f:
+        baseline = {(row['stage'], row['qsos']): row for row in json.load(f)['results']}
+    regressions = 0
+    print(f"\n{'qsos':>10} {'stage':<26} {'base s':>9} {'now s':>9} {'ratio':>7} {'mem ratio':>9}")
+    for row in results:
+        base = baseline.get((row['stage'], row['qsos']))
+        if not base:
+            continue
+        ratio = row['seconds'] / base['seconds'] if base['seconds'] else float('inf')
+        mem_ratio = (row['peak_bytes'] / base['peak_bytes']
+                     if row.get('peak_bytes') and base.get('peak_bytes') else None)
+        flag = ''
+        slow = ratio > threshold and max(row['seconds'], base['seconds']) >= min_seconds
+        if slow or (mem_ratio is not None and mem_ratio > threshold):
+            flag = '  REGRESSION'
+            regressions += 1
+        mem_text = f"{mem_ratio:8.2f}x" if mem_ratio is not None else f"{'-':>9}"
+        print(f"{row['qsos']:>10} {row['stage']:<26} {base['seconds']:9.4f} {row['seconds']:9.4f} "
+              f"{ratio:6.2f}x {mem_text}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=parse_size, default=[1000, 10000, 100000, 1000000],
+                        help='Log sizes in QSOs (k/M suffixes accepted; default: 1k 10k 100k 1M)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing runs per stage (best is kept)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'maidenhead-bench'),
+                        help='Where generated logs are kept between runs')
+    parser.add_argument('--render-max', type=parse_size, default=1000000,
+                        help='Largest log size to run create_grid_map on')
+    parser.add_argument('--skip-render', action='store_true', help='Do not time create_grid_map')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the traced peak-memory runs')
+    parser.add_argument('--output', '-o', help='Write results JSON here')
+    parser.add_argument('--compare', metavar='BASELINE', help='Results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Ratio over the baseline that counts as a regression (default: 1.25)')
+    parser.add_argument('--min-seconds', type=float, default=0.005,
+                        help='Ignore time ratios of stages faster than this (default: 0.005)')
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    results = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        print(f"{'qsos':>10} {'stage':<26} {'seconds':>10} {'peak':>12}")
+        for qsos in args.sizes:
+            results.extend(run_size(qsos, args, output_dir))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold, args.min_seconds) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""Deterministic synthetic contest logs (Cabrillo, CSV or ADIF) for benchmarks
+
+Worked stations are drawn from population-weighted clusters (dense in
+North America and Europe, sparse elsewhere), so grid counts are skewed the
+way real logs are. The same arguments and seed always give the same file.
+
+    python benchmarks/synthetic_logs.py --qsos 100000 -o big.cbr
+    python benchmarks/synthetic_logs.py --qsos 1e6 --bands 6m=0.6,2m=0.4 --six-char-ratio 0.8 -o mw.csv
+    python benchmarks/synthetic_logs.py --qsos 100000 -o big.adi
+"""
+import argparse
+import gzip
+import os
+
+import numpy as np
+
+# Frequency field written for each band (kHz for HF, Cabrillo MHz shorthand above)
+BAND_FREQS = {
+    '160m': '1830', '80m': '3550', '40m': '7030', '20m': '14025', '15m': '21025', '10m': '28025',
+    '6m': '50', '2m': '144', '1.25m': '222', '70cm': '432', '33cm': '902', '23cm': '1296',
+    '13cm': '2304', '3cm': '10368',
+}
+HF_BANDS = {'160m', '80m', '40m', '20m', '15m', '10m'}
+DEFAULT_BAND_MIX = {'6m': 0.45, '2m': 0.3, '70cm': 0.15, '23cm': 0.05, '20m': 0.05}
+
+# (lat, lon, lat spread, lon spread, weight) of where worked stations are
+POPULATION_CENTERS = [
+    (41.0, -74.5, 2.5, 4.0, 0.18),    # US northeast
+    (39.0, -77.5, 2.0, 3.0, 0.08),    # mid-Atlantic
+    (42.0, -87.5, 2.5, 4.0, 0.08),    # Great Lakes
+    (33.5, -84.5, 3.0, 4.0, 0.06),    # US southeast
+    (28.0, -81.5, 1.5, 2.0, 0.04),    # Florida
+    (32.5, -97.0, 3.0, 4.0, 0.05),    # Texas
+    (37.5, -122.0, 2.0, 2.0, 0.05),   # California
+    (47.5, -122.5, 1.5, 2.0, 0.03),   # Pacific northwest
+    (39.5, -105.0, 2.5, 4.0, 0.02),   # Rockies
+    (45.0, -75.0, 2.0, 4.0, 0.03),    # Ontario / Quebec
+    (51.5, 0.0, 2.0, 3.0, 0.05),      # England
+    (50.5, 8.5, 2.5, 4.0, 0.08),      # Germany / Benelux
+    (45.5, 10.0, 2.5, 4.0, 0.04),     # Italy / Alps
+    (47.0, 2.5, 2.5, 3.0, 0.03),      # France
+    (59.5, 17.0, 3.0, 6.0, 0.02),     # Scandinavia
+    (50.0, 20.0, 2.5, 5.0, 0.03),     # central Europe
+    (35.5, 138.5, 2.0, 3.0, 0.05),    # Japan
+    (-33.5, 150.5, 2.0, 3.0, 0.01),   # Australia east coast
+    (-23.5, -46.5, 3.0, 4.0, 0.01),   # Brazil
+    (-26.0, 28.0, 2.0, 3.0, 0.005),   # South Africa
+    (15.0, 20.0, 25.0, 70.0, 0.005),  # scattered DX
+]
+
+CALL_PREFIXES = np.array(['K', 'W', 'N', 'AA', 'KB', 'WA', 'VE', 'G', 'DL', 'F', 'I', 'SM', 'SP',
+                          'JA', 'VK', 'PY', 'ZS'])
+LETTERS = np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+CHUNK_QSOS = 100000
+
+
+def latlon_to_grids(lat, lon, six_char):
+    """Maidenhead locators for points: 6 characters where `six_char` is set, else 4"""
+    lon = np.clip(lon + 180, 0, 360 - 1e-9)
+    lat = np.clip(lat + 90, 0, 180 - 1e-9)
+    field_lon, field_lat = (lon // 20).astype(int), (lat // 10).astype(int)
+    square_lon, square_lat = ((lon % 20) // 2).astype(int), (lat % 10).astype(int)
+    sub_lon, sub_lat = ((lon % 2) * 12).astype(int), ((lat % 1) * 24).astype(int)
+    grids = np.char.add(np.char.add(np.array(list('ABCDEFGHIJKLMNOPQR'))[field_lon],
+                                    np.array(list('ABCDEFGHIJKLMNOPQR'))[field_lat]),
+                        np.char.add(square_lon.astype('U1'), square_lat.astype('U1')))
+    subsquares = np.char.add(np.char.lower(LETTERS[sub_lon]), np.char.lower(LETTERS[sub_lat]))
+    return np.where(six_char, np.char.add(grids, subsquares), grids)
+
+
+def generate_qsos(rng, n, band_mix=None, six_char_ratio=0.3):
+    """One chunk of `n` synthetic QSOs as arrays: band, freq, grid, call"""
+    band_mix = band_mix or DEFAULT_BAND_MIX
+    bands = np.array(list(band_mix))
+    weights = np.array(list(band_mix.values()), dtype=float)
+    band_idx = rng.choice(len(bands), n, p=weights / weights.sum())
+    band = bands[band_idx]
+    freq = np.array([BAND_FREQS[b] for b in bands], dtype=object)[band_idx]
+
+    centers = np.array([c[:4] for c in POPULATION_CENTERS])
+    center_weights = np.array([c[4] for c in POPULATION_CENTERS])
+    which = rng.choice(len(centers), n, p=center_weights / center_weights.sum())
+    lat = rng.normal(centers[which, 0], centers[which, 2])
+    lon = rng.normal(centers[which, 1], centers[which, 3])
+    grid = latlon_to_grids(lat, lon, rng.random(n) < six_char_ratio)
+
+    call = np.char.add(np.char.add(CALL_PREFIXES[rng.integers(0, len(CALL_PREFIXES), n)],
+                                   rng.integers(0, 10, n).astype('U1')),
+                       np.char.add(LETTERS[rng.integers(0, 26, n)], LETTERS[rng.integers(0, 26, n)]))
+    return {'band': band, 'freq': freq, 'grid': grid, 'call': call}
+
+
+def iter_qso_chunks(qsos, band_mix=None, six_char_ratio=0.3, seed=0, chunk_size=CHUNK_QSOS):
+    """Yield (first QSO number, chunk) for `qsos` QSOs in fixed-size chunks, deterministically"""
+    rng = np.random.default_rng(seed)
+    for start in range(0, qsos, chunk_size):
+        yield start, generate_qsos(rng, min(chunk_size, qsos - start), band_mix, six_char_ratio)
+
+
+def _qso_times(start, n, total):
+    """Date and HHMM strings spreading QSO numbers [start, start + n) over a 33-hour contest"""
+    minutes = (np.arange(start, start + n) * (33 * 60) // max(total, 1)) + 18 * 60
+    days = minutes // (24 * 60)
+    hhmm = (minutes % (24 * 60)) // 60 * 100 + minutes % 60
+    return np.where(days == 0, '2025-09-13', '2025-09-14'), np.char.zfill(hhmm.astype('U4'), 4)
+
+
+def _open(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', compresslevel=6, newline='')
+    return open(path, 'w', newline='')
+
+
+def write_cabrillo(path, qsos, band_mix=None, six_char_ratio=0.3, seed=0,
+                   callsign='W1SYN', my_grid='FN31'):
+    """Write a synthetic Cabrillo 3.0 log (gzip-compressed if `path` ends in .gz)"""
+    with _open(path) as f:
+        f.write(f"START-OF-LOG: 3.0\nCALLSIGN: {callsign}\nCONTEST: SYNTHETIC\n"
+                f"CATEGORY-OPERATOR: SINGLE-OP\nCREATED-BY: maidenhead-map synthetic_logs\n")
+        for start, chunk in iter_qso_chunks(qsos, band_mix, six_char_ratio, seed):
+            dates, times = _qso_times(start, len(chunk['grid']), qsos)
+            f.write(''.join(
+                f"QSO: {freq:>6} PH {date} {time} {callsign:<13} {my_grid:<6} {call:<13} {grid}\n"
+                for freq, date, time, call, grid in zip(chunk['freq'], dates.tolist(), times.tolist(),
+                                                        chunk['call'].tolist(), chunk['grid'].tolist())))
+        f.write("END-OF-LOG:\n")
+
+
+def write_csv(path, qsos, band_mix=None, six_char_ratio=0.3, seed=0, callsign='W1SYN'):
+    """Write a synthetic CSV log (callsign,freq,grid,date,time), like example_contest.csv"""
+    with _open(path) as f:
+        f.write("callsign,freq,grid,date,time\n")
+        for start, chunk in iter_qso_chunks(qsos, band_mix, six_char_ratio, seed):
+            dates, times = _qso_times(start, len(chunk['grid']), qsos)
+            f.write(''.join(
+                f"{call},{freq},{grid},{date},{time}\n"
+                for call, freq, grid, date, time in zip(chunk['call'].tolist(), chunk['freq'],
+                                                        chunk['grid'].tolist(), dates.tolist(), times.tolist())))
+
+
+def _adif_field(name, values):
+    """'<NAME:len>value ' strings for an array of values"""
+    values = np.asarray(values, dtype=str)
+    return np.char.add(np.char.add(f"<{name}:", np.char.str_len(values).astype(str)),
+                       np.char.add('>', np.char.add(values, ' ')))
+
+def write_adif(path, qsos, band_mix=None, six_char_ratio=0.3, seed=0, callsign='W1SYN', my_grid='FN31'):
+    """Write a synthetic ADIF log (FREQ in MHz, as logging programs and LoTW write it)"""
+    station = f"<STATION_CALLSIGN:{len(callsign)}>{callsign} <MY_GRIDSQUARE:{len(my_grid)}>{my_grid} "
+    with _open(path) as f:
+        f.write("Synthetic log from maidenhead-map synthetic_logs\n<ADIF_VER:5>3.1.4 "
+                "<PROGRAMID:14>synthetic_logs <EOH>\n")
+        for start, chunk in iter_qso_chunks(qsos, band_mix, six_char_ratio, seed):
+            dates, times = _qso_times(start, len(chunk['grid']), qsos)
+            freq_mhz = [str(int(freq) / 1000) if band in HF_BANDS else freq
+                        for band, freq in zip(chunk['band'].tolist(), chunk['freq'])]
+            fields = [_adif_field('CALL', chunk['call']), _adif_field('BAND', chunk['band']),
+                      _adif_field('FREQ', freq_mhz), _adif_field('MODE', np.full(len(dates), 'SSB')),
+                      _adif_field('QSO_DATE', np.char.replace(dates, '-', '')),
+                      _adif_field('TIME_ON', times), _adif_field('GRIDSQUARE', chunk['grid'])]
+            records = fields[0]
+            for field in fields[1:]:
+                records = np.char.add(records, field)
+            f.write(''.join(f"{record}{station}<EOR>\n" for record in records.tolist()))
+
+def write_log(path, qsos, log_format=None, **options):
+    """Write a synthetic log in `log_format` ('cabrillo', 'csv' or 'adif', default from the extension)"""
+    name = path[:-3] if path.endswith('.gz') else path
+    if not log_format:
+        log_format = 'csv' if name.endswith('.csv') else 'adif' if name.endswith(('.adi', '.adif')) else 'cabrillo'
+    if log_format == 'csv':
+        options.pop('my_grid', None)
+        write_csv(path, qsos, **options)
+    elif log_format == 'adif':
+        write_adif(path, qsos, **options)
+    else:
+        write_cabrillo(path, qsos, **options)
+    return path
+
+
+def parse_band_mix(text):
+    """'6m=0.5,2m=0.3,70cm=0.2' -> {'6m': 0.5, '2m': 0.3, '70cm': 0.2}"""
+    mix = {}
+    for item in text.split(','):
+        band, _, weight = item.partition('=')
+        if band not in BAND_FREQS:
+            raise argparse.ArgumentTypeError(f"unknown band {band!r} (choose from {', '.join(BAND_FREQS)})")
+        mix[band] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--qsos', type=float, default=10000, help='Number of QSOs (1e6 notation accepted)')
+    parser.add_argument('--format', dest='log_format', choices=['cabrillo', 'csv', 'adif'],
+                        help='Log format (default: from the output extension)')
+    parser.add_argument('--bands', type=parse_band_mix, help='Band mix, e.g. 6m=0.5,2m=0.3,70cm=0.2')
+    parser.add_argument('--six-char-ratio', type=float, default=0.3,
+                        help='Fraction of 6-character grids (the rest are 4-character)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', '-o', required=True, help='Output file (.cbr, .log, .csv or .adi, optionally .gz)')
+    args = parser.parse_args()
+
+    write_log(args.output, int(args.qsos), args.log_format, band_mix=args.bands,
+              six_char_ratio=args.six_char_ratio, seed=args.seed)
+    print(f"Wrote {int(args.qsos)} QSOs to {args.output} ({os.path.getsize(args.output)} bytes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Time-lapse animations of a contest log's worked grids, frame by frame
+
+Each worker process draws the band's map once, with create_grid_map's
+drawing code and the band's final counts. It then renders a contiguous
+segment of frames by updating only the grid squares' face and edge colors
+and a clock, blitted over a saved copy of the static background. GIF frames
+are quantized to a shared palette, cropped to the area that changed and
+LZW-encoded in the workers; the parent only concatenates them. MP4 segments
+are encoded by one ffmpeg per worker and joined without re-encoding.
+"""
+
+import concurrent.futures
+import contextlib
+import io
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import maidenhead_map as mm
+
+ANIMATION_FORMATS = ('gif', 'mp4')
+# Frame resolution: the map's MAP_FIGSIZE at this dpi (80 dpi = 1120×800 pixels)
+ANIMATION_DPI = 80
+# Alpha of worked grid squares, as in create_grid_map
+SQUARE_ALPHA = 0.8
+
+def frame_times(times, step_minutes=10):
+    """End time (exclusive) of each frame: every `step_minutes` from the hour of the first QSO past the last
+
+    `step_minutes` is a whole number of minutes, the resolution of Cabrillo QSO times.
+    """
+    if step_minutes < 1:
+        raise ValueError(f"Frame step must be at least 1 minute, not {step_minutes}")
+    step = np.timedelta64(step_minutes, 'm')
+    start = times[0].astype('datetime64[h]').astype('datetime64[m]')
+    n_frames = int((times[-1] - start) // step) + 1
+    return start + step * np.arange(1, n_frames + 1)
+
+class TimelapseFrames:
+    """Frames of one band's time-lapse, drawn on a map figure built once
+
+    `timeline` is the band's (times, grid IDs) from parse_cabrillo_timeline.
+    The map is drawn for the final counts; frame `i` shows the contacts
+    logged before `frame_ends[i]`, with unworked squares transparent.
+    Consecutive frames only add that interval's contacts to the running
+    counts.
+    """
+
+    def __init__(self, timeline, callsign, band, continents=None, step_minutes=10, dpi=ANIMATION_DPI,
+                 basemap_cache=None):
+        times, ids = timeline
+        self.drawn = mm._draw_grid_map(mm.count_grid_ids(ids), callsign, band, continents,
+                                       reuse_figure=False, basemap_cache=basemap_cache)
+        if self.drawn is None:
+            raise ValueError(f"No valid grid squares found for {band} in selected continents")
+        self.frame_ends = frame_times(times, step_minutes)
+        drawn_grids = self.drawn['drawn_grids']
+
+        # Each contact's drawn square (grids outside the continents are dropped, fine ones coarsened)
+        valid = np.isin(ids, self.drawn['valid_grids'].ids)
+        self._square = np.searchsorted(drawn_grids.ids, mm.coarsen_grid_ids(ids[valid], self.drawn['lod_length']))
+        frame_of = np.searchsorted(self.frame_ends, times[valid], side='right')
+        self._frame_starts = np.searchsorted(frame_of, np.arange(len(self.frame_ends) + 1))
+        self._counts = np.zeros(len(drawn_grids.ids), dtype=np.int64)
+        self._next_frame = 0
+        self._colors = mm.plt.cm.Reds
+
+        fig, ax = self.drawn['fig'], self.drawn['ax']
+        fig.set_dpi(dpi)
+        self.squares = self.drawn['squares']
+        self.squares.set_alpha(None)  # per-face alpha, so unworked squares can be fully transparent
+        self.clock = ax.text(0.01, 0.01, '', transform=ax.transAxes, fontsize=12, fontweight='bold',
+                             zorder=10, bbox=dict(facecolor='white', alpha=0.8, edgecolor='none'))
+        # Redrawn every frame on top of the background: the squares, the labels above them, the clock
+        self._animated = [self.squares] + list(self.drawn['labels']) + [self.clock]
+        for artist in self._animated:
+            artist.set_animated(True)
+        self.canvas = fig.canvas
+        self.canvas.draw()
+        self._background = self.canvas.copy_from_bbox(fig.bbox)
+
+    def __len__(self):
+        return len(self.frame_ends)
+
+    @property
+    def size(self):
+        """(width, height) of a frame in pixels"""
+        width, height = self.canvas.get_width_height()
+        return width, height
+
+    def render(self, frame):
+        """RGB array of frame `frame`"""
+        if frame != self._next_frame:
+            self._counts = np.bincount(self._square[:self._frame_starts[frame]], minlength=len(self._counts))
+        self._counts += np.bincount(self._square[self._frame_starts[frame]:self._frame_starts[frame + 1]],
+                                    minlength=len(self._counts))
+        self._next_frame = frame + 1
+
+        worked = self._counts > 0
+        faces = np.zeros((len(self._counts), 4))
+        faces[worked] = self._colors(0.3 + 0.7 * (self._counts[worked] / self.drawn['max_count']))
+        faces[worked, 3] = SQUARE_ALPHA
+        edges = np.zeros((len(self._counts), 4))
+        edges[worked, 3] = SQUARE_ALPHA
+        self.squares.set_facecolor(faces)
+        self.squares.set_edgecolor(edges)
+        end = self.frame_ends[frame]
+        self.clock.set_text(f"{str(end).replace('T', ' ')} UTC   {int(worked.sum())} grids, "
+                            f"{self._frame_starts[frame + 1]} contacts")
+
+        self.canvas.restore_region(self._background)
+        for artist in self._animated:
+            self.drawn['ax'].draw_artist(artist)
+        return np.asarray(self.canvas.buffer_rgba())[:, :, :3].copy()
+
+    def close(self):
+        mm.plt.close(self.drawn['fig'])
+
+def _gif_frame(indexed, previous, palette, delay_cs):
+    """One GIF frame block (graphic control extension, image descriptor, local palette, LZW data)
+
+    Only the bounding box of pixels that differ from `previous` (an index
+    array, or None for a full frame) is encoded; the rest of the previous
+    frame is kept (disposal method 1).
+    """
+    from PIL import Image
+
+    height, width = indexed.shape
+    left, top, right, bottom = 0, 0, width, height
+    if previous is not None:
+        changed = indexed != previous
+        rows, cols = np.flatnonzero(changed.any(axis=1)), np.flatnonzero(changed.any(axis=0))
+        if len(rows):
+            top, bottom, left, right = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+        else:
+            right, bottom = 1, 1
+    image = Image.fromarray(np.ascontiguousarray(indexed[top:bottom, left:right]), 'P')
+    image.putpalette(palette)
+    buffer = io.BytesIO()
+    image.save(buffer, 'GIF', optimize=False, interlace=False)
+    data = buffer.getvalue()
+
+    # Skip Pillow's header, logical screen descriptor, global palette and extensions
+    packed = data[10]
+    pos = 13 + (3 << ((packed & 7) + 1) if packed & 0x80 else 0)
+    while data[pos] == 0x21:
+        pos += 2
+        while data[pos]:
+            pos += data[pos] + 1
+        pos += 1
+    image_packed = data[pos + 9]
+    pos += 10
+    if image_packed & 0x80:
+        pos += 3 << ((image_packed & 7) + 1)
+    lzw = data[pos:data.rindex(b';')]
+
+    table = bytes(palette[:768]).ljust(768, b'\0')
+    control = b'\x21\xf9\x04' + struct.pack('<BHB', 1 << 2, delay_cs, 0) + b'\0'
+    descriptor = b',' + struct.pack('<HHHHB', left, top, right - left, bottom - top,
+                                      0x80 | (image_packed & 0x40) | 7)
+    return control + descriptor + table + lzw
+
+def _write_gif(path, size, frame_files):
+    """Concatenate frame blocks from `frame_files` into a looping GIF"""
+    width, height = size
+    with open(path, 'wb') as out:
+        out.write(b'GIF89a' + struct.pack('<HHBBB', width, height, 0, 0, 0))
+        out.write(b'\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00')  # loop forever
+        for frame_file in frame_files:
+            with open(frame_file, 'rb') as f:
+                shutil.copyfileobj(f, out)
+        out.write(b';')
+
+def _ffmpeg_command(size, fps, output):
+    width, height = size
+    return ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+            '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+            '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-c:v', 'libx264', '-pix_fmt', 'yuv420p', output]
+
+def _render_segment_task(task):
+    """Worker entry point: render frames [start, stop) of one band and encode them to `output`
+
+    Returns (frames written, frame size, seconds).
+    """
+    timeline, callsign, band, options, start, stop, output, last = task
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        frames = TimelapseFrames(timeline, callsign, band, options['continents'], options['step_minutes'],
+                                 options['dpi'], options['basemap_cache'])
+    fps, hold_frames = options['fps'], int(round(options['hold_seconds'] * options['fps']))
+    try:
+        if options['format'] == 'gif':
+            from PIL import Image
+
+            # Every worker derives the same palette from the final frame, so segments match
+            palette_image = Image.fromarray(frames.render(len(frames) - 1)).quantize(
+                256, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+            palette = palette_image.getpalette()[:768]
+
+            def indexed(frame):
+                image = Image.fromarray(frames.render(frame)).quantize(palette=palette_image,
+                                                                       dither=Image.Dither.NONE)
+                return np.asarray(image)
+
+            delay_cs = max(2, int(round(100 / fps)))
+            previous = indexed(start - 1) if start else None
+            with open(output, 'wb') as out:
+                for frame in range(start, stop):
+                    current = indexed(frame)
+                    hold = last and frame == stop - 1
+                    out.write(_gif_frame(current, previous, palette,
+                                         delay_cs + (int(options['hold_seconds'] * 100) if hold else 0)))
+                    previous = current
+        else:
+            ffmpeg = subprocess.Popen(_ffmpeg_command(frames.size, fps, output), stdin=subprocess.PIPE)
+            try:
+                for frame in range(start, stop):
+                    image = frames.render(frame)
+                    ffmpeg.stdin.write(image.tobytes())
+                if last:
+                    for _ in range(hold_frames):
+                        ffmpeg.stdin.write(image.tobytes())
+            finally:
+                ffmpeg.stdin.close()
+                if ffmpeg.wait():
+                    raise RuntimeError(f"ffmpeg failed encoding {output}")
+        size = frames.size
+    finally:
+        frames.close()
+    return stop - start, size, time.perf_counter() - started
+
+def animate_band(timeline, callsign, band, output_file, continents=None, step_minutes=10, fps=12,
+                 dpi=ANIMATION_DPI, hold_seconds=3, jobs=0, basemap_cache=None):
+    """Render one band's time-lapse to `output_file` (.gif or .mp4) across `jobs` worker processes
+
+    Frames are split into one contiguous segment per worker (0 = one per
+    CPU). Returns the number of frames.
+    """
+    video_format = os.path.splitext(output_file)[1].lower().lstrip('.')
+    if video_format not in ANIMATION_FORMATS:
+        raise ValueError(f"Unsupported animation format: {output_file} (use .gif or .mp4)")
+    if video_format == 'mp4' and not shutil.which('ffmpeg'):
+        raise RuntimeError("MP4 output needs ffmpeg on the PATH")
+
+    n_frames = len(frame_times(timeline[0], step_minutes))
+    workers = max(1, min(jobs or os.cpu_count() or 1, n_frames))
+    bounds = np.linspace(0, n_frames, workers + 1).astype(int)
+    options = {'continents': continents, 'step_minutes': step_minutes, 'dpi': dpi, 'fps': fps,
+               'hold_seconds': hold_seconds, 'format': video_format, 'basemap_cache': basemap_cache}
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_file))) as tmp:
+        segments = [os.path.join(tmp, f"segment_{i:04d}.{'gifpart' if video_format == 'gif' else 'mp4'}")
+                    for i in range(workers)]
+        tasks = [(timeline, callsign, band, options, int(bounds[i]), int(bounds[i + 1]), segments[i],
+                  i == workers - 1) for i in range(workers)]
+        if workers == 1:
+            mm._load_plotting()
+            mm.plt.switch_backend('Agg')
+            results = [_render_segment_task(tasks[0])]
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                        initializer=mm._init_render_worker,
+                                                        initargs=(mm._continent_table_path,)) as pool:
+                results = list(pool.map(_render_segment_task, tasks))
+
+        size = results[0][1]
+        if video_format == 'gif':
+            _write_gif(output_file, size, segments)
+        else:
+            concat_list = os.path.join(tmp, 'segments.txt')
+            with open(concat_list, 'w') as f:
+                f.writelines(f"file '{segment}'\n" for segment in segments)
+            subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                            '-i', concat_list, '-c', 'copy', output_file], check=True)
+    return n_frames
+
+def _positive_int(value):
+    """argparse type for whole numbers of at least 1"""
+    import argparse
+
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"must be a whole number, not {value}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {value}")
+    return number
+
+def main(argv=None):
+    """`maidenhead-map animate`: time-lapse GIF/MP4 of worked grids over the contest"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='maidenhead-map animate',
+                                     description='Animate coverage growing over a contest from a Cabrillo log')
+    parser.add_argument('filename', help='Cabrillo log file (optionally .gz)')
+    parser.add_argument('--band', nargs='+', help='Bands to animate (default: every band with grids)')
+    parser.add_argument('--to', dest='video_format', choices=ANIMATION_FORMATS, default='gif',
+                       help='Output format (default: gif; mp4 needs ffmpeg)')
+    parser.add_argument('--output-dir', '-o', default='.', help='Directory for the animations')
+    parser.add_argument('--step', type=_positive_int, default=10, metavar='MINUTES',
+                       help='Whole minutes of contest time covered by each frame (default: 10)')
+    parser.add_argument('--fps', type=float, default=12, help='Frames per second (default: 12)')
+    parser.add_argument('--dpi', type=int, default=ANIMATION_DPI,
+                       help=f'Frame resolution (default: {ANIMATION_DPI}, i.e. 1120x800 pixels)')
+    parser.add_argument('--hold', type=float, default=3, metavar='SECONDS',
+                       help='How long the final frame is shown (default: 3)')
+    parser.add_argument('--continents', nargs='+',
+                       choices=['north_america', 'south_america', 'europe', 'africa', 'asia', 'oceania'],
+                       help='Continents to include (auto-detected per band if not specified)')
+    parser.add_argument('--jobs', '-j', type=mm._job_count, default=0,
+                       help='Worker processes rendering and encoding frames (0 = one per CPU)')
+    mm._add_band_plan_argument(parser)
+    mm._add_continent_table_argument(parser)
+    mm._add_cache_arguments(parser, parse_cache=False)
+    args = parser.parse_args(argv)
+    if args.video_format == 'mp4' and not shutil.which('ffmpeg'):
+        print("MP4 output needs ffmpeg on the PATH; use --to gif or install ffmpeg")
+        return 1
+    if args.continent_table:
+        mm.load_continent_table(args.continent_table)
+
+    timeline, callsign = mm.parse_cabrillo_timeline(args.filename, args.band_plan)
+    bands = args.band or list(timeline)
+    missing = [band for band in bands if band not in timeline]
+    if missing:
+        print(f"No timed QSOs with grids for: {', '.join(missing)}")
+    bands = [band for band in bands if band in timeline]
+    if not bands:
+        print("No timed QSOs with Maidenhead grid squares found in file")
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    basemap_cache = mm._basemap_cache_from_args(args)
+    for band in bands:
+        times, ids = timeline[band]
+        grids = mm.count_grid_ids(ids)
+        continents = args.continents or mm.auto_select_continents(grids)
+        valid = mm.filter_grids_by_continents(grids, continents)
+        if not len(valid.ids):
+            print(f"No valid grid squares found for {band} in selected continents")
+            continue
+        region_name = mm.get_region_name(*mm.get_optimal_bounds(valid.ids))
+        output_file = os.path.join(args.output_dir,
+                                   f"{callsign}_{band}_{region_name}_timelapse.{args.video_format}")
+        started = time.perf_counter()
+        n_frames = animate_band(timeline[band], callsign, band, output_file, continents, args.step, args.fps,
+                                args.dpi, args.hold, args.jobs, basemap_cache)
+        print(f"Animation saved as {output_file}")
+        print(f"{band}: {n_frames} frames of {args.step} minutes from {str(times[0]).replace('T', ' ')} UTC, "
+              f"rendered in {time.perf_counter() - started:.1f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
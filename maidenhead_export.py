@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Export worked grids as GeoJSON, SVG, CSV or Parquet
+
+Exports are built directly from the parsed {band: GridCounts} and the grid
+ID decoding, without matplotlib or cartopy, and can stream to stdout.
+"""
+
+import contextlib
+import csv
+import itertools
+import json
+import os
+import sys
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+import maidenhead_map as mm
+
+EXPORT_FORMATS = ('geojson', 'svg', 'csv', 'parquet')
+EXPORT_EXTENSIONS = {'.geojson': 'geojson', '.json': 'geojson', '.svg': 'svg',
+                     '.csv': 'csv', '.parquet': 'parquet'}
+CSV_COLUMNS = ['band', 'grid', 'count', 'lat_min', 'lat_max', 'lon_min', 'lon_max', 'continent']
+# Features per write when streaming text formats
+EXPORT_BATCH = 4096
+
+def grid_records(grids_by_band):
+    """Column arrays (CSV_COLUMNS) for every worked grid, band by band"""
+    columns = {name: [] for name in CSV_COLUMNS}
+    for band, grids in grids_by_band.items():
+        lat_min, lat_max, lon_min, lon_max = mm.grid_id_bounds(grids.ids)
+        columns['band'].append(np.full(len(grids.ids), band, dtype=object))
+        columns['grid'].append(mm.decode_grid_ids(grids.ids).astype(object))
+        columns['count'].append(grids.counts)
+        columns['lat_min'].append(lat_min)
+        columns['lat_max'].append(lat_max)
+        columns['lon_min'].append(lon_min)
+        columns['lon_max'].append(lon_max)
+        columns['continent'].append(mm.grid_id_continents(grids.ids))
+    return {name: (np.concatenate(parts) if parts else np.empty(0)) for name, parts in columns.items()}
+
+def _coordinates(values):
+    """Bounds as short decimal strings
+    
+    Grid edges are multiples of 1/240 degree, so there are few distinct
+    values: each is formatted once and the strings are gathered by index.
+    """
+    unique, inverse = np.unique(np.round(values, 6), return_inverse=True)
+    strings = np.array([f'{value:.6f}'.rstrip('0').rstrip('.') for value in unique], dtype=object)
+    return strings[inverse.reshape(-1)].tolist()
+
+def _batches(records):
+    """Slices of the records with the bounds columns already formatted as strings"""
+    records = dict(records, band=records['band'].tolist(), grid=records['grid'].tolist(),
+                   count=records['count'].tolist(), continent=records['continent'].tolist(),
+                   **{name: _coordinates(records[name]) for name in ('lat_min', 'lat_max', 'lon_min', 'lon_max')})
+    total = len(records['grid'])
+    for start in range(0, total, EXPORT_BATCH):
+        yield {name: values[start:start + EXPORT_BATCH] for name, values in records.items()}
+
+def write_geojson(grids_by_band, out, callsign=None):
+    """Write a GeoJSON FeatureCollection with one rectangle Feature per band and grid"""
+    records = grid_records(grids_by_band)
+    properties = f', "callsign": {json.dumps(callsign)}' if callsign else ''
+    band_names = {band: json.dumps(band) for band in grids_by_band}
+    out.write('{"type": "FeatureCollection", "features": [\n')
+    first = True
+    for batch in _batches(records):
+        features = [
+            '{"type": "Feature", "geometry": {"type": "Polygon", "coordinates": '
+            f'[[[{w}, {s}], [{e}, {s}], [{e}, {n}], [{w}, {n}], [{w}, {s}]]]}}, '
+            f'"properties": {{"grid": "{grid}", "band": {band_names[band]}, "count": {count}, '
+            f'"continent": "{continent}"{properties}}}}}'
+            for grid, band, count, continent, w, e, s, n in zip(
+                batch['grid'], batch['band'], batch['count'], batch['continent'],
+                batch['lon_min'], batch['lon_max'], batch['lat_min'], batch['lat_max'])]
+        out.write(('' if first else ',\n') + ',\n'.join(features))
+        first = False
+    out.write('\n]}\n')
+
+def write_svg(grids_by_band, out, callsign=None):
+    """Write an equirectangular SVG with one layer (<g>) of colored rectangles per band
+
+    Coordinates are degrees (x = longitude, y = -latitude); squares use the
+    same Reds scale as the PNG maps, per band.
+    """
+    bounds = [mm.get_optimal_bounds(grids) for grids in grids_by_band.values()]
+    if bounds:
+        lon_min = min(b[0] for b in bounds)
+        lon_max = max(b[1] for b in bounds)
+        lat_min = min(b[2] for b in bounds)
+        lat_max = max(b[3] for b in bounds)
+    else:
+        lon_min, lon_max, lat_min, lat_max = -180, 180, -90, 90
+    width, height = lon_max - lon_min, lat_max - lat_min
+    scale = 1000 / max(width, height)
+    out.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width * scale:.0f}" '
+              f'height="{height * scale:.0f}" viewBox="{lon_min:g} {-lat_max:g} {width:g} {height:g}">\n')
+    if callsign:
+        out.write(f'<title>{escape(callsign)} - Maidenhead Grid Squares</title>\n')
+    for band, grids in grids_by_band.items():
+        out.write(f'<g id="band-{escape(band)}" stroke="black" stroke-width="{0.5 / scale:.4g}" fill-opacity="0.8">\n')
+        lat_mins, lat_maxs, lon_mins, lon_maxs = mm.grid_id_bounds(grids.ids)
+        x, y = _coordinates(lon_mins), _coordinates(-lat_maxs)
+        w, h = _coordinates(lon_maxs - lon_mins), _coordinates(lat_maxs - lat_mins)
+        colors = np.round(mm.count_colors(grids.counts, int(grids.counts.max())) * 255).astype(int)
+        fills = ['#%02x%02x%02x' % tuple(rgb) for rgb in colors.tolist()]
+        rects = zip(x, y, w, h, fills, mm.decode_grid_ids(grids.ids).tolist(), grids.counts.tolist())
+        for batch in iter(lambda: list(itertools.islice(rects, EXPORT_BATCH)), []):
+            out.write(''.join(
+                f'<rect x="{x}" y="{y}" width="{w}" height="{h}" fill="{fill}">'
+                f'<title>{grid} {count}</title></rect>\n'
+                for x, y, w, h, fill, grid, count in batch))
+        out.write('</g>\n')
+    out.write('</svg>\n')
+
+def write_csv(grids_by_band, out, callsign=None):
+    """Write one CSV row (CSV_COLUMNS) per band and grid"""
+    records = grid_records(grids_by_band)
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(CSV_COLUMNS)
+    for batch in _batches(records):
+        columns = [batch['band'], batch['grid'], batch['count'], batch['lat_min'],
+                   batch['lat_max'], batch['lon_min'], batch['lon_max'], batch['continent']]
+        writer.writerows(zip(*columns))
+
+def write_parquet(grids_by_band, out, callsign=None):
+    """Write a Parquet table (CSV_COLUMNS) to a binary stream or path; needs pyarrow"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs pyarrow (pip install pyarrow)")
+    records = grid_records(grids_by_band)
+    table = pa.table({
+        'band': pa.array(records['band'].tolist(), pa.string()),
+        'grid': pa.array(records['grid'].tolist(), pa.string()),
+        'count': pa.array(records['count'], pa.int64()),
+        'lat_min': pa.array(records['lat_min'], pa.float64()),
+        'lat_max': pa.array(records['lat_max'], pa.float64()),
+        'lon_min': pa.array(records['lon_min'], pa.float64()),
+        'lon_max': pa.array(records['lon_max'], pa.float64()),
+        'continent': pa.array(records['continent'].tolist(), pa.string()),
+    })
+    if callsign:
+        table = table.replace_schema_metadata({'callsign': callsign})
+    pq.write_table(table, out)
+
+WRITERS = {'geojson': write_geojson, 'svg': write_svg, 'csv': write_csv, 'parquet': write_parquet}
+
+def export_grids(grids_by_band, export_format, output='-', callsign=None):
+    """Write {band: GridCounts} in `export_format` to the file `output` ('-' for stdout)"""
+    writer = WRITERS[export_format]
+    binary = export_format == 'parquet'
+    if output == '-':
+        writer(grids_by_band, sys.stdout.buffer if binary else sys.stdout, callsign)
+        sys.stdout.flush()
+        return
+    with open(output, 'wb' if binary else 'w', **({} if binary else {'newline': ''})) as f:
+        writer(grids_by_band, f, callsign)
+
+def main(argv=None):
+    """`maidenhead-map export`: write worked grids without rendering maps"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='maidenhead-map export',
+                                     description='Export worked grids and counts as GeoJSON, SVG, CSV or Parquet')
+    parser.add_argument('filename', help="Contest log file ('-' for stdin)")
+    parser.add_argument('--to', dest='export_format', choices=EXPORT_FORMATS,
+                       help='Export format (from the --output extension if not specified, else geojson)')
+    parser.add_argument('--output', '-o', default='-', help="Output file (default: '-' for stdout)")
+    parser.add_argument('--format', dest='log_format', choices=sorted(mm.LOG_PARSERS),
+                       help='Log format (detected from the file extension if not specified)')
+    parser.add_argument('--band', dest='bands', action='append', help='Only export this band (repeatable)')
+    parser.add_argument('--continents', nargs='+',
+                       choices=['north_america', 'south_america', 'europe', 'africa', 'asia', 'oceania'],
+                       help='Only export grids in these continents')
+    mm._add_band_plan_argument(parser)
+    mm._add_continent_table_argument(parser)
+    args = parser.parse_args(argv)
+    if args.continent_table:
+        mm.load_continent_table(args.continent_table)
+
+    export_format = args.export_format
+    if not export_format:
+        extension = args.output[args.output.rfind('.'):].lower() if '.' in args.output else ''
+        export_format = EXPORT_EXTENSIONS.get(extension, 'geojson')
+
+    # Keep stdout clean for the export itself
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            grids_by_band, callsign = mm.parse_log(args.filename, args.log_format, args.band_plan)
+        except ValueError as e:
+            print(e)
+            return 1
+    if args.bands:
+        grids_by_band = {band: grids for band, grids in grids_by_band.items() if band in args.bands}
+    if args.continents:
+        grids_by_band = {band: mm.filter_grids_by_continents(grids, args.continents)
+                         for band, grids in grids_by_band.items()}
+        grids_by_band = {band: grids for band, grids in grids_by_band.items() if len(grids.ids)}
+
+    try:
+        export_grids(grids_by_band, export_format, args.output, callsign)
+    except ImportError as e:
+        print(e, file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # Reader went away (e.g. `| head`); silence the flush at interpreter exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,43 @@
 #!/usr/bin/env python3
 import re
 import csv
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import matplotlib.patheffects as path_effects
-import cartopy.crs as ccrs
-import cartopy.feature as cfeature
-from collections import Counter, defaultdict
+import os
+import sys
+import gzip
+import io
+import glob
+import json
+import time
+import itertools
+import bisect
+import functools
+import contextlib
+import hashlib
+import tempfile
+import concurrent.futures
+import tracemalloc
+import numpy as np
+from collections import defaultdict, namedtuple
+
+# matplotlib and cartopy are imported on first use by _load_plotting(), so
+# parsing and exports do not pay for them
+plt = mticker = path_effects = PolyCollection = PathCollection = TextPath = FontProperties = Affine2D = None
+ccrs = cfeature = None
+
+def _load_plotting():
+    """Import the plotting stack into the module globals"""
+    global plt, mticker, path_effects, PolyCollection, PathCollection, TextPath, FontProperties, Affine2D
+    global ccrs, cfeature
+    if plt is None:
+        import matplotlib.pyplot as plt
+        import matplotlib.ticker as mticker
+        import matplotlib.patheffects as path_effects
+        from matplotlib.collections import PolyCollection, PathCollection
+        from matplotlib.textpath import TextPath
+        from matplotlib.font_manager import FontProperties
+        from matplotlib.transforms import Affine2D
+        import cartopy.crs as ccrs
+        import cartopy.feature as cfeature
 
 # Continent boundaries (approximate)
 CONTINENT_BOUNDS = {
@@ -31,318 +62,1398 @@ def maidenhead_to_bounds(grid):
         
         if len(grid) == 4:
             return lat_base, lat_base + 1, lon_base, lon_base + 2
-        elif len(grid) == 6:
+        elif len(grid) in (6, 8):
             lon_base += (ord(grid[4]) - ord('A')) * (2/24)
             lat_base += (ord(grid[5]) - ord('A')) * (1/24)
-            return lat_base, lat_base + (1/24), lon_base, lon_base + (2/24)
+            if len(grid) == 6:
+                return lat_base, lat_base + (1/24), lon_base, lon_base + (2/24)
+            lon_base += int(grid[6]) * (2/240)
+            lat_base += int(grid[7]) * (1/240)
+            return lat_base, lat_base + (1/240), lon_base, lon_base + (2/240)
     
     return None
 
+def _grid_char_codes(grids):
+    """Return upper-cased grids as an (n, 8) array of code points plus their lengths"""
+    if not isinstance(grids, np.ndarray):
+        grids = list(grids)
+    grids = np.char.upper(np.char.strip(np.asarray(grids, dtype=str).reshape(-1)))
+    lengths = np.char.str_len(grids)
+    codes = grids.astype('U8').view(np.uint32).reshape(-1, 8).astype(np.int64)
+    return codes, lengths
+
+def _valid_grid_codes(codes, lengths):
+    """Boolean mask of valid grids from _grid_char_codes output"""
+    letters = codes - ord('A')
+    digits = codes - ord('0')
+    
+    valid = np.isin(lengths, (4, 6, 8))
+    valid &= (letters[:, 0] >= 0) & (letters[:, 0] < 18) & (letters[:, 1] >= 0) & (letters[:, 1] < 18)
+    valid &= (digits[:, 2] >= 0) & (digits[:, 2] < 10) & (digits[:, 3] >= 0) & (digits[:, 3] < 10)
+    has_sub = lengths >= 6
+    valid &= ~has_sub | ((letters[:, 4] >= 0) & (letters[:, 4] < 24) &
+                         (letters[:, 5] >= 0) & (letters[:, 5] < 24))
+    has_ext = lengths == 8
+    valid &= ~has_ext | ((digits[:, 6] >= 0) & (digits[:, 6] < 10) &
+                         (digits[:, 7] >= 0) & (digits[:, 7] < 10))
+    return valid
+
+def is_valid_grid_array(grids):
+    """Vectorized is_valid_grid: boolean mask of valid 4-, 6- and 8-character grids"""
+    return _valid_grid_codes(*_grid_char_codes(grids))
+
+# Compact integer grid IDs. Each precision level is a dense lat/lon raster of
+# cells (18×18 fields, 180×180 squares, 4320×4320 subsquares, 43200×43200
+# extended squares); a grid's ID is its row-major cell index plus the level's
+# offset, so IDs from different precisions never collide.
+GRID_ID_LENGTHS = np.array([2, 4, 6, 8])
+GRID_ID_SIDES = np.array([18, 180, 4320, 43200], dtype=np.int64)
+GRID_ID_OFFSETS = np.concatenate(([0], np.cumsum(GRID_ID_SIDES ** 2)[:-1]))
+
+# Per-band aggregate: sorted unique grid IDs with the number of contacts in each
+GridCounts = namedtuple('GridCounts', ['ids', 'counts'])
+
+def encode_grids(grids):
+    """Encode 4-, 6- or 8-character grids as integer grid IDs (-1 for invalid grids)"""
+    codes, lengths = _grid_char_codes(grids)
+    valid = _valid_grid_codes(codes, lengths)
+    letters = codes - ord('A')
+    digits = codes - ord('0')
+    has_sub = lengths >= 6
+    has_ext = lengths == 8
+    
+    lon_idx = letters[:, 0] * 10 + digits[:, 2]
+    lat_idx = letters[:, 1] * 10 + digits[:, 3]
+    lon_idx = np.where(has_sub, lon_idx * 24 + letters[:, 4], lon_idx)
+    lat_idx = np.where(has_sub, lat_idx * 24 + letters[:, 5], lat_idx)
+    lon_idx = np.where(has_ext, lon_idx * 10 + digits[:, 6], lon_idx)
+    lat_idx = np.where(has_ext, lat_idx * 10 + digits[:, 7], lat_idx)
+    
+    level = np.where(has_ext, 3, np.where(has_sub, 2, 1))
+    ids = GRID_ID_OFFSETS[level] + lat_idx * GRID_ID_SIDES[level] + lon_idx
+    ids[~valid] = -1
+    return ids
+
+def _split_grid_ids(ids):
+    """Return (level, lat_idx, lon_idx) cell coordinates for grid IDs; level is -1 for invalid IDs"""
+    ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+    level = np.searchsorted(GRID_ID_OFFSETS, ids, side='right') - 1
+    level[(ids < 0) | (ids >= GRID_ID_OFFSETS[-1] + GRID_ID_SIDES[-1] ** 2)] = -1
+    side = GRID_ID_SIDES[level]
+    local = ids - GRID_ID_OFFSETS[level]
+    return level, local // side, local % side
+
+def grid_id_lengths(ids):
+    """Number of locator characters for each grid ID (0 for invalid IDs)"""
+    level, _, _ = _split_grid_ids(ids)
+    return np.where(level >= 0, GRID_ID_LENGTHS[level], 0)
+
+def decode_grid_ids(ids):
+    """Decode integer grid IDs back into grid strings ('' for invalid IDs)"""
+    level, lat_idx, lon_idx = _split_grid_ids(ids)
+    lengths = np.where(level >= 0, GRID_ID_LENGTHS[level], 0)
+    chars = np.zeros((len(level), 8), dtype=np.uint32)
+    
+    for pos, length, base, radix in ((6, 8, '0', 10), (4, 6, 'A', 24), (2, 4, '0', 10)):
+        finer = lengths >= length
+        chars[finer, pos] = ord(base) + lon_idx[finer] % radix
+        chars[finer, pos + 1] = ord(base) + lat_idx[finer] % radix
+        lon_idx = np.where(finer, lon_idx // radix, lon_idx)
+        lat_idx = np.where(finer, lat_idx // radix, lat_idx)
+    valid = lengths > 0
+    chars[valid, 0] = ord('A') + lon_idx[valid]
+    chars[valid, 1] = ord('A') + lat_idx[valid]
+    return chars.view('U8').reshape(-1)
+
+def coarsen_grid_ids(ids, length):
+    """Map grid IDs finer than `length` characters onto their enclosing `length`-character grid"""
+    level, lat_idx, lon_idx = _split_grid_ids(ids)
+    target = int(np.searchsorted(GRID_ID_LENGTHS, length))
+    finer = level > target
+    factor = np.maximum(GRID_ID_SIDES[level] // GRID_ID_SIDES[target], 1)
+    coarse = (GRID_ID_OFFSETS[target] + (lat_idx // factor) * GRID_ID_SIDES[target] +
+              lon_idx // factor)
+    return np.where(finer, coarse, np.asarray(ids, dtype=np.int64).reshape(-1))
+
+def grid_id_bounds(ids):
+    """Lat/lon bounds (lat_min, lat_max, lon_min, lon_max) arrays for grid IDs; NaN for invalid IDs"""
+    level, lat_idx, lon_idx = _split_grid_ids(ids)
+    side = np.where(level >= 0, GRID_ID_SIDES[level], 0).astype(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lon_size = np.where(level >= 0, 360 / side, np.nan)
+        lat_size = np.where(level >= 0, 180 / side, np.nan)
+    lon_min = lon_idx * lon_size - 180
+    lat_min = lat_idx * lat_size - 90
+    return lat_min, lat_min + lat_size, lon_min, lon_min + lon_size
+
+def grid_id_centers(ids):
+    """Center (lat, lon) arrays of grid IDs; NaN for invalid IDs"""
+    lat_min, lat_max, lon_min, lon_max = grid_id_bounds(ids)
+    return (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+
+# Mean Earth radius for great-circle distances
+EARTH_RADIUS_KM = 6371.0
+
+def great_circle_km(lat1, lon1, lat2, lon2):
+    """Haversine great-circle distance in km between points given in degrees (arrays broadcast)"""
+    lat1, lon1, lat2, lon2 = (np.radians(a) for a in (lat1, lon1, lat2, lon2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+def maidenhead_to_bounds_array(grids):
+    """Vectorized maidenhead_to_bounds for many 4-, 6- or 8-character grids at once
+    
+    Returns four float arrays (lat_min, lat_max, lon_min, lon_max) in the same
+    order as maidenhead_to_bounds; entries for invalid grids are NaN.
+    """
+    return grid_id_bounds(encode_grids(grids))
+
+def count_grid_ids(ids):
+    """Aggregate a flat array of grid IDs into GridCounts, dropping invalid IDs"""
+    ids = np.asarray(ids, dtype=np.int64)
+    unique_ids, counts = np.unique(ids[ids >= 0], return_counts=True)
+    return GridCounts(unique_ids, counts.astype(np.int64))
+
+def merge_grid_counts(*grid_counts):
+    """Sum several GridCounts into one"""
+    if not grid_counts:
+        return GridCounts(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+    ids = np.concatenate([gc.ids for gc in grid_counts])
+    counts = np.concatenate([gc.counts for gc in grid_counts])
+    unique_ids, inverse = np.unique(ids, return_inverse=True)
+    merged = np.bincount(inverse.reshape(-1), weights=counts, minlength=len(unique_ids))
+    return GridCounts(unique_ids, merged.astype(np.int64))
+
+def coarsen_grid_counts(grids, length):
+    """GridCounts with every grid finer than `length` characters summed into its enclosing grid"""
+    coarse = coarsen_grid_ids(grids.ids, length)
+    if np.array_equal(coarse, grids.ids):
+        return grids
+    return merge_grid_counts(GridCounts(coarse, grids.counts))
+
+def grid_count_raster(grids, extent=None, max_shape=None):
+    """Dense 2-D array of contact counts over lat/lon cells at the finest level present in `grids`
+    
+    The array covers whole cells around `extent` (lon_min, lon_max,
+    lat_min, lat_max; default: everything worked) with row 0 at the south
+    edge, e.g. 180×180 for the world at 4 characters. Grids coarser than
+    the finest level fill every cell they contain, and finer grids are
+    painted over them. Returns (counts, cell_extent); cells never worked
+    are NaN.
+    
+    The array is at most `max_shape` (rows, columns; default:
+    RASTER_MAX_SHAPE). When the finest level would exceed it, each array
+    cell covers a block of finest-level cells, showing the largest value of
+    the grids within it.
+    """
+    if max_shape is None:
+        max_shape = RASTER_MAX_SHAPE
+    level, lat_idx, lon_idx = _split_grid_ids(grids.ids)
+    valid = level >= 0
+    level, lat_idx, lon_idx = level[valid], lat_idx[valid], lon_idx[valid]
+    counts = np.asarray(grids.counts, dtype=np.float32)[valid]
+    finest = int(level.max()) if len(level) else 1
+    side = int(GRID_ID_SIDES[finest])
+    if extent is None:
+        lat_mins, lat_maxs, lon_mins, lon_maxs = grid_id_bounds(grids.ids[valid])
+        extent = (lon_mins.min(), lon_maxs.max(), lat_mins.min(), lat_maxs.max()) if len(level) else (-180, 180, -90, 90)
+    lon_min, lon_max, lat_min, lat_max = extent
+    # Window of finest-level cells covering the extent (with slack for float error at cell edges)
+    lon0 = max(int(np.floor((lon_min + 180) / 360 * side + 1e-6)), 0)
+    lon1 = min(int(np.ceil((lon_max + 180) / 360 * side - 1e-6)), side)
+    lat0 = max(int(np.floor((lat_min + 90) / 180 * side + 1e-6)), 0)
+    lat1 = min(int(np.ceil((lat_max + 90) / 180 * side - 1e-6)), side)
+    # Finest-level cells per array cell: enough to fit max_shape, and a multiple or divisor of
+    # every level's cell size so each grid covers whole array cells or falls inside one
+    factors = [side // int(GRID_ID_SIDES[lvl]) for lvl in np.unique(level)]
+    block = max(1, -(-(lat1 - lat0) // max_shape[0]), -(-(lon1 - lon0) // max_shape[1]))
+    while (any(factor % block and block % factor for factor in factors) or
+           -(-lat1 // block) - lat0 // block > max_shape[0] or -(-lon1 // block) - lon0 // block > max_shape[1]):
+        block += 1
+    lat0, lon0 = lat0 // block, lon0 // block
+    lat1, lon1 = -(-lat1 // block), -(-lon1 // block)
+    raster = np.full((max(lat1 - lat0, 0), max(lon1 - lon0, 0)), np.nan, dtype=np.float32)
+    for lvl, factor in zip(np.unique(level), factors):
+        at_level = level == lvl
+        lats, lons, values = lat_idx[at_level], lon_idx[at_level], counts[at_level]
+        if factor < block:
+            # Several grids per array cell: keep the largest value
+            lats, lons = lats // (block // factor), lons // (block // factor)
+            inside = (lats >= lat0) & (lats < lat1) & (lons >= lon0) & (lons < lon1)
+            coarse = np.full(raster.shape, np.nan, dtype=np.float32)
+            np.fmax.at(coarse, (lats[inside] - lat0, lons[inside] - lon0), values[inside])
+        else:
+            factor //= block
+            # The window at this level, filled, then each cell repeated factor×factor times
+            clat0, clat1 = lat0 // factor, -(-lat1 // factor)
+            clon0, clon1 = lon0 // factor, -(-lon1 // factor)
+            inside = (lats >= clat0) & (lats < clat1) & (lons >= clon0) & (lons < clon1)
+            coarse = np.full((clat1 - clat0, clon1 - clon0), np.nan, dtype=np.float32)
+            coarse[lats[inside] - clat0, lons[inside] - clon0] = values[inside]
+            if factor > 1:
+                coarse = np.repeat(np.repeat(coarse, factor, axis=0), factor, axis=1)
+                coarse = coarse[lat0 - clat0 * factor:lat1 - clat0 * factor,
+                                lon0 - clon0 * factor:lon1 - clon0 * factor]
+        np.copyto(raster, coarse, where=~np.isnan(coarse))
+    cell_extent = (lon0 * block * 360 / side - 180, lon1 * block * 360 / side - 180,
+                   lat0 * block * 180 / side - 90, lat1 * block * 180 / side - 90)
+    return raster, cell_extent
+
+def as_grid_counts(grids):
+    """Coerce GridCounts, a {grid: count} mapping or an iterable of grid strings into GridCounts"""
+    if isinstance(grids, GridCounts):
+        return grids
+    if hasattr(grids, 'items'):
+        keys = list(grids.keys())
+        ids = encode_grids(keys) if keys else np.empty(0, dtype=np.int64)
+        counts = np.fromiter((grids[key] for key in keys), dtype=np.int64, count=len(keys))
+        keep = ids >= 0
+        return merge_grid_counts(GridCounts(ids[keep], counts[keep]))
+    grids = list(grids)
+    return count_grid_ids(encode_grids(grids) if grids else [])
+
+def _as_grid_ids(grids):
+    """Grid IDs for GridCounts, an integer ID array or an iterable of grid strings"""
+    if isinstance(grids, GridCounts):
+        return grids.ids
+    if isinstance(grids, np.ndarray) and np.issubdtype(grids.dtype, np.integer):
+        return grids
+    grids = list(grids)
+    return encode_grids(grids) if grids else np.empty(0, dtype=np.int64)
+
+class GridCountAccumulator:
+    """Aggregate per-band grid strings into GridCounts in fixed-size batches
+    
+    Grids are buffered as strings only until `batch_size` are pending, then
+    encoded and reduced with NumPy, so memory grows with the number of
+    distinct grids rather than the number of QSOs.
+    """
+    
+    def __init__(self, batch_size=65536):
+        self.batch_size = batch_size
+        self._pending = defaultdict(list)
+        self._pending_total = 0
+        self._counts = {}
+    
+    def add(self, band, grid):
+        self._pending[band].append(grid)
+        self._pending_total += 1
+        if self._pending_total >= self.batch_size:
+            self.flush()
+    
+    def add_many(self, band, grids):
+        """Encode and fold an already-batched array of grids in directly"""
+        if len(grids):
+            self._merge(band, count_grid_ids(encode_grids(grids)))
+    
+    def _merge(self, band, batch):
+        if band in self._counts:
+            batch = merge_grid_counts(self._counts[band], batch)
+        self._counts[band] = batch
+    
+    def flush(self):
+        for band, grids in self._pending.items():
+            self._merge(band, count_grid_ids(encode_grids(grids)))
+        self._pending = defaultdict(list)
+        self._pending_total = 0
+    
+    def result(self):
+        """Flush pending grids and return {band: GridCounts} for bands with any valid grid"""
+        self.flush()
+        return {band: counts for band, counts in self._counts.items() if len(counts.ids)}
+
+class CountPyramid:
+    """One band's contact counts at every grid level: 8, 6, 4 and 2 characters
+    
+    Level n holds each worked grid coarsened to at most n characters (grids
+    logged coarser keep their own precision), with counts summed. Levels
+    are built on first use from the finest down, each from the one before.
+    """
+    
+    def __init__(self, grids):
+        self.levels = {int(GRID_ID_LENGTHS[-1]): as_grid_counts(grids)}
+    
+    def at(self, length):
+        """GridCounts with nothing finer than `length` characters"""
+        length = int(length)
+        finer = int(GRID_ID_LENGTHS[-1])
+        for level in GRID_ID_LENGTHS[::-1]:
+            level = int(level)
+            if level < length:
+                break
+            if level not in self.levels:
+                self.levels[level] = coarsen_grid_counts(self.levels[finer], level)
+            finer = level
+        return self.levels[length]
+
+# Hashed QSO keys for deduplicating contacts across logs: the worked grid's ID
+# in the high bits (IDs fit in 31) and a 32-bit hash of the worked call below
+QSO_CALL_BITS = 32
+
+def call_hashes(calls, memo=None):
+    """32-bit hashes of upper-cased callsigns (str or bytes) as uint64, stable across processes
+    
+    `memo` caches call -> hash between batches of the same log.
+    """
+    memo = {} if memo is None else memo
+    
+    def call_hash(call):
+        value = memo.get(call)
+        if value is None:
+            data = call.upper() if isinstance(call, bytes) else call.upper().encode('utf-8')
+            value = memo[call] = int.from_bytes(hashlib.blake2b(data, digest_size=4).digest(), 'little')
+        return value
+    
+    return np.fromiter((call_hash(call) for call in calls), dtype=np.uint64, count=len(calls))
+
+def qso_keys(calls, grids, memo=None):
+    """uint64 QSO keys for parallel lists of worked calls and grids, dropping invalid grids"""
+    if not len(grids):
+        return np.empty(0, dtype=np.uint64)
+    ids = encode_grids(np.array(grids, dtype=bytes).astype(str) if isinstance(grids[0], bytes) else grids)
+    valid = ids >= 0
+    return (ids[valid].astype(np.uint64) << np.uint64(QSO_CALL_BITS)) | call_hashes(calls, memo)[valid]
+
+class QsoKeySet:
+    """Per-band sets of hashed QSO keys: each (call, band, grid) contact counted once
+    
+    Keys are held as sorted unique uint64 arrays, 8 bytes per distinct
+    contact; added keys are buffered and folded in once `batch_size` are
+    pending. `qsos` counts every key added, duplicates included.
+    """
+    
+    def __init__(self, batch_size=1 << 20):
+        self.batch_size = batch_size
+        self.qsos = 0
+        self._keys = {}
+        self._pending = defaultdict(list)
+        self._pending_total = 0
+    
+    def add(self, band, keys, qsos=None):
+        """Add a band's keys; `qsos` is how many contacts they stand for (default: one each)"""
+        self.qsos += len(keys) if qsos is None else qsos
+        if len(keys):
+            self._pending[band].append(keys)
+            self._pending_total += len(keys)
+            if self._pending_total >= self.batch_size:
+                self.flush()
+    
+    def update(self, other):
+        """Fold in another QsoKeySet (e.g. one log's keys from a worker)"""
+        result = other.result()
+        for band, keys in result.items():
+            self.add(band, keys, 0)
+        self.qsos += other.qsos
+    
+    def flush(self):
+        for band, batches in self._pending.items():
+            if band in self._keys:
+                batches = [self._keys[band]] + batches
+            self._keys[band] = np.unique(np.concatenate(batches))
+        self._pending = defaultdict(list)
+        self._pending_total = 0
+    
+    def result(self):
+        """Flush pending keys and return {band: sorted unique uint64 keys}"""
+        self.flush()
+        return self._keys
+    
+    def __len__(self):
+        return sum(len(keys) for keys in self.result().values())
+    
+    def grid_counts(self):
+        """{band: GridCounts} with one contact per distinct QSO key"""
+        return {band: count_grid_ids((keys >> np.uint64(QSO_CALL_BITS)).astype(np.int64))
+                for band, keys in self.result().items()}
+
+# Continent lookup table: one uint8 code per 4-character square, indexed by
+# its grid ID minus the square offset; codes index into the table's names.
+CONTINENT_TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'continent_table.npz')
+ContinentTable = namedtuple('ContinentTable', ['codes', 'names'])
+_continent_table = None
+_continent_table_path = None
+
+def _bounds_continent_codes(lat_center, lon_center):
+    """Index into ('other',) + CONTINENT_BOUNDS for each point, first matching box wins"""
+    codes = np.zeros(len(lat_center), dtype=np.uint8)
+    unassigned = np.ones(len(lat_center), dtype=bool)
+    for code, bounds in enumerate(CONTINENT_BOUNDS.values(), start=1):
+        inside = (unassigned &
+                  (bounds['lat'][0] <= lat_center) & (lat_center <= bounds['lat'][1]) &
+                  (bounds['lon'][0] <= lon_center) & (lon_center <= bounds['lon'][1]))
+        codes[inside] = code
+        unassigned &= ~inside
+    return codes
+
+def _square_centers():
+    """Center lat/lon of every 4-character square in grid ID order"""
+    lat_min, lat_max, lon_min, lon_max = grid_id_bounds(
+        GRID_ID_OFFSETS[1] + np.arange(GRID_ID_SIDES[1] ** 2))
+    return (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+
+def build_continent_table():
+    """Continent table from the approximate CONTINENT_BOUNDS boxes, by square center"""
+    lat_center, lon_center = _square_centers()
+    return ContinentTable(_bounds_continent_codes(lat_center, lon_center),
+                          ('other',) + tuple(CONTINENT_BOUNDS))
+
+def build_polygon_continent_table(resolution='110m'):
+    """Continent table from Natural Earth country polygons (slow; meant to be run offline)
+    
+    Each square takes the continent of the country containing its center;
+    squares over open sea keep their CONTINENT_BOUNDS assignment. Needs the
+    Natural Earth admin-0 countries shapefile (downloaded by cartopy).
+    """
+    import cartopy.io.shapereader as shpreader
+    from shapely.geometry import Point
+    from shapely.prepared import prep
+    
+    table = build_continent_table()
+    codes = table.codes.copy()
+    lat_center, lon_center = _square_centers()
+    reader = shpreader.Reader(shpreader.natural_earth(resolution, 'cultural', 'admin_0_countries'))
+    for record in reader.records():
+        continent = str(record.attributes.get('CONTINENT', '')).lower().replace(' ', '_')
+        if continent not in table.names:
+            continue
+        geometry = record.geometry
+        west, south, east, north = geometry.bounds
+        candidates = np.nonzero((lon_center >= west) & (lon_center <= east) &
+                                (lat_center >= south) & (lat_center <= north))[0]
+        prepared = prep(geometry)
+        for i in candidates:
+            if prepared.contains(Point(lon_center[i], lat_center[i])):
+                codes[i] = table.names.index(continent)
+    return ContinentTable(codes, table.names)
+
+def save_continent_table(path, table):
+    """Write a continent table as .npz (codes and names)"""
+    np.savez_compressed(path, codes=table.codes, names=np.array(table.names))
+
+def load_continent_table(path):
+    """Load a table written by save_continent_table and use it for all continent lookups"""
+    global _continent_table, _continent_table_path
+    with np.load(path) as data:
+        table = ContinentTable(data['codes'].astype(np.uint8), tuple(str(n) for n in data['names']))
+    if table.codes.shape != (GRID_ID_SIDES[1] ** 2,):
+        raise ValueError(f"{path}: expected {GRID_ID_SIDES[1] ** 2} square entries")
+    _continent_table, _continent_table_path = table, path
+    return table
+
+def get_continent_table():
+    """Active continent table: a loaded one, the packaged file if present, else built from the boxes"""
+    global _continent_table
+    if _continent_table is None:
+        if os.path.exists(CONTINENT_TABLE_FILE):
+            return load_continent_table(CONTINENT_TABLE_FILE)
+        _continent_table = build_continent_table()
+    return _continent_table
+
+def grid_id_continents(ids):
+    """Continent name (or None) for each grid ID, by table lookup of its 4-character square"""
+    table = get_continent_table()
+    ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+    level = _split_grid_ids(ids)[0]
+    in_table = level >= 1
+    square = np.where(in_table, coarsen_grid_ids(ids, 4) - GRID_ID_OFFSETS[1], 0)
+    
+    result = np.array(table.names, dtype=object)[table.codes[square]]
+    result[~in_table] = None
+    
+    # 2-character fields are larger than a table entry: classify by their center
+    fields = level == 0
+    if fields.any():
+        lat_min, lat_max, lon_min, lon_max = grid_id_bounds(ids[fields])
+        field_codes = _bounds_continent_codes((lat_min + lat_max) / 2, (lon_min + lon_max) / 2)
+        result[fields] = np.array(('other',) + tuple(CONTINENT_BOUNDS), dtype=object)[field_codes]
+    return result
+
+def grid_continents_array(grids):
+    """Vectorized get_grid_continent: continent name (or None) for each grid"""
+    return grid_id_continents(encode_grids(grids))
+
 def get_grid_continent(grid):
     """Determine which continent a grid square belongs to"""
-    bounds = maidenhead_to_bounds(grid)
-    if not bounds:
+    return grid_continents_array([grid])[0]
+
+STREAM_CHUNK_SIZE = 4 * 1024 * 1024
+
+@contextlib.contextmanager
+def open_log(filename):
+    """Open a log for binary reading; '-' reads stdin and gzip input is decompressed transparently"""
+    if filename == '-':
+        stream = sys.stdin.buffer
+        if stream.peek(2)[:2] == b'\x1f\x8b':
+            with gzip.GzipFile(fileobj=stream) as f:
+                yield f
+        else:
+            yield stream
+        return
+    with open(filename, 'rb') as raw:
+        if raw.read(2) == b'\x1f\x8b':
+            raw.seek(0)
+            with gzip.GzipFile(fileobj=raw) as f:
+                yield f
+        else:
+            raw.seek(0)
+            yield raw
+
+@contextlib.contextmanager
+def open_text_log(filename):
+    """Text-mode counterpart of open_log (universal newlines left to the csv module)"""
+    with open_log(filename) as raw:
+        f = io.TextIOWrapper(raw, errors='replace', newline='')
+        try:
+            yield f
+        finally:
+            # Leave the underlying stream (possibly stdin) to open_log
+            f.detach()
+
+def _iter_line_chunks(stream, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield large byte chunks from a stream, each ending on a line boundary"""
+    tail = b''
+    while True:
+        block = stream.read(chunk_size)
+        if not block:
+            break
+        block = tail + block
+        cut = block.rfind(b'\n') + 1
+        if cut:
+            tail = block[cut:]
+            yield block[:cut]
+        else:
+            tail = block
+    if tail:
+        yield tail
+
+# CSV column detection: lower-cased header names for each role, and how many
+# leading lines are sampled to find the header row and infer a grid column
+CSV_FREQ_FIELDS = ['freq', 'frequency', 'band', 'freq_mhz']
+CSV_GRID_FIELDS = ['grid', 'gridsquare', 'grid_square', 'their_grid', 'dx_grid']
+CSV_CALL_FIELDS = ['call', 'callsign', 'station_callsign', 'my_call']
+CSV_WORKED_CALL_FIELDS = ['call', 'callsign', 'their_call', 'dx_call']
+CSV_SAMPLE_LINES = 50
+
+def _find_csv_header(sample_lines):
+    """Index of the header row within the sampled leading lines (0 if none is recognized)"""
+    for i, line in enumerate(sample_lines):
+        line_lower = line.lower()
+        # Look for multiple header fields in the same line
+        field_count = sum(1 for field in ['date', 'time', 'call', 'grid', 'freq', 'band'] 
+                        if field in line_lower)
+        if field_count >= 3:  # Need at least 3 fields to be a header row
+            return i
+    return 0
+
+def _infer_csv_grid_columns(sample_rows, width):
+    """Columns whose sampled non-empty values are mostly valid grid squares"""
+    columns = []
+    for col in range(width):
+        values = [row[col].strip() for row in sample_rows if col < len(row) and row[col].strip()]
+        if values and sum(1 for value in values if is_valid_grid(value)) * 2 >= len(values):
+            columns.append(col)
+    return columns
+
+def _read_csv_layout(f):
+    """Detect a CSV log's header row and columns from a bounded sample of leading lines
+    
+    Returns (row reader positioned after the header, lower-cased headers,
+    grid columns, callsign), or None for an empty file.
+    """
+    sample_lines = list(itertools.islice(f, CSV_SAMPLE_LINES))
+    if not sample_lines:
         return None
     
-    lat_min, lat_max, lon_min, lon_max = bounds
-    lat_center = (lat_min + lat_max) / 2
-    lon_center = (lon_min + lon_max) / 2
+    # Extract callsign from first line if it contains one
+    # Look for callsign pattern in first line (letters followed by numbers)
+    callsign = "Unknown"
+    callsign_match = re.search(r'\b([A-Z]{1,2}[0-9][A-Z]{1,3})\b', sample_lines[0].strip())
+    if callsign_match:
+        callsign = callsign_match.group(1)
     
-    for continent, bounds in CONTINENT_BOUNDS.items():
-        if (bounds['lat'][0] <= lat_center <= bounds['lat'][1] and 
-            bounds['lon'][0] <= lon_center <= bounds['lon'][1]):
-            return continent
+    # Read from the header row; the rest of the sample is replayed ahead of the file
+    header_row_idx = _find_csv_header(sample_lines)
+    reader = csv.reader(itertools.chain(sample_lines[header_row_idx:], f))
+    original_headers = next(reader, [])
+    headers = [h.lower().strip() for h in original_headers]
     
-    return 'other'
+    grid_col = next((i for i, h in enumerate(headers) if h in CSV_GRID_FIELDS), None)
+    if grid_col is not None:
+        grid_cols = [grid_col]
+    else:
+        # No recognized grid column: infer it from the sampled data rows
+        sample_rows = list(csv.reader(sample_lines[header_row_idx + 1:]))
+        grid_cols = _infer_csv_grid_columns(sample_rows, max([len(original_headers)] +
+                                                             [len(row) for row in sample_rows]))
+    return reader, headers, grid_cols, callsign
 
-def parse_csv_grids(filename):
-    """Extract Maidenhead grid squares by band from CSV format file"""
-    grids_by_band = defaultdict(list)
+def _csv_row_band(row, freq_col, bands, band_plan):
+    """Band of a CSV row from its frequency column, memoized in `bands`"""
+    if freq_col is None:
+        return "Unknown"
+    freq_val = row[freq_col].strip() if freq_col < len(row) else ''
+    band = bands.get(freq_val)
+    if band is None:
+        band = bands[freq_val] = freq_to_band(freq_val, band_plan)
+    return band
+
+def parse_csv_grids(filename, band_plan=None):
+    """Extract Maidenhead grid square counts by band from CSV format file
+    
+    The file is read in a single streaming pass: the header row and the
+    frequency, grid and call columns are detected from a bounded sample of
+    leading lines, then only those columns are read from each row.
+    `filename` may be '-' for stdin and may be gzip-compressed. Frequencies
+    are mapped with `band_plan` (see freq_to_band).
+    Returns ({band: GridCounts}, callsign); unreadable files raise.
+    """
+    grids_by_band = GridCountAccumulator()
     callsign = "Unknown"
+    band_plan = _as_band_plan(band_plan)
     
     try:
-        with open(filename, 'r') as f:
-            # Extract callsign from first line if it contains one
-            first_line = f.readline().strip()
-            # Look for callsign pattern in first line (letters followed by numbers)
-            import re
-            callsign_match = re.search(r'\b([A-Z]{1,2}[0-9][A-Z]{1,3})\b', first_line)
-            if callsign_match:
-                callsign = callsign_match.group(1)
-            
-            # Find the actual header row by looking for multiple field names together
-            f.seek(0)
-            lines = f.readlines()
-            header_row_idx = 0
-            
-            for i, line in enumerate(lines):
-                line_lower = line.lower()
-                # Look for multiple header fields in the same line
-                field_count = sum(1 for field in ['date', 'time', 'call', 'grid', 'freq', 'band'] 
-                                if field in line_lower)
-                if field_count >= 3:  # Need at least 3 fields to be a header row
-                    header_row_idx = i
-                    break
-            
-            # Read from the header row
-            f.seek(0)
-            for _ in range(header_row_idx):
-                f.readline()
-            
-            reader = csv.DictReader(f)
-            headers = [h.lower().strip() for h in reader.fieldnames] if reader.fieldnames else []
-            
-            # Common field mappings - use original case for keys
-            original_headers = reader.fieldnames if reader.fieldnames else []
-            freq_fields = ['freq', 'frequency', 'band', 'freq_mhz']
-            grid_fields = ['grid', 'gridsquare', 'grid_square', 'their_grid', 'dx_grid']
-            call_fields = ['call', 'callsign', 'station_callsign', 'my_call']
-            
-            # Find fields by matching lowercase versions
-            freq_field = None
-            grid_field = None
-            call_field = None
-            
-            for orig, lower in zip(original_headers, headers):
-                if not freq_field and lower in freq_fields:
-                    freq_field = orig
-                if not grid_field and lower in grid_fields:
-                    grid_field = orig
-                if not call_field and lower in call_fields:
-                    call_field = orig
+        with open_text_log(filename) as f:
+            layout = _read_csv_layout(f)
+            if layout is None:
+                return {}, callsign
+            reader, headers, grid_cols, callsign = layout
+            freq_col = next((i for i, h in enumerate(headers) if h in CSV_FREQ_FIELDS), None)
             
+            bands = {}
             for row in reader:
-                # Extract frequency/band
-                band = "Unknown"
-                if freq_field:
-                    freq_val = row[freq_field].strip()
-                    if freq_val.isdigit():
-                        band = freq_to_band(freq_val)
-                    else:
-                        band = freq_val
-                
-                # Extract grid square
-                if grid_field:
-                    grid = row[grid_field].strip().upper()
-                    if is_valid_grid(grid):
-                        grids_by_band[band].append(grid)
-                
-                # Also check all fields for grid patterns if no specific grid field
-                if not grid_field:
-                    for value in row.values():
-                        if value and is_valid_grid(value.strip()):
-                            grids_by_band[band].append(value.strip().upper())
+                band = _csv_row_band(row, freq_col, bands, band_plan)
+                # Extract grid square(s); validation and normalization happen batched on encode
+                for col in grid_cols:
+                    if col < len(row):
+                        grids_by_band.add(band, row[col])
                             
-    except Exception as e:
-        print(f"Error parsing CSV file: {e}")
+    except FileNotFoundError:
+        print(f"File {filename} not found")
         return {}, callsign
     
-    return dict(grids_by_band), callsign
+    return grids_by_band.result(), callsign
 
-def parse_cabrillo_grids(filename):
-    """Extract Maidenhead grid squares by band from Cabrillo format file"""
-    grids_by_band = defaultdict(list)
+def parse_csv_qsos(filename, band_plan=None):
+    """Hashed (call, band, grid) QSO keys from a CSV log, for deduplicated merging
+    
+    The worked call comes from the first CSV_WORKED_CALL_FIELDS column;
+    without one, contacts are keyed by band and grid only.
+    Returns (QsoKeySet, callsign).
+    """
+    keys = QsoKeySet()
     callsign = "Unknown"
+    band_plan = _as_band_plan(band_plan)
+    call_memo = {}
     
     try:
-        with open(filename, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line.startswith('CALLSIGN:'):
-                    callsign = line.split(':', 1)[1].strip()
-                elif line.startswith('QSO:'):
-                    parts = line.split()
-                    if len(parts) >= 6:
-                        freq = parts[1]
-                        band = freq_to_band(freq)
-                        
-                        # In Cabrillo QSO format, grid squares are typically in the exchange fields
-                        # Skip the first 6 fields: QSO:, freq, mode, date, time, mycall
-                        # Then look for grids in the remaining exchange fields
-                        exchange_fields = parts[6:]
-                        
-                        for field in exchange_fields:
-                            field = field.upper()
-                            if is_valid_grid(field):
-                                grids_by_band[band].append(field)
+        with open_text_log(filename) as f:
+            layout = _read_csv_layout(f)
+            if layout is None:
+                return keys, callsign
+            reader, headers, grid_cols, callsign = layout
+            freq_col = next((i for i, h in enumerate(headers) if h in CSV_FREQ_FIELDS), None)
+            call_col = next((i for i, h in enumerate(headers) if h in CSV_WORKED_CALL_FIELDS), None)
+            
+            bands = {}
+            pending = defaultdict(lambda: ([], []))
+            for row in reader:
+                calls, grids = pending[_csv_row_band(row, freq_col, bands, band_plan)]
+                call = row[call_col].strip() if call_col is not None and call_col < len(row) else ''
+                for col in grid_cols:
+                    if col < len(row):
+                        calls.append(call)
+                        grids.append(row[col])
+                if len(grids) >= keys.batch_size:
+                    for band, (calls, grids) in pending.items():
+                        keys.add(band, qso_keys(calls, grids, call_memo))
+                    pending.clear()
+            for band, (calls, grids) in pending.items():
+                keys.add(band, qso_keys(calls, grids, call_memo))
+    
     except FileNotFoundError:
         print(f"File {filename} not found")
-        return {}, callsign
+        return QsoKeySet(), callsign
     
-    return dict(grids_by_band), callsign
+    return keys, callsign
+
+# Cabrillo scanner: one match per QSO: or CALLSIGN: line. QSO groups are the
+# frequency and the exchange after the first six fields (QSO:, freq, mode,
+# date, time, mycall); grids are whitespace-delimited exchange tokens.
+_CABRILLO_LINE_RE = re.compile(
+    rb'^[ \t]*(?:QSO:[ \t]+(\S+)[ \t]+\S+[ \t]+\S+[ \t]+\S+[ \t]+\S+([^\r\n]*)'
+    rb'|CALLSIGN:([^\r\n]*))', re.M)
+_GRID_TOKEN_RE = re.compile(
+    rb'(?<!\S)[A-Ra-r]{2}[0-9]{2}(?:[A-Xa-x]{2}(?:[0-9]{2})?)?(?!\S)')
+
+def stream_cabrillo_grids(stream, chunk_size=STREAM_CHUNK_SIZE, band_plan=None):
+    """Aggregate grid counts by band from a binary Cabrillo stream in constant memory
+    
+    The stream is read in large line-aligned chunks; each chunk is scanned
+    with precompiled patterns and folded into the per-band counts before the
+    next one is read. Concatenated multi-log archives work as well.
+    Returns ({band: GridCounts}, callsign).
+    """
+    grids_by_band = GridCountAccumulator()
+    callsign = "Unknown"
+    band_plan = _as_band_plan(band_plan)
+    bands = {}
+    
+    for chunk in _iter_line_chunks(stream, chunk_size):
+        callsign = _scan_cabrillo_chunk(chunk, grids_by_band, bands, band_plan)[0] or callsign
+    
+    return grids_by_band.result(), callsign
+
+def _scan_cabrillo_chunk(chunk, grids_by_band, bands, band_plan):
+    """Fold the QSO lines of one chunk into `grids_by_band`
+    
+    `bands` memoizes frequency field -> band across chunks. Returns the last
+    CALLSIGN: value in the chunk (or None) and the set of bands that got grids.
+    """
+    callsign = None
+    # Group the chunk's exchanges by band, then pull all grids for a band in one scan
+    exchanges_by_band = defaultdict(list)
+    for freq, exchange, call in _CABRILLO_LINE_RE.findall(chunk):
+        if not freq:
+            callsign = call.decode('latin-1').strip()
+            continue
+        band = bands.get(freq)
+        if band is None:
+            band = bands[freq] = freq_to_band(freq.decode('latin-1'), band_plan)
+        exchanges_by_band[band].append(exchange)
+    changed = set()
+    for band, exchanges in exchanges_by_band.items():
+        grids = _GRID_TOKEN_RE.findall(b'\n'.join(exchanges))
+        if grids:
+            grids_by_band.add_many(band, np.array(grids, dtype='S8').astype('U8'))
+            changed.add(band)
+    return callsign, changed
+
+def parse_cabrillo_grids(filename, band_plan=None):
+    """Extract Maidenhead grid square counts by band from Cabrillo format file
+    
+    `filename` may be '-' for stdin and may be gzip-compressed.
+    Returns ({band: GridCounts}, callsign).
+    """
+    try:
+        with open_log(filename) as f:
+            return stream_cabrillo_grids(f, band_plan=band_plan)
+    except FileNotFoundError:
+        print(f"File {filename} not found")
+        return {}, "Unknown"
+
+# Timed Cabrillo scan: QSO lines with their date (YYYY-MM-DD) and HHMM time
+_CABRILLO_TIMED_RE = re.compile(
+    rb'^[ \t]*QSO:[ \t]+(\S+)[ \t]+\S+[ \t]+([0-9]{4}-[0-9]{2}-[0-9]{2})[ \t]+([0-9]{4})[ \t]+\S+([^\r\n]*)'
+    rb'|^[ \t]*CALLSIGN:([^\r\n]*)', re.M)
+
+def parse_cabrillo_timeline(filename, band_plan=None):
+    """Per-band QSO times and worked grid IDs from a Cabrillo log, for time-lapse maps
+    
+    Every grid token in a QSO's exchange gives one (time, grid) entry, as
+    in parse_cabrillo_grids, so the entries of a band add up to its
+    GridCounts. Times are UTC datetime64[m]; QSO lines without a readable
+    date and time are skipped. Returns ({band: (times, ids)} sorted by
+    time, callsign).
+    """
+    band_plan = _as_band_plan(band_plan)
+    callsign = "Unknown"
+    bands = {}
+    entries = defaultdict(lambda: ([], [], []))
+    try:
+        with open_log(filename) as f:
+            for chunk in _iter_line_chunks(f):
+                for freq, date, hhmm, exchange, call in _CABRILLO_TIMED_RE.findall(chunk):
+                    if not freq:
+                        callsign = call.decode('latin-1').strip() or callsign
+                        continue
+                    grids = _GRID_TOKEN_RE.findall(exchange)
+                    if not grids:
+                        continue
+                    band = bands.get(freq)
+                    if band is None:
+                        band = bands[freq] = freq_to_band(freq.decode('latin-1'), band_plan)
+                    dates, times, band_grids = entries[band]
+                    dates.extend([date] * len(grids))
+                    times.extend([hhmm] * len(grids))
+                    band_grids.extend(grids)
+    except FileNotFoundError:
+        print(f"File {filename} not found")
+        return {}, "Unknown"
+    
+    timeline = {}
+    for band, (dates, times, grids) in entries.items():
+        ids = encode_grids(np.array(grids, dtype='S8').astype('U8'))
+        hhmm = np.array(times, dtype='S4').astype(np.int64)
+        qso_times = (np.array(dates, dtype='S10').astype('U10').astype('datetime64[D]').astype('datetime64[m]') +
+                     (hhmm // 100 * 60 + hhmm % 100).astype('timedelta64[m]'))
+        valid = ids >= 0
+        order = np.argsort(qso_times[valid], kind='stable')
+        timeline[band] = (qso_times[valid][order], ids[valid][order])
+    return timeline, callsign
+
+# QSO-level Cabrillo scan: newlines separate QSOs, and each exchange token is
+# either a grid or call-like (letters and digits); grids before the first
+# call-like token are the station's own sent exchange
+_QSO_TOKEN_RE = re.compile(
+    rb'(\n)|(?<!\S)(?:([A-Ra-r]{2}[0-9]{2}(?:[A-Xa-x]{2}(?:[0-9]{2})?)?)'
+    rb'|((?=[A-Za-z0-9/]*[A-Za-z])[A-Za-z0-9/]*[0-9][A-Za-z0-9/]*))(?!\S)')
+
+def _scan_cabrillo_qsos(chunk, keys, bands, band_plan, call_memo):
+    """Fold one chunk's QSOs into `keys` (a QsoKeySet) as (worked call, band, grid) keys
+    
+    Each grid is credited to the nearest call-like token before it on its
+    QSO line. Returns the last CALLSIGN: value in the chunk (or None).
+    """
+    callsign = None
+    exchanges_by_band = defaultdict(list)
+    for freq, exchange, call in _CABRILLO_LINE_RE.findall(chunk):
+        if not freq:
+            callsign = call.decode('latin-1').strip()
+            continue
+        band = bands.get(freq)
+        if band is None:
+            band = bands[freq] = freq_to_band(freq.decode('latin-1'), band_plan)
+        exchanges_by_band[band].append(exchange)
+    for band, exchanges in exchanges_by_band.items():
+        calls, grids = [], []
+        call = None
+        for newline, grid, token in _QSO_TOKEN_RE.findall(b'\n'.join(exchanges)):
+            if newline:
+                call = None
+            elif grid:
+                if call is not None:
+                    calls.append(call)
+                    grids.append(grid)
+            else:
+                call = token
+        keys.add(band, qso_keys(calls, grids, call_memo))
+    return callsign
+
+def parse_cabrillo_qsos(filename, band_plan=None):
+    """Hashed (call, band, grid) QSO keys from a Cabrillo log, for deduplicated merging
+    
+    Streams the log in chunks like stream_cabrillo_grids; the station's own
+    sent grid is not counted. Returns (QsoKeySet, callsign).
+    """
+    keys = QsoKeySet()
+    callsign = "Unknown"
+    band_plan = _as_band_plan(band_plan)
+    bands = {}
+    call_memo = {}
+    try:
+        with open_log(filename) as f:
+            for chunk in _iter_line_chunks(f):
+                callsign = _scan_cabrillo_qsos(chunk, keys, bands, band_plan, call_memo) or callsign
+    except FileNotFoundError:
+        print(f"File {filename} not found")
+    return keys, callsign
+
+class CabrilloTail:
+    """Incrementally parse a Cabrillo log that another program keeps appending to
+    
+    Each poll() reads only the complete lines written since the previous
+    one, starting from the remembered byte offset, and folds them into the
+    running per-band counts. A truncated or replaced file is re-read from
+    the start.
+    """
+    
+    def __init__(self, filename, band_plan=None):
+        self.filename = filename
+        self.band_plan = _as_band_plan(band_plan)
+        self.reset()
+    
+    def reset(self):
+        self.offset = 0
+        self.callsign = "Unknown"
+        self._file_id = None
+        self._bands = {}
+        self._grids_by_band = GridCountAccumulator()
+    
+    def poll(self):
+        """Parse newly appended lines; returns the set of bands that received grids"""
+        stat = os.stat(self.filename)
+        file_id = (stat.st_dev, stat.st_ino)
+        if stat.st_size < self.offset or self._file_id not in (None, file_id):
+            self.reset()
+        self._file_id = file_id
+        if stat.st_size == self.offset:
+            return set()
+        
+        changed = set()
+        with open(self.filename, 'rb') as f:
+            f.seek(self.offset)
+            for chunk in _iter_line_chunks(f):
+                if not chunk.endswith(b'\n'):
+                    break  # partial last line: picked up once it is complete
+                callsign, bands = _scan_cabrillo_chunk(chunk, self._grids_by_band, self._bands,
+                                                       self.band_plan)
+                self.callsign = callsign or self.callsign
+                changed |= bands
+                self.offset += len(chunk)
+        return changed
+    
+    def result(self):
+        """Current {band: GridCounts}"""
+        return self._grids_by_band.result()
+
+# ADIF tokenizer. _ADIF_FIELD_RE matches only the tags that are kept (plus
+# <EOR>/<EOH>), each with the text up to the next '<', so one findall
+# tokenizes a whole chunk and NumPy splits names, lengths and values. That
+# is only right when every '<' starts a tag outside any field's value: a
+# value containing '<' (or a tag, as in a COMMENT quoting
+# <GRIDSQUARE:4>FN31) would be cut short or tokenized as fields. Chunks
+# where _adif_values_contain_tags finds one are walked tag by tag instead,
+# skipping every value by its declared length.
+ADIF_FIELDS = ('GRIDSQUARE', 'VUCC_GRIDS', 'BAND', 'FREQ', 'CALL', 'STATION_CALLSIGN', 'OPERATOR')
+_ADIF_FIELD_RE = re.compile(rb'<((?:' + '|'.join(ADIF_FIELDS + ('EOR', 'EOH')).encode() +
+                            rb')(?::[0-9]+(?::[A-Z])?)?>[^<]*)')
+_ADIF_TAG_RE = re.compile(rb'<([A-Z0-9_]+)(?::([0-9]+)(?::[A-Z])?)?>')
+# Digits of a value length read by _adif_values_contain_tags; longer lengths exceed any chunk anyway
+ADIF_MAX_LENGTH_DIGITS = 9
+
+def _iter_adif_chunks(stream, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield large upper-cased byte chunks from an ADIF stream, each ending just after an <EOR> tag
+    
+    Upper-casing makes tag names case-insensitive; the kept values (calls,
+    grids, bands, frequencies) are case-insensitive too.
+    """
+    tail = b''
+    while True:
+        block = stream.read(chunk_size)
+        if not block:
+            break
+        block = tail + block.upper()
+        cut = block.rfind(b'<EOR>') + 1
+        if cut:
+            cut += 4
+            tail = block[cut:]
+            yield block[:cut]
+        else:
+            tail = block
+    if tail:
+        yield tail
+
+def _adif_fields_exact(chunk):
+    """Names and values of kept fields and <EOR>/<EOH> tags, walking every tag of the chunk"""
+    names, values = [], []
+    kept = {name.encode() for name in ADIF_FIELDS}
+    search = _ADIF_TAG_RE.search
+    pos = 0
+    while True:
+        match = search(chunk, pos)
+        if match is None:
+            break
+        name, length = match.groups()
+        pos = match.end()
+        if length is None:
+            if name in (b'EOR', b'EOH'):
+                names.append(name)
+                values.append(b'')
+            continue
+        end = pos + int(length)
+        if name in kept:
+            names.append(name)
+            values.append(chunk[pos:end])
+        pos = end
+    return np.array(names, dtype=bytes), np.array(values, dtype=bytes)
+
+def _adif_values_contain_tags(chunk):
+    """Whether a '<' of the chunk is inside the value declared by the tag before it
+    
+    Every '<' is taken as a tag start, ending at the next '>', with its
+    value length after the first ':' inside it (0 without one). That is
+    right for every real tag, so the first '<' inside any field's value is
+    found; a stray '<' between fields at worst reports a false overlap.
+    """
+    data = np.frombuffer(chunk, dtype=np.uint8)
+    starts = np.flatnonzero(data == ord('<'))
+    if len(starts) < 2:
+        return False
+    tags = starts[:-1]
+    # Positions past the last '>' or ':' map to the end of the chunk
+    closes = np.append(np.flatnonzero(data == ord('>')), len(data))
+    tag_ends = closes[np.searchsorted(closes, tags)] + 1
+    colons = np.append(np.flatnonzero(data == ord(':')), len(data))
+    colons = colons[np.searchsorted(colons, tags)]
+    digits = np.append(data, np.zeros(ADIF_MAX_LENGTH_DIGITS + 1, dtype=np.uint8))
+    declared = np.zeros(len(tags), dtype=np.int64)
+    in_length = colons < tag_ends
+    for offset in range(1, ADIF_MAX_LENGTH_DIGITS + 1):
+        digit = digits[colons + offset].astype(np.int64) - ord('0')
+        in_length &= (digit >= 0) & (digit <= 9)
+        if not in_length.any():
+            break
+        declared[in_length] = declared[in_length] * 10 + digit[in_length]
+    return bool((starts[1:] < tag_ends + declared).any())
+
+def _adif_fields(chunk):
+    """Names and exact values of the kept fields and <EOR>/<EOH> tags of one chunk, as arrays"""
+    if _adif_values_contain_tags(chunk):
+        return _adif_fields_exact(chunk)
+    tags = _ADIF_FIELD_RE.findall(chunk)
+    if not tags:
+        return np.empty(0, dtype='S1'), np.empty(0, dtype='S1')
+    parts = np.char.partition(np.array(tags), b'>')
+    name_parts = np.char.partition(parts[:, 0], b':')
+    names, lengths, values = name_parts[:, 0], name_parts[:, 2], parts[:, 2]
+    if (np.char.find(lengths, b':') >= 0).any():
+        lengths = np.char.partition(lengths, b':')[:, 0]  # drop data type indicators
+    lengths = np.where(lengths == b'', b'0', lengths).astype(np.int64)
+    # Text after a value (usually a separating space or newline) is not part of it
+    values = np.char.rstrip(values)
+    value_lengths = np.char.str_len(values)
+    if (value_lengths < lengths).any():
+        return _adif_fields_exact(chunk)
+    for i in np.flatnonzero(value_lengths > lengths):
+        values[i] = values[i][:lengths[i]]
+    return names, values
+
+def _scan_adif_chunk(chunk, bands, band_plan):
+    """Worked calls and grids of one chunk's records, grouped by band
+    
+    Fields are assigned to records with NumPy (record number = <EOR> tags
+    before the field); `bands` memoizes BAND/FREQ values -> band across
+    chunks. VUCC_GRIDS (grid-corner contacts) take precedence over
+    GRIDSQUARE. Returns ({band: (calls, grids)} as byte string arrays,
+    station callsign or None).
+    """
+    names, values = _adif_fields(chunk)
+    header_end = np.flatnonzero(names == b'EOH')
+    if len(header_end):
+        names, values = names[header_end[-1] + 1:], values[header_end[-1] + 1:]
+    eor = names == b'EOR'
+    n_records = int(eor.sum())
+    if not n_records:
+        return {}, None
+    record = np.cumsum(eor) - eor
+    
+    def field(name):
+        column = np.zeros(n_records, dtype=values.dtype)
+        mask = (names == name) & (record < n_records)
+        column[record[mask]] = values[mask]
+        return column
+    
+    station = next((value for name in (b'STATION_CALLSIGN', b'OPERATOR')
+                    for value in field(name) if value), None)
+    grids = field(b'VUCC_GRIDS')
+    grids = np.where(grids == b'', field(b'GRIDSQUARE'), grids)
+    keep = grids != b''
+    grids, calls = grids[keep], field(b'CALL')[keep]
+    
+    band_keys, band_index = np.unique(np.char.add(np.char.add(field(b'BAND')[keep], b'|'), field(b'FREQ')[keep]),
+                                      return_inverse=True)
+    band_index = band_index.reshape(-1)
+    band_names = []
+    for band_key in band_keys.tolist():
+        band = bands.get(band_key)
+        if band is None:
+            band_field, _, freq = band_key.partition(b'|')
+            if band_field:
+                band = freq_to_band(band_field.decode('latin-1'), band_plan)
+            elif freq:
+                band = freq_to_band(freq.decode('latin-1') + 'MHz', band_plan)
+            else:
+                band = "Unknown"
+            bands[band_key] = band
+        band_names.append(band)
+    
+    # Grid-corner contacts list two or four grids: one entry per grid
+    corners = np.flatnonzero(np.char.find(grids, b',') >= 0)
+    if len(corners):
+        split_calls, split_grids, split_bands = [], [], []
+        for call, corner_grids, index in zip(calls[corners].tolist(), grids[corners].tolist(),
+                                             band_index[corners].tolist()):
+            for grid in corner_grids.split(b','):
+                split_calls.append(call)
+                split_grids.append(grid.strip())
+                split_bands.append(index)
+        single = np.ones(len(grids), dtype=bool)
+        single[corners] = False
+        calls = np.concatenate([calls[single], np.array(split_calls, dtype=calls.dtype)])
+        grids = np.concatenate([grids[single], np.array(split_grids, dtype=grids.dtype)])
+        band_index = np.concatenate([band_index[single], np.array(split_bands, dtype=band_index.dtype)])
+    
+    records = {}
+    for i, band in enumerate(band_names):
+        in_band = band_index == i
+        band_calls, band_grids = calls[in_band], grids[in_band]
+        if band in records:
+            band_calls = np.concatenate([records[band][0], band_calls])
+            band_grids = np.concatenate([records[band][1], band_grids])
+        records[band] = (band_calls, band_grids)
+    return records, station.decode('latin-1').strip() if station else None
+
+def stream_adif_grids(stream, chunk_size=STREAM_CHUNK_SIZE, band_plan=None):
+    """Aggregate grid counts by band from a binary ADIF stream in constant memory
+    
+    Bands come from the BAND field, or FREQ (MHz) when BAND is missing.
+    Returns ({band: GridCounts}, callsign) with the callsign taken from
+    STATION_CALLSIGN (or OPERATOR).
+    """
+    grids_by_band = GridCountAccumulator()
+    callsign = None
+    band_plan = _as_band_plan(band_plan)
+    bands = {}
+    
+    for chunk in _iter_adif_chunks(stream, chunk_size):
+        records, station = _scan_adif_chunk(chunk, bands, band_plan)
+        callsign = callsign or station
+        for band, (_, grids) in records.items():
+            grids_by_band.add_many(band, grids.astype(str))
+    
+    return grids_by_band.result(), callsign or "Unknown"
+
+def parse_adif_grids(filename, band_plan=None):
+    """Extract Maidenhead grid square counts by band from an ADIF (.adi/.adif) file
+    
+    `filename` may be '-' for stdin and may be gzip-compressed.
+    Returns ({band: GridCounts}, callsign).
+    """
+    try:
+        with open_log(filename) as f:
+            return stream_adif_grids(f, band_plan=band_plan)
+    except FileNotFoundError:
+        print(f"File {filename} not found")
+        return {}, "Unknown"
+
+def parse_adif_qsos(filename, band_plan=None):
+    """Hashed (CALL, band, grid) QSO keys from an ADIF log, for deduplicated merging
+    
+    Returns (QsoKeySet, callsign).
+    """
+    keys = QsoKeySet()
+    callsign = None
+    band_plan = _as_band_plan(band_plan)
+    bands = {}
+    call_memo = {}
+    try:
+        with open_log(filename) as f:
+            for chunk in _iter_adif_chunks(f):
+                records, station = _scan_adif_chunk(chunk, bands, band_plan)
+                callsign = callsign or station
+                for band, (calls, grids) in records.items():
+                    keys.add(band, qso_keys(calls.tolist(), grids.tolist(), call_memo))
+    except FileNotFoundError:
+        print(f"File {filename} not found")
+    return keys, callsign or "Unknown"
+
+LOG_PARSERS = {'csv': parse_csv_grids, 'cabrillo': parse_cabrillo_grids, 'adif': parse_adif_grids}
+LOG_FORMAT_NAMES = {'csv': 'CSV', 'cabrillo': 'Cabrillo', 'adif': 'ADIF'}
+
+def detect_log_format(filename, log_format=None):
+    """Return 'csv', 'cabrillo' or 'adif' from an explicit format or the file extension (ignoring .gz)"""
+    if log_format:
+        return log_format
+    if filename == '-':
+        return 'cabrillo'
+    name = filename.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.cbr', '.log')):
+        return 'cabrillo'
+    if name.endswith(('.adi', '.adif')):
+        return 'adif'
+    return None
+
+def parse_log(filename, log_format=None, band_plan=None, parse_cache=None):
+    """Parse a log of any supported format into ({band: GridCounts}, callsign)
+    
+    `band_plan` is an IARU region ('r1', 'r2', 'r3'), a JSON band plan
+    file or a BandPlan. With a `parse_cache` (ParseCache), a log parsed
+    before is loaded from the cache instead. Raises ValueError for
+    unsupported formats and for logs that cannot be read (such as corrupt
+    archives); those are never cached.
+    """
+    log_format = detect_log_format(filename, log_format)
+    if log_format not in LOG_PARSERS:
+        raise ValueError(f"Unsupported file format: {filename}")
+    try:
+        if parse_cache is not None and filename != '-':
+            return parse_cache.parse(filename, log_format, band_plan)
+        return LOG_PARSERS[log_format](filename, band_plan)
+    except Exception as e:
+        raise ValueError(f"Error parsing {LOG_FORMAT_NAMES[log_format]} file: {e}") from e
+
+LOG_QSO_PARSERS = {'csv': parse_csv_qsos, 'cabrillo': parse_cabrillo_qsos, 'adif': parse_adif_qsos}
+
+def parse_log_qsos(filename, log_format=None, band_plan=None):
+    """Parse a log of any supported format into (QsoKeySet, callsign); raises ValueError for unsupported formats"""
+    log_format = detect_log_format(filename, log_format)
+    if log_format not in LOG_QSO_PARSERS:
+        raise ValueError(f"Unsupported file format: {filename}")
+    return LOG_QSO_PARSERS[log_format](filename, band_plan)
 
 def is_valid_grid(grid):
     """Check if string is a valid Maidenhead grid square"""
-    if not grid or len(grid) not in [4, 6]:
+    if not grid or len(grid) not in [4, 6, 8]:
         return False
     
     grid = grid.upper()
-    if len(grid) == 4:
-        return (grid[0] in 'ABCDEFGHIJKLMNOPQR' and 
-                grid[1] in 'ABCDEFGHIJKLMNOPQR' and 
-                grid[2] in '0123456789' and 
-                grid[3] in '0123456789')
-    elif len(grid) == 6:
-        return (grid[0] in 'ABCDEFGHIJKLMNOPQR' and 
-                grid[1] in 'ABCDEFGHIJKLMNOPQR' and 
-                grid[2] in '0123456789' and 
-                grid[3] in '0123456789' and
-                grid[4] in 'ABCDEFGHIJKLMNOPQRSTUVWX' and
-                grid[5] in 'ABCDEFGHIJKLMNOPQRSTUVWX')
-    return False
-
-def freq_to_band(freq_str):
-    """Convert frequency string to band name using Cabrillo standard nomenclature"""
-    try:
-        freq = int(freq_str)
-        
-        # LF/MF bands
-        if 472 <= freq <= 479:
-            return "630m"
-        elif 1800 <= freq <= 2000:
-            return "160m"
-        elif 3500 <= freq <= 4000:
-            return "80m"
-        elif 5330 <= freq <= 5405:
-            return "60m"
-        elif 7000 <= freq <= 7300:
-            return "40m"
-        elif 10100 <= freq <= 10150:
-            return "30m"
-        elif 14000 <= freq <= 14350:
-            return "20m"
-        elif 18068 <= freq <= 18168:
-            return "17m"
-        elif 21000 <= freq <= 21450:
-            return "15m"
-        elif 24890 <= freq <= 24990:
-            return "12m"
-        elif 28000 <= freq <= 29700:
-            return "10m"
-        
-        # VHF bands
-        elif freq == 50 or (50000 <= freq <= 54000):
-            return "6m"
-        elif freq == 144 or (144000 <= freq <= 148000):
-            return "2m"
-        elif freq == 222 or (222000 <= freq <= 225000):
-            return "1.25m"
-        
-        # UHF bands
-        elif freq == 432 or (420000 <= freq <= 450000):
-            return "70cm"
-        elif freq in [902, 903] or (902000 <= freq <= 928000):
-            return "33cm"
-        elif freq == 1296 or (1240000 <= freq <= 1300000):
-            return "23cm"
-        
-        # Microwave bands
-        elif 2300000 <= freq <= 2450000:
-            return "13cm"
-        elif 3300000 <= freq <= 3500000:
-            return "9cm"
-        elif 5650000 <= freq <= 5925000:
-            return "6cm"
-        elif 10000000 <= freq <= 10500000:
-            return "3cm"
-        elif 24000000 <= freq <= 24250000:
-            return "1.25cm"
-        elif 47000000 <= freq <= 47200000:
-            return "6mm"
-        elif 75500000 <= freq <= 81000000:
-            return "4mm"
-        elif 119980000 <= freq <= 120020000:
-            return "2.5mm"
-        elif 142000000 <= freq <= 149000000:
-            return "2mm"
-        elif 241000000 <= freq <= 250000000:
-            return "1mm"
-        
-        # Handle frequency in MHz format (common in logs)
-        elif freq < 1000:
-            if freq == 472:
-                return "630m"
-            elif freq == 1800 or freq == 1900:
-                return "160m"
-            elif freq == 3500 or freq == 3700 or freq == 3800:
-                return "80m"
-            elif freq == 5300:
-                return "60m"
-            elif freq == 7000 or freq == 7100 or freq == 7200:
-                return "40m"
-            elif freq == 10100:
-                return "30m"
-            elif freq == 14000 or freq == 14100 or freq == 14200:
-                return "20m"
-            elif freq == 18100:
-                return "17m"
-            elif freq == 21000 or freq == 21100 or freq == 21200:
-                return "15m"
-            elif freq == 24900:
-                return "12m"
-            elif freq == 28000 or freq == 28100 or freq == 28200:
-                return "10m"
-            elif freq == 50:
-                return "6m"
-            elif freq == 144:
-                return "2m"
-            elif freq == 222:
-                return "1.25m"
-            elif freq == 432:
-                return "70cm"
-            elif freq in [902, 903]:
-                return "33cm"
-            else:
-                return f"{freq}MHz"
-        else:
-            return f"{freq}kHz"
-            
-    except ValueError:
+    if not (grid[0] in 'ABCDEFGHIJKLMNOPQR' and 
+            grid[1] in 'ABCDEFGHIJKLMNOPQR' and 
+            grid[2] in '0123456789' and 
+            grid[3] in '0123456789'):
+        return False
+    if len(grid) >= 6 and not (grid[4] in 'ABCDEFGHIJKLMNOPQRSTUVWX' and
+                               grid[5] in 'ABCDEFGHIJKLMNOPQRSTUVWX'):
+        return False
+    if len(grid) == 8 and not (grid[6] in '0123456789' and
+                               grid[7] in '0123456789'):
+        return False
+    return True
+
+# Band plans: (band, low_khz, high_khz) allocations per IARU region. Region 2
+# is the default and matches the ranges this tool has always used.
+BAND_PLANS = {
+    'r2': [
+        ('630m', 472, 479), ('160m', 1800, 2000), ('80m', 3500, 4000),
+        ('60m', 5330, 5405), ('40m', 7000, 7300), ('30m', 10100, 10150),
+        ('20m', 14000, 14350), ('17m', 18068, 18168), ('15m', 21000, 21450),
+        ('12m', 24890, 24990), ('10m', 28000, 29700), ('6m', 50000, 54000),
+        ('2m', 144000, 148000), ('1.25m', 222000, 225000), ('70cm', 420000, 450000),
+        ('33cm', 902000, 928000), ('23cm', 1240000, 1300000), ('13cm', 2300000, 2450000),
+        ('9cm', 3300000, 3500000), ('6cm', 5650000, 5925000), ('3cm', 10000000, 10500000),
+        ('1.25cm', 24000000, 24250000), ('6mm', 47000000, 47200000),
+        ('4mm', 75500000, 81000000), ('2.5mm', 119980000, 120020000),
+        ('2mm', 142000000, 149000000), ('1mm', 241000000, 250000000),
+    ],
+    'r1': [
+        ('630m', 472, 479), ('160m', 1810, 2000), ('80m', 3500, 3800),
+        ('60m', 5351.5, 5366.5), ('40m', 7000, 7200), ('30m', 10100, 10150),
+        ('20m', 14000, 14350), ('17m', 18068, 18168), ('15m', 21000, 21450),
+        ('12m', 24890, 24990), ('10m', 28000, 29700), ('6m', 50000, 52000),
+        ('4m', 70000, 70500), ('2m', 144000, 146000), ('70cm', 430000, 440000),
+        ('23cm', 1240000, 1300000), ('13cm', 2300000, 2450000), ('9cm', 3400000, 3475000),
+        ('6cm', 5650000, 5850000), ('3cm', 10000000, 10500000), ('1.25cm', 24000000, 24250000),
+        ('6mm', 47000000, 47200000), ('4mm', 75500000, 81500000),
+        ('2.5mm', 122250000, 123000000), ('2mm', 134000000, 149000000),
+        ('1mm', 241000000, 250000000),
+    ],
+    'r3': [
+        ('630m', 472, 479), ('160m', 1800, 2000), ('80m', 3500, 3900),
+        ('60m', 5351.5, 5366.5), ('40m', 7000, 7200), ('30m', 10100, 10150),
+        ('20m', 14000, 14350), ('17m', 18068, 18168), ('15m', 21000, 21450),
+        ('12m', 24890, 24990), ('10m', 28000, 29700), ('6m', 50000, 54000),
+        ('2m', 144000, 148000), ('70cm', 430000, 440000), ('23cm', 1240000, 1300000),
+        ('13cm', 2300000, 2450000), ('9cm', 3300000, 3500000), ('6cm', 5650000, 5850000),
+        ('3cm', 10000000, 10500000), ('1.25cm', 24000000, 24250000),
+        ('6mm', 47000000, 47200000), ('4mm', 75500000, 81000000),
+        ('2.5mm', 122250000, 123000000), ('2mm', 134000000, 149000000),
+        ('1mm', 241000000, 250000000),
+    ],
+}
+DEFAULT_BAND_PLAN = 'r2'
+
+# Direct band name mappings for non-numeric frequency fields
+BAND_NAME_MAPPINGS = {
+    '630M': '630m', '160M': '160m', '80M': '80m', '60M': '60m',
+    '40M': '40m', '30M': '30m', '20M': '20m', '17M': '17m',
+    '15M': '15m', '12M': '12m', '10M': '10m', '6M': '6m', '4M': '4m',
+    '2M': '2m', '1.25M': '1.25m', '70CM': '70cm', '33CM': '33cm',
+    '23CM': '23cm', '13CM': '13cm', '9CM': '9cm', '6CM': '6cm',
+    '3CM': '3cm', '1.25CM': '1.25cm', '6MM': '6mm', '4MM': '4mm',
+    '2.5MM': '2.5mm', '2MM': '2mm', '1MM': '1mm'
+}
+
+_FREQ_RE = re.compile(r'^\s*(\d+(?:\.\d*)?|\.\d+)\s*(KHZ|MHZ|GHZ)?\s*$', re.I)
+_FREQ_UNIT_KHZ = {'KHZ': 1, 'MHZ': 1000, 'GHZ': 1000000}
+
+class BandPlan:
+    """Amateur band allocations as a sorted interval table searched with bisect"""
+    
+    def __init__(self, bands, name=None):
+        bands = sorted(bands, key=lambda band: band[1])
+        self.name = name
+        self.names = [band[0] for band in bands]
+        self.lows = [float(band[1]) for band in bands]
+        self.highs = [float(band[2]) for band in bands]
+        self._lows_array = np.array(self.lows)
+        self._highs_array = np.array(self.highs)
+    
+    @classmethod
+    def from_file(cls, path):
+        """Load a band plan from JSON: {"name": ..., "bands": [[band, low_khz, high_khz], ...]}"""
+        with open(path, 'r') as f:
+            config = json.load(f)
+        return cls([tuple(band) for band in config['bands']], config.get('name', path))
+    
+    def lookup(self, freq_khz):
+        """Band containing `freq_khz`, or None"""
+        i = bisect.bisect_right(self.lows, freq_khz) - 1
+        if i >= 0 and freq_khz <= self.highs[i]:
+            return self.names[i]
+        return None
+    
+    def lookup_array(self, freqs_khz):
+        """Vectorized lookup: index into self.names for each frequency (kHz), -1 outside every band"""
+        freqs_khz = np.asarray(freqs_khz, dtype=float)
+        idx = np.searchsorted(self._lows_array, freqs_khz, side='right') - 1
+        inside = (idx >= 0) & (freqs_khz <= self._highs_array[np.maximum(idx, 0)])
+        return np.where(inside, idx, -1)
+
+@functools.lru_cache(maxsize=None)
+def get_band_plan(plan=None):
+    """BandPlan for an IARU region name ('r1', 'r2', 'r3') or a JSON band plan file"""
+    plan = (plan or DEFAULT_BAND_PLAN)
+    if plan.lower() in BAND_PLANS:
+        return BandPlan(BAND_PLANS[plan.lower()], plan.lower())
+    return BandPlan.from_file(plan)
+
+def _as_band_plan(band_plan):
+    return band_plan if isinstance(band_plan, BandPlan) else get_band_plan(band_plan)
+
+def freq_to_band(freq_str, band_plan=None):
+    """Convert frequency string to band name using Cabrillo standard nomenclature
+    
+    Numbers are taken as kHz, falling back to MHz (so both "14025" and
+    "144.2" work); explicit kHz/MHz/GHz suffixes are honoured. Band names and
+    Cabrillo designators such as "10G" pass through. Results are memoized per
+    distinct string and band plan.
+    """
+    return _freq_to_band(freq_str, _as_band_plan(band_plan))
+
+@functools.lru_cache(maxsize=65536)
+def _freq_to_band(freq_str, band_plan):
+    match = _FREQ_RE.match(freq_str)
+    if not match:
         # Handle non-numeric frequency strings
         freq_str = freq_str.upper().strip()
-        
-        # Direct band name mappings
-        band_mappings = {
-            '630M': '630m', '160M': '160m', '80M': '80m', '60M': '60m',
-            '40M': '40m', '30M': '30m', '20M': '20m', '17M': '17m',
-            '15M': '15m', '12M': '12m', '10M': '10m', '6M': '6m',
-            '2M': '2m', '1.25M': '1.25m', '70CM': '70cm', '33CM': '33cm',
-            '23CM': '23cm', '13CM': '13cm', '9CM': '9cm', '6CM': '6cm',
-            '3CM': '3cm', '1.25CM': '1.25cm', '6MM': '6mm', '4MM': '4mm',
-            '2.5MM': '2.5mm', '2MM': '2mm', '1MM': '1mm'
-        }
-        
-        return band_mappings.get(freq_str, freq_str)
+        return BAND_NAME_MAPPINGS.get(freq_str, freq_str)
+    
+    number, unit = match.groups()
+    freq = float(number)
+    if unit:
+        band = band_plan.lookup(freq * _FREQ_UNIT_KHZ[unit.upper()])
+        return band or f"{number}{unit}"
+    
+    band = band_plan.lookup(freq) or band_plan.lookup(freq * 1000)
+    if band:
+        return band
+    # Unknown frequency: label it in the unit it most likely uses (MHz shorthand below 1000)
+    number = str(int(freq)) if freq.is_integer() else number
+    return f"{number}MHz" if freq < 1000 else f"{number}kHz"
 
 def auto_select_continents(grids):
     """Automatically determine which continents to include based on grid squares"""
-    continents = set()
-    for grid in grids:
-        continent = get_grid_continent(grid)
-        if continent:
-            continents.add(continent)
+    continents = set(grid_id_continents(np.unique(_as_grid_ids(grids))))
+    continents.discard(None)
     return list(continents)
 
 def get_optimal_bounds(grids):
     """Calculate optimal map bounds based on actual grid square locations"""
-    if not grids:
+    ids = _as_grid_ids(grids)
+    if not len(ids):
         return (-180, 180, -90, 90)
     
-    lats = []
-    lons = []
-    
-    for grid in grids:
-        bounds = maidenhead_to_bounds(grid)
-        if bounds:
-            lat_min, lat_max, lon_min, lon_max = bounds
-            lats.extend([lat_min, lat_max])
-            lons.extend([lon_min, lon_max])
+    lat_mins, lat_maxs, lon_mins, lon_maxs = grid_id_bounds(ids)
     
-    if not lats or not lons:
+    if np.isnan(lat_mins).all():
         return (-180, 180, -90, 90)
     
-    min_lat, max_lat = min(lats), max(lats)
-    min_lon, max_lon = min(lons), max(lons)
+    min_lat, max_lat = float(np.nanmin(lat_mins)), float(np.nanmax(lat_maxs))
+    min_lon, max_lon = float(np.nanmin(lon_mins)), float(np.nanmax(lon_maxs))
     
     # Add padding based on the span
     lat_span = max_lat - min_lat
@@ -401,164 +1512,1454 @@ def get_region_name(lon_min, lon_max, lat_min, lat_max):
         return "regional"
 
 def filter_grids_by_continents(grids, continents):
-    """Filter grid squares to only include those in specified continents"""
+    """Filter grid squares to only include those in specified continents
+    
+    Accepts GridCounts (returning GridCounts) or a {grid: count} mapping
+    (returning a dict).
+    """
     if not continents:
         return grids
     
-    filtered = {}
-    for grid, count in grids.items():
-        grid_continent = get_grid_continent(grid)
-        if grid_continent in continents:
-            filtered[grid] = count
+    if isinstance(grids, GridCounts):
+        keep = np.isin(grid_id_continents(grids.ids).astype(str), list(continents))
+        return GridCounts(grids.ids[keep], grids.counts[keep])
+    
+    grid_list = list(grids.keys())
+    keep = [continent in continents for continent in grid_continents_array(grid_list)]
+    return {grid: grids[grid] for grid, kept in zip(grid_list, keep) if kept}
+
+# ColorBrewer Reds (matplotlib's 'Reds' colormap), for coloring grids without matplotlib
+REDS_COLORS = np.array([(255, 245, 240), (254, 224, 210), (252, 187, 161), (252, 146, 114),
+                        (251, 106, 74), (239, 59, 44), (203, 24, 29), (165, 15, 21),
+                        (103, 0, 13)]) / 255
+
+def count_colors(counts, max_count):
+    """RGB colors (N×3 floats) of contact counts on the map's 0.3-1.0 Reds scale"""
+    shade = 0.3 + 0.7 * np.minimum(np.asarray(counts, dtype=float) / max_count, 1.0)
+    positions = np.linspace(0, 1, len(REDS_COLORS))
+    return np.stack([np.interp(shade, positions, REDS_COLORS[:, i]) for i in range(3)], axis=-1)
+
+# Active StageProfiler, or None; stage() is a shared no-op context while profiling is off
+_profiler = None
+_NO_STAGE = contextlib.nullcontext()
+PROFILE_VERSION = 1
+
+def stage(name, band=None):
+    """Context manager recording `name` (for `band`) with the active StageProfiler, if any"""
+    if _profiler is None:
+        return _NO_STAGE
+    return _profiler.stage(name, band)
+
+class StageProfiler:
+    """Wall time, CPU time and (optionally) peak traced memory of named pipeline stages
+    
+    Used as a context manager it becomes the active profiler, so every
+    stage() block entered meanwhile, in this process, is recorded. Stages
+    nest; each record carries its `path` of enclosing stage names. Every
+    `hooks` callable is called with each finished record.
+    """
+    
+    def __init__(self, trace_memory=False, hooks=()):
+        self.trace_memory = trace_memory
+        self.hooks = list(hooks)
+        self.records = []
+        self._stack = []
+        self._previous = None
+        self._started_tracing = False
+        self._start = time.perf_counter()
+    
+    def __enter__(self):
+        global _profiler
+        self._previous, _profiler = _profiler, self
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+    
+    def __exit__(self, *exc_info):
+        global _profiler
+        _profiler = self._previous
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return False
+    
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+    
+    def path(self):
+        """Names of the currently open stages, outermost first"""
+        return [frame['stage'] for frame in self._stack]
+    
+    @contextlib.contextmanager
+    def stage(self, name, band=None):
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        frame = {'stage': name, 'band': band}
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+            _reset_traced_peak()
+            frame.update(base=current, peak=current)
+        self._stack.append(frame)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall_s = time.perf_counter() - wall
+            cpu_s = time.process_time() - cpu
+            peak_bytes = None
+            if tracing:
+                frame['peak'] = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                peak_bytes = frame['peak'] - frame['base']
+            path = self.path()
+            self._stack.pop()
+            if tracing:
+                if self._stack:
+                    self._stack[-1]['peak'] = max(self._stack[-1]['peak'], frame['peak'])
+                _reset_traced_peak()
+            self._record({'stage': name, 'path': path, 'band': band,
+                          'start_s': round(wall - self._start, 6), 'wall_s': round(wall_s, 6),
+                          'cpu_s': round(cpu_s, 6), 'peak_bytes': peak_bytes, 'pid': os.getpid()})
+    
+    def _record(self, record):
+        self.records.append(record)
+        for hook in self.hooks:
+            hook(record)
+    
+    def merge(self, records):
+        """Add records collected by another process (a render worker) under the current stage"""
+        prefix = self.path()
+        for record in records:
+            self._record(dict(record, path=prefix + record['path']))
+    
+    def summary(self):
+        """Records aggregated by stage path: count, total wall/CPU seconds, largest peak"""
+        totals = {}
+        first_start = {}
+        for record in self.records:
+            key = ';'.join(record['path'])
+            first_start[key] = min(first_start.get(key, record['start_s']), record['start_s'])
+            total = totals.setdefault(key, {'path': key, 'count': 0, 'wall_s': 0.0, 'cpu_s': 0.0,
+                                            'peak_bytes': None})
+            total['count'] += 1
+            total['wall_s'] += record['wall_s']
+            total['cpu_s'] += record['cpu_s']
+            if record['peak_bytes'] is not None:
+                total['peak_bytes'] = max(total['peak_bytes'] or 0, record['peak_bytes'])
+        # Tree order: parents before their stages, siblings in the order they first ran
+        def order(total):
+            parts = total['path'].split(';')
+            return [first_start.get(';'.join(parts[:i + 1]), 0.0) for i in range(len(parts))]
+        return sorted(totals.values(), key=order)
+    
+    def report(self):
+        """JSON-serializable profile: every stage record plus the per-path summary"""
+        bands = defaultdict(dict)
+        for record in self.records:
+            if record['band'] is not None:
+                bands[record['band']][record['stage']] = round(
+                    bands[record['band']].get(record['stage'], 0.0) + record['wall_s'], 6)
+        return {'version': PROFILE_VERSION, 'argv': sys.argv, 'trace_memory': self.trace_memory,
+                'summary': [dict(total, wall_s=round(total['wall_s'], 6), cpu_s=round(total['cpu_s'], 6))
+                            for total in self.summary()],
+                'bands': dict(bands), 'stages': self.records}
+    
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+    
+    def print_summary(self, out=None):
+        out = out or sys.stdout
+        print(f"{'stage':<48} {'count':>5} {'wall s':>9} {'cpu s':>9} {'peak MB':>8}", file=out)
+        for total in self.summary():
+            depth = total['path'].count(';')
+            name = '  ' * depth + total['path'].rsplit(';', 1)[-1]
+            peak = f"{total['peak_bytes'] / 1e6:8.1f}" if total['peak_bytes'] is not None else f"{'-':>8}"
+            print(f"{name:<48} {total['count']:>5} {total['wall_s']:9.3f} {total['cpu_s']:9.3f} {peak}",
+                  file=out)
+
+def _reset_traced_peak():
+    # tracemalloc.reset_peak is Python 3.9+; before that peaks are since tracing started
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+
+def default_cache_dir():
+    """Root directory for on-disk caches ($MAIDENHEAD_MAP_CACHE, else the user cache directory)"""
+    if os.environ.get('MAIDENHEAD_MAP_CACHE'):
+        return os.environ['MAIDENHEAD_MAP_CACHE']
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'maidenhead-map')
+
+def evict_lru(directory, max_bytes, keep=()):
+    """Delete the least recently used files in `directory` until it holds at most `max_bytes`
+    
+    Paths in `keep` (such as the entry just written) and files still being
+    written by write_atomic are never deleted.
+    """
+    entries = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    # Kept and partial files count towards the limit but are never deleted
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path in keep or path.endswith('.tmp'):
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+def write_atomic(path, write):
+    """Call write(tmp_path) and move the result into place, so readers never see partial files
+    
+    Every call writes its own temporary file next to `path`, so concurrent
+    writers of the same entry (threads or processes) each move a complete
+    file into place and the last one wins.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.',
+                                    suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        try:
+            os.replace(tmp_path, path)
+        except FileNotFoundError:
+            # Lost a race with another writer or cleanup; fine as long as some copy is in place
+            if not os.path.exists(path):
+                raise
+    finally:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+
+# Bump when a parser change alters what a log parses to; older parse cache entries are then ignored
+PARSER_VERSION = 1
+
+def file_digest(filename, chunk_size=STREAM_CHUNK_SIZE):
+    """SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ParseCache:
+    """Size-bounded on-disk LRU cache of parsed logs
+    
+    Each entry is one log's per-band GridCounts and callsign, stored as an
+    uncompressed .npz (a few arrays, loaded without pickling). Entries are
+    keyed by a SHA-256 of the file contents together with PARSER_VERSION,
+    the log format and the band plan, so renaming or touching a log still
+    hits while any edit to it misses.
+    """
+    
+    def __init__(self, directory=None, max_bytes=64 * 1024 * 1024):
+        self.directory = directory or os.path.join(default_cache_dir(), 'parsed')
+        self.max_bytes = max_bytes
+    
+    def path_for(self, digest, log_format, band_plan=None):
+        plan = _as_band_plan(band_plan)
+        key = repr((digest, PARSER_VERSION, log_format, plan.names, plan.lows, plan.highs))
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + '.npz')
+    
+    def get(self, path):
+        """({band: GridCounts}, callsign) stored at `path`, or None if missing or unreadable"""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                bands, offsets = data['bands'].tolist(), data['offsets']
+                ids, counts = data['ids'], data['counts']
+                callsign = str(data['callsign'])
+        except (OSError, KeyError, ValueError):
+            return None
+        os.utime(path)  # mark as recently used
+        grids_by_band = {band: GridCounts(ids[start:end], counts[start:end])
+                         for band, start, end in zip(bands, offsets[:-1], offsets[1:])}
+        return grids_by_band, callsign
+    
+    def put(self, path, grids_by_band, callsign):
+        """Store a parse result at `path`, then evict least recently used entries over the size limit"""
+        def write(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, bands=np.array(list(grids_by_band), dtype=str),
+                         offsets=np.cumsum([0] + [len(grids.ids) for grids in grids_by_band.values()]),
+                         ids=np.concatenate([grids.ids for grids in grids_by_band.values()] or
+                                            [np.empty(0, dtype=np.int64)]),
+                         counts=np.concatenate([grids.counts for grids in grids_by_band.values()] or
+                                               [np.empty(0, dtype=np.int64)]),
+                         callsign=np.array(callsign))
+        os.makedirs(self.directory, exist_ok=True)
+        write_atomic(path, write)
+        evict_lru(self.directory, self.max_bytes, keep=(path,))
+    
+    def parse(self, filename, log_format, band_plan=None):
+        """Parse `filename` with the `log_format` parser, or load the cached result of an earlier parse
+        
+        Parser errors propagate, so only logs that parsed are stored.
+        """
+        try:
+            with stage('hash'):
+                path = self.path_for(file_digest(filename), log_format, band_plan)
+        except OSError:
+            return LOG_PARSERS[log_format](filename, band_plan)  # the parser reports the error
+        with stage('parse_cache_load'):
+            cached = self.get(path)
+        if cached is not None:
+            return cached
+        grids_by_band, callsign = LOG_PARSERS[log_format](filename, band_plan)
+        self.put(path, grids_by_band, callsign)
+        return grids_by_band, callsign
+
+class BasemapCache:
+    """Size-bounded on-disk LRU cache of rasterized background layers
+    
+    The coastline, border, land, ocean and lake layers are rendered once per
+    (extent, projection, figure size, dpi) and stored as PNG; later maps of the
+    same region composite their overlay on the cached image instead of running
+    the cartopy feature pipeline again.
+    """
+    
+    # Bump when the background styling in _add_base_features changes
+    STYLE_VERSION = 1
+    
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024):
+        self.directory = directory or os.path.join(default_cache_dir(), 'basemaps')
+        self.max_bytes = max_bytes
+    
+    def path_for(self, extent, figsize, dpi, projection='PlateCarree'):
+        key = repr((tuple(round(float(v), 6) for v in extent), projection, tuple(figsize), dpi,
+                    self.STYLE_VERSION))
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + '.png')
+    
+    def get(self, extent, figsize, dpi):
+        """Return the background image for this key as an array, rendering and storing it on a miss"""
+        _load_plotting()
+        path = self.path_for(extent, figsize, dpi)
+        if os.path.exists(path):
+            try:
+                image = plt.imread(path)
+                os.utime(path)  # mark as recently used
+                return image
+            except (OSError, SyntaxError, ValueError):
+                pass  # unreadable entry; render it again
+        os.makedirs(self.directory, exist_ok=True)
+        write_atomic(path, lambda tmp_path: _render_basemap(extent, figsize, dpi, tmp_path))
+        image = plt.imread(path)
+        evict_lru(self.directory, self.max_bytes, keep=(path,))
+        return image
+
+def _add_base_features(ax):
+    """Background layers drawn under every map"""
+    ax.add_feature(cfeature.COASTLINE, linewidth=0.5)
+    ax.add_feature(cfeature.BORDERS, linewidth=0.3)
+    ax.add_feature(cfeature.LAND, alpha=0.2, color='lightgray')
+    ax.add_feature(cfeature.OCEAN, alpha=0.2, color='lightblue')
+    ax.add_feature(cfeature.LAKES, edgecolor='blue', facecolor='none', linewidth=0.5)
+
+def _render_basemap(extent, figsize, dpi, path):
+    """Rasterize the background layers for `extent`, sized to fit `figsize` at `dpi`, to a PNG file"""
+    _load_plotting()
+    lon_min, lon_max, lat_min, lat_max = extent
+    scale = min(figsize[0] / (lon_max - lon_min), figsize[1] / (lat_max - lat_min))
+    width = max(1, round((lon_max - lon_min) * scale * dpi))
+    height = max(1, round((lat_max - lat_min) * scale * dpi))
     
-    return filtered
+    fig = plt.figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    ax = fig.add_axes([0, 0, 1, 1], projection=ccrs.PlateCarree())
+    ax.set_extent([lon_min, lon_max, lat_min, lat_max], crs=ccrs.PlateCarree())
+    ax.spines['geo'].set_visible(False)
+    _add_base_features(ax)
+    fig.savefig(path, dpi=dpi, format='png')
+    plt.close(fig)
 
-def create_grid_map(grids, callsign, band, continents=None, output_file=None):
-    """Create color-coded map of Maidenhead grid squares for a specific band"""
+def _draw_grid_map(grids, callsign, band, continents=None, reuse_figure=False, basemap_cache=None,
+                   backend='vector', distance_from=None, lod=False):
+    """Draw a band's map without saving it (see create_grid_map)
     
-    grid_counts = Counter(grids)
+    Returns None when no grid is in the selected continents, else a dict
+    of the figure, axes, base map, overlay artists (grid `squares`,
+    `labels`, `colorbar`), the worked and drawn GridCounts, the extent and
+    region name.
+    """
+    if backend not in MAP_BACKENDS:
+        raise ValueError(f"Unknown map backend: {backend}")
+    if distance_from is not None:
+        home_id = encode_grids(np.array([distance_from]))
+        if home_id[0] < 0:
+            raise ValueError(f"Invalid grid square: {distance_from}")
+    _load_plotting()
+    grid_counts = as_grid_counts(grids)
     
     # Auto-select continents if not specified
     if continents is None:
-        continents = auto_select_continents(grids)
+        with stage('auto_select_continents', band):
+            continents = auto_select_continents(grid_counts)
         print(f"Auto-selected continents: {', '.join(continents)}")
     
     # Filter grids by continents
-    valid_grids = filter_grids_by_continents(grid_counts, continents)
+    with stage('filter_continents', band):
+        valid_grids = filter_grids_by_continents(grid_counts, continents)
     
-    if not valid_grids:
+    if not len(valid_grids.ids):
         print(f"No valid grid squares found for {band} in selected continents")
+        return None
+    
+    with stage('bounds', band):
+        # Decode every grid once; the bounds are reused for extent, rectangles and labels
+        grid_lat_mins, grid_lat_maxs, grid_lon_mins, grid_lon_maxs = grid_id_bounds(valid_grids.ids)
+        grid_lengths = grid_id_lengths(valid_grids.ids)
+        
+        # Check if we have 6-digit grids (microwave contest)
+        has_6digit_grids = bool((grid_lengths >= 6).any())
+        
+        # Get optimal bounds based on actual grid locations
+        lon_min, lon_max, lat_min, lat_max = get_optimal_bounds(valid_grids.ids)
+        
+        # Generate region name based on bounds
+        region_name = get_region_name(lon_min, lon_max, lat_min, lat_max)
+        
+        # With `lod`, grids are drawn merged into enclosing grids that are at most a pixel at this extent
+        lod_length = lod_grid_length((lon_min, lon_max, lat_min, lat_max)) if lod else int(GRID_ID_LENGTHS[-1])
+        drawn_grids = CountPyramid(valid_grids).at(lod_length)
+        if drawn_grids is not valid_grids:
+            grid_lat_mins, grid_lat_maxs, grid_lon_mins, grid_lon_maxs = grid_id_bounds(drawn_grids.ids)
+    
+    with stage('base_map', band):
+        base = _prepare_base_map((lon_min, lon_max, lat_min, lat_max), reuse=reuse_figure,
+                                 basemap_cache=basemap_cache)
+    fig, ax = base['fig'], base['ax']
+    overlay = []
+    
+    with stage('grid_squares', band):
+        # Add grid square outlines for VHF/UHF/microwave bands
+        vhf_uhf_bands = ['6m', '2m', '1.25m', '70cm', '33cm', '23cm', '13cm', '9cm', '6cm', '3cm', 
+                         '1.25cm', '6mm', '4mm', '2.5mm', '2mm', '1mm', '10G', '24G', '47G', '75G', '123G']
+        if band in vhf_uhf_bands or 'GHz' in band:
+            # Draw 1°×2° grid square outlines in light gray
+            outline_corners = [(lon, lat)
+                               for lat in range(int(lat_min) - 1, int(lat_max) + 2)
+                               for lon in range(int(lon_min) - 2, int(lon_max) + 3, 2)
+                               if lat_min <= lat <= lat_max and lon_min <= lon <= lon_max]
+            if outline_corners:
+                corners = np.array(outline_corners, dtype=float)
+                outlines = PolyCollection(_rectangle_vertices(corners[:, 0], corners[:, 1],
+                                                              corners[:, 0] + 2, corners[:, 1] + 1),
+                                          linewidths=0.3, 
+                                          edgecolors='lightgray', 
+                                          facecolors='none',
+                                          alpha=0.7,
+                                          transform=ccrs.PlateCarree())
+                overlay.append(ax.add_collection(outlines, autolim=False))
+    
+        max_count = int(drawn_grids.counts.max())
+        if distance_from is None:
+            cmap, values, max_value = plt.cm.Reds, drawn_grids.counts, max_count
+            color_label = 'Number of Contacts'
+        else:
+            # Great-circle distance from the home grid's center to each drawn grid's center
+            values = great_circle_km(*grid_id_centers(home_id), *grid_id_centers(drawn_grids.ids))
+            cmap, max_value = plt.cm.viridis, max(float(values.max()), 1.0)
+            color_label = 'Distance (km)'
+        
+        def shade(values):
+            """Colormap position: counts on the upper 70% of Reds, distances on all of viridis"""
+            return 0.3 + 0.7 * (values / max_value) if distance_from is None else values / max_value
+        
+        if backend == 'raster':
+            # One image of the dense count (or distance) array, colored on the same scale
+            raster, cell_extent = grid_count_raster(GridCounts(drawn_grids.ids, values),
+                                                    (lon_min, lon_max, lat_min, lat_max))
+            squares = ax.imshow(shade(raster), origin='lower', extent=cell_extent,
+                                cmap=cmap, vmin=0, vmax=1, alpha=0.8, interpolation='nearest',
+                                zorder=1, gid='grid_squares', transform=ccrs.PlateCarree())
+            overlay.append(squares)
+            ax.set_extent([lon_min, lon_max, lat_min, lat_max], crs=ccrs.PlateCarree())
+        else:
+            # Plot grid squares as one collection with per-face colors
+            colors = cmap(shade(values))
+            squares = PolyCollection(_rectangle_vertices(grid_lon_mins, grid_lat_mins,
+                                                         grid_lon_maxs, grid_lat_maxs),
+                                     linewidths=0.5, 
+                                     edgecolors='black', 
+                                     facecolors=colors,
+                                     alpha=0.8,
+                                     transform=ccrs.PlateCarree())
+            overlay.append(ax.add_collection(squares, autolim=False))
+    
+    with stage('layout', band):
+        subject = 'Maidenhead Grid Squares' if distance_from is None else f'Distance from {distance_from.upper()}'
+        ax.set_title(f'{callsign} - {band} Band - {subject}\n{region_name.replace("_", " ").title()}', 
+                     fontsize=14, fontweight='bold')
+    
+        # Add colorbar
+        sm = plt.cm.ScalarMappable(cmap=cmap, 
+                                   norm=plt.Normalize(vmin=1 if distance_from is None else 0, vmax=max_value))
+        sm.set_array([])
+        cbar = fig.colorbar(sm, ax=ax, shrink=0.6)
+        cbar.set_label(color_label, fontsize=12)
+    
+        fig.tight_layout()
+    
+    with stage('labels', band):
+        # Placed once the layout is final, so label boxes are measured in output pixels
+        labels = _add_grid_labels(ax, valid_grids, (lon_min, lon_max, lat_min, lat_max),
+                                  square_labels=has_6digit_grids)
+        overlay.extend(labels)
+    
+    return {'fig': fig, 'ax': ax, 'base': base, 'overlay': overlay, 'squares': squares, 'labels': labels,
+            'colorbar': cbar, 'valid_grids': valid_grids, 'drawn_grids': drawn_grids, 'lod_length': lod_length,
+            'extent': (lon_min, lon_max, lat_min, lat_max), 'region_name': region_name, 'max_count': max_count}
+
+def create_grid_map(grids, callsign, band, continents=None, output_file=None, output_dir=None,
+                    reuse_figure=False, basemap_cache=None, backend='vector', distance_from=None, lod=False):
+    """Create color-coded map of Maidenhead grid squares for a specific band
+    
+    `grids` is the band's GridCounts (a list of grid strings or a
+    {grid: count} mapping is also accepted). The default file name is placed
+    in `output_dir` when given. With `reuse_figure`, the base map stays open
+    after saving (in a module-level figure that is never closed) and is
+    reused when the next band has the same extent; callers rendering many
+    bands in one process opt in.
+    `basemap_cache` (a BasemapCache) draws the background layers from a
+    cached raster instead of the cartopy features. The 'raster' `backend`
+    draws the grids as one image of per-cell counts (no outlines) instead
+    of one outlined rectangle each, so drawing cost does not grow with the
+    number of grids. With `distance_from` (a grid square), grids are
+    colored by great-circle distance from its center instead of by count.
+    With `lod`, grids whose enclosing grid is at most LOD_MAX_CELL_PIXELS
+    on the saved map are drawn as that grid, with their counts summed.
+    """
+    drawn = _draw_grid_map(grids, callsign, band, continents, reuse_figure, basemap_cache, backend,
+                           distance_from, lod)
+    if drawn is None:
         return
+    fig, ax, base, cbar = drawn['fig'], drawn['ax'], drawn['base'], drawn['colorbar']
+    valid_grids, drawn_grids, lod_length = drawn['valid_grids'], drawn['drawn_grids'], drawn['lod_length']
+    region_name = drawn['region_name']
+    
+    if not output_file:
+        kind = 'maidenhead' if distance_from is None else 'distance'
+        output_file = f"{callsign}_{band}_{region_name}_{kind}_map.png"
+        if output_dir:
+            output_file = os.path.join(output_dir, output_file)
+    
+    # Everything is rasterized here, including the cartopy background features
+    if _profiler is not None:
+        _profile_draws(ax, band)
+    with stage('savefig', band):
+        fig.savefig(output_file, dpi=MAP_DPI, bbox_inches='tight')
     
-    # Check if we have 6-digit grids (microwave contest)
-    has_6digit_grids = any(len(grid) == 6 for grid in valid_grids.keys())
+    if reuse_figure:
+        # Strip this band's overlay so the next band with the same extent can reuse the base map
+        for artist in drawn['overlay']:
+            artist.remove()
+        cbar.remove()
+        ax.set_subplotspec(base['subplotspec'])
+        ax.set_title('')
+    else:
+        plt.close(fig)
+    
+    print(f"Map saved as {output_file}")
+    print(f"{band}: {len(valid_grids.ids)} unique grid squares, {int(valid_grids.counts.sum())} contacts")
+    if drawn_grids is not valid_grids:
+        print(f"{band}: drawn as {len(drawn_grids.ids)} {lod_length}-character grids "
+              f"(coarser grids are at most {LOD_MAX_CELL_PIXELS} px at this extent)")
+    return output_file
+
+# Labels drawn per map at most: fields first, then the most-worked 4-character squares
+MAX_MAP_LABELS = 400
+# Space (pixels at MAP_DPI) kept clear around each label
+LABEL_PADDING = 4
+
+class LabelPlacer:
+    """Greedy overlap-free label placement over a spatial hash of pixel boxes
+    
+    Boxes are offered in priority order and kept only when they overlap no
+    box kept before. Each kept box is registered in every hash cell it
+    touches, so a test only looks at the few boxes nearby.
+    """
+    
+    def __init__(self, max_labels=MAX_MAP_LABELS, cell_size=64):
+        self.max_labels = max_labels
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+        self.placed = 0
     
-    # Get optimal bounds based on actual grid locations
-    lon_min, lon_max, lat_min, lat_max = get_optimal_bounds(valid_grids.keys())
+    def place(self, boxes):
+        """Indices of the (n, 4) x0, y0, x1, y1 `boxes` that were placed, in order"""
+        kept = []
+        cell = self.cell_size
+        for i, box in enumerate(np.asarray(boxes, dtype=float).tolist()):
+            if self.placed >= self.max_labels:
+                break
+            x0, y0, x1, y1 = box
+            keys = [(cx, cy) for cx in range(int(x0 // cell), int(x1 // cell) + 1)
+                    for cy in range(int(y0 // cell), int(y1 // cell) + 1)]
+            if any(x0 < other[2] and other[0] < x1 and y0 < other[3] and other[1] < y1
+                   for key in keys for other in self.cells.get(key, ())):
+                continue
+            for key in keys:
+                self.cells[key].append(box)
+            kept.append(i)
+            self.placed += 1
+        return kept
+
+def _label_path(text, fontsize, align):
+    """Outline of a bold label in points, positioned so `align` ('center' or 'lower left') is at the origin"""
+    path = TextPath((0, 0), text, size=fontsize, prop=FontProperties(weight='bold'))
+    # Bounds of the outline's vertices: close enough for alignment and much cheaper than Path.get_extents
+    vertices = path.vertices[path.codes != path.CLOSEPOLY] if path.codes is not None else path.vertices
+    (x0, y0), (x1, y1) = vertices.min(axis=0), vertices.max(axis=0)
+    dx, dy = ((x0 + x1) / 2, (y0 + y1) / 2) if align == 'center' else (x0, y0)
+    return Affine2D().translate(-dx, -dy).transform_path(path)
+
+def _label_boxes(anchors, template, fontsize, align):
+    """Pixel boxes (at MAP_DPI) of labels at `anchors`, sized like the widest label `template`"""
+    vertices = _label_path(template, fontsize, align).vertices * MAP_DPI / 72
+    (x0, y0), (x1, y1) = vertices.min(axis=0), vertices.max(axis=0)
+    offsets = np.array([x0 - LABEL_PADDING, y0 - LABEL_PADDING, x1 + LABEL_PADDING, y1 + LABEL_PADDING])
+    return np.tile(anchors, 2) + offsets
+
+def _label_collection(ax, texts, lons, lats, fontsize, align, color, stroke=None):
+    """All labels of one style as a single PathCollection of text outlines, sized in points"""
+    # Collection.offset_transform was called transOffset before matplotlib 3.6
+    offset_kwarg = 'offset_transform' if hasattr(PathCollection, 'set_offset_transform') else 'transOffset'
+    collection = PathCollection([_label_path(text, fontsize, align) for text in texts],
+                                offsets=np.column_stack([lons, lats]),
+                                transform=Affine2D().scale(1 / 72) + ax.figure.dpi_scale_trans,
+                                facecolors=color, edgecolors='none', zorder=3,
+                                **{offset_kwarg: ax.transData})
+    if stroke:
+        collection.set_path_effects([path_effects.withStroke(linewidth=2, foreground=stroke)])
+    return ax.add_collection(collection, autolim=False)
+
+def _add_grid_labels(ax, grids, extent, square_labels=True, max_labels=MAX_MAP_LABELS):
+    """Add field labels and (with `square_labels`) 4-character square labels that fit without overlapping
     
-    # Generate region name based on bounds
-    region_name = get_region_name(lon_min, lon_max, lat_min, lat_max)
+    Fields are placed first, then squares by contact count, through a
+    LabelPlacer in output pixels; labels overlapping a placed one are
+    dropped and at most `max_labels` are kept. Each style is drawn as one
+    PathCollection. Returns the added artists.
+    """
+    lon_min, lon_max, lat_min, lat_max = extent
+    # The map projection is PlateCarree, so data coordinates are lon/lat
+    ax.apply_aspect()
+    to_pixels = ax.transData + Affine2D().scale(MAP_DPI / ax.figure.dpi)
+    placer = LabelPlacer(max_labels)
+    artists = []
     
-    fig = plt.figure(figsize=(14, 10))
+    # Grid field labels at field centers - only where the center is in the visible area
+    field_ids = np.unique(coarsen_grid_ids(grids.ids, 2))
+    field_lat_mins, _, field_lon_mins, _ = grid_id_bounds(field_ids)
+    lons, lats = field_lon_mins + 10, field_lat_mins + 5
+    visible = (lons >= lon_min) & (lons <= lon_max) & (lats >= lat_min) & (lats <= lat_max)
+    field_ids, lons, lats = field_ids[visible], lons[visible], lats[visible]
+    boxes = _label_boxes(to_pixels.transform(np.column_stack([lons, lats])), 'MM', 12, 'center')
+    kept = placer.place(boxes)
+    if kept:
+        artists.append(_label_collection(ax, decode_grid_ids(field_ids[kept]), lons[kept], lats[kept],
+                                         12, 'center', 'blue'))
+    
+    # 4-character square labels at the lower-left corner with a small offset, most-worked first
+    if square_labels:
+        squares = coarsen_grid_counts(grids, 4)
+        is_square = grid_id_lengths(squares.ids) == 4
+        square_ids = squares.ids[is_square][np.argsort(-squares.counts[is_square], kind='stable')]
+        square_lat_mins, _, square_lon_mins, _ = grid_id_bounds(square_ids)
+        lons, lats = square_lon_mins + 2 * 0.05, square_lat_mins + 1 * 0.05
+        visible = (lons >= lon_min) & (lons <= lon_max) & (lats >= lat_min) & (lats <= lat_max)
+        square_ids, lons, lats = square_ids[visible], lons[visible], lats[visible]
+        boxes = _label_boxes(to_pixels.transform(np.column_stack([lons, lats])), 'MM88', 8, 'lower left')
+        kept = placer.place(boxes)
+        if kept:
+            artists.append(_label_collection(ax, decode_grid_ids(square_ids[kept]), lons[kept], lats[kept],
+                                             8, 'lower left', 'black', stroke='white'))
+    return artists
+
+# Stage names for the time spent drawing each kind of map layer inside savefig,
+# by artist gid or else type
+DRAW_STAGES = {
+    'grid_squares': 'draw_grid_squares',
+    'FeatureArtist': 'draw_background',
+    'AxesImage': 'draw_background',
+    'Gridliner': 'draw_gridlines',
+    'PolyCollection': 'draw_grid_squares',
+    'Text': 'draw_labels',
+    'PathCollection': 'draw_labels',
+}
+
+def _profile_draws(ax, band):
+    """Record the draw time of the map's layers as stages of the enclosing savefig"""
+    for artist in ax.get_children():
+        name = DRAW_STAGES.get(artist.get_gid()) or DRAW_STAGES.get(type(artist).__name__)
+        if name is None:
+            continue
+        artist._profile_band = band
+        if 'draw' not in vars(artist):
+            artist.draw = functools.partial(_staged_draw, artist, type(artist).draw, name)
+
+def _staged_draw(artist, draw, name, renderer, *args, **kwargs):
+    with stage(name, artist._profile_band):
+        return draw(artist, renderer, *args, **kwargs)
+
+def _rectangle_vertices(lon_mins, lat_mins, lon_maxs, lat_maxs):
+    """(n, 4, 2) polygon vertices for axis-aligned lon/lat rectangles"""
+    return np.stack([np.column_stack([lon_mins, lat_mins]),
+                     np.column_stack([lon_maxs, lat_mins]),
+                     np.column_stack([lon_maxs, lat_maxs]),
+                     np.column_stack([lon_mins, lat_maxs])], axis=1)
+
+# Base map (figure, axes, background features and gridlines) of the most recent
+# render, kept so consecutive bands with the same extent only swap their overlay
+_base_map_cache = {}
+# Number of base maps (one per extent) kept open for reuse, least recently used closed first
+BASE_MAP_CACHE_SIZE = 1
+
+# Figure size and resolution of saved maps
+MAP_FIGSIZE = (14, 10)
+MAP_DPI = 300
+# How create_grid_map draws worked grids: outlined rectangles or one count image
+MAP_BACKENDS = ('vector', 'raster')
+# Largest count image the raster backend draws (rows, columns), about a third of the map's pixels each way;
+# matplotlib needs several times more memory to resample anything close to the output size
+RASTER_MAX_SHAPE = (1000, 1400)
+
+# Level of detail only merges grids into enclosing grids this wide or less, which cover the same pixels
+LOD_MAX_CELL_PIXELS = 1
+
+def lod_grid_length(extent, figsize=MAP_FIGSIZE, dpi=MAP_DPI, max_cell_pixels=None):
+    """Coarsest grid length (2, 4, 6 or 8) whose cells are at most `max_cell_pixels` wide on a map of `extent`
+    
+    Finer grids can be drawn merged into grids of this length without a
+    visible change; 8 when even extended squares are wider.
+    `max_cell_pixels` defaults to LOD_MAX_CELL_PIXELS. The scale assumes the
+    map fills the whole figure, an upper bound, so a visible cell is never
+    merged away.
+    """
+    if max_cell_pixels is None:
+        max_cell_pixels = LOD_MAX_CELL_PIXELS
+    lon_min, lon_max, lat_min, lat_max = extent
+    pixels_per_degree = min(figsize[0] * dpi / max(lon_max - lon_min, 1e-9),
+                            figsize[1] * dpi / max(lat_max - lat_min, 1e-9))
+    # Cells are twice as wide in longitude as they are tall
+    cell_pixels = 360 / GRID_ID_SIDES * pixels_per_degree
+    merged = GRID_ID_LENGTHS[cell_pixels <= max_cell_pixels]
+    return int(merged[0]) if len(merged) else int(GRID_ID_LENGTHS[-1])
+
+def _prepare_base_map(extent, reuse=True, basemap_cache=None):
+    """Return the base map for `extent` = (lon_min, lon_max, lat_min, lat_max), reusing the cached one when possible"""
+    _load_plotting()
+    key = (extent, basemap_cache.directory if basemap_cache else None)
+    cached = _base_map_cache.pop(key, None)
+    if reuse and cached and plt.fignum_exists(cached['fig'].number):
+        _base_map_cache[key] = cached
+        plt.figure(cached['fig'].number)
+        return cached
+    if cached:
+        plt.close(cached['fig'])
+    while _base_map_cache and (not reuse or len(_base_map_cache) >= BASE_MAP_CACHE_SIZE):
+        plt.close(_base_map_cache.pop(next(iter(_base_map_cache)))['fig'])
+    
+    lon_min, lon_max, lat_min, lat_max = extent
+    fig = plt.figure(figsize=MAP_FIGSIZE)
     ax = plt.axes(projection=ccrs.PlateCarree())
     ax.set_extent([lon_min, lon_max, lat_min, lat_max], crs=ccrs.PlateCarree())
     
-    ax.add_feature(cfeature.COASTLINE, linewidth=0.5)
-    ax.add_feature(cfeature.BORDERS, linewidth=0.3)
-    ax.add_feature(cfeature.LAND, alpha=0.2, color='lightgray')
-    ax.add_feature(cfeature.OCEAN, alpha=0.2, color='lightblue')
-    ax.add_feature(cfeature.LAKES, edgecolor='blue', facecolor='none', linewidth=0.5)
-    
-    # Add grid square outlines for VHF/UHF/microwave bands
-    vhf_uhf_bands = ['6m', '2m', '1.25m', '70cm', '33cm', '23cm', '13cm', '9cm', '6cm', '3cm', 
-                     '1.25cm', '6mm', '4mm', '2.5mm', '2mm', '1mm', '10G', '24G', '47G', '75G', '123G']
-    if band in vhf_uhf_bands or 'GHz' in band:
-        # Draw 1°×2° grid square outlines in light gray
-        for lat in range(int(lat_min) - 1, int(lat_max) + 2):
-            for lon in range(int(lon_min) - 2, int(lon_max) + 3, 2):
-                if lat_min <= lat <= lat_max and lon_min <= lon <= lon_max:
-                    rect = patches.Rectangle((lon, lat), 2, 1,
-                                           linewidth=0.3, 
-                                           edgecolor='lightgray', 
-                                           facecolor='none',
-                                           alpha=0.7,
-                                           transform=ccrs.PlateCarree())
-                    ax.add_patch(rect)
-    
-    # Plot grid squares as rectangles
-    max_count = max(valid_grids.values())
-    for grid, count in valid_grids.items():
-        bounds = maidenhead_to_bounds(grid)
-        if bounds:
-            grid_lat_min, grid_lat_max, grid_lon_min, grid_lon_max = bounds
-            
-            intensity = count / max_count
-            color = plt.cm.Reds(0.3 + 0.7 * intensity)
-            
-            rect = patches.Rectangle((grid_lon_min, grid_lat_min), 
-                                   grid_lon_max - grid_lon_min, 
-                                   grid_lat_max - grid_lat_min,
-                                   linewidth=0.5, 
-                                   edgecolor='black', 
-                                   facecolor=color,
-                                   alpha=0.8,
-                                   transform=ccrs.PlateCarree())
-            ax.add_patch(rect)
-    
-    # Add 4-digit grid labels at lower-left corner for microwave contests with 6-digit grids
-    if has_6digit_grids:
-        grid_4digit_positions = {}
-        for grid in valid_grids.keys():
-            if len(grid) >= 4:
-                grid_4digit = grid[:4]
-                if grid_4digit not in grid_4digit_positions:
-                    bounds = maidenhead_to_bounds(grid_4digit)
-                    if bounds:
-                        grid_lat_min, grid_lat_max, grid_lon_min, grid_lon_max = bounds
-                        # Position at lower-left corner with small offset
-                        label_lon = grid_lon_min + (grid_lon_max - grid_lon_min) * 0.05
-                        label_lat = grid_lat_min + (grid_lat_max - grid_lat_min) * 0.05
-                        grid_4digit_positions[grid_4digit] = (label_lon, label_lat)
-        
-        for grid_4digit, (lon, lat) in grid_4digit_positions.items():
-            ax.text(lon, lat, grid_4digit, fontsize=8, fontweight='bold',
-                   ha='left', va='bottom', color='black',
-                   path_effects=[path_effects.withStroke(linewidth=2, foreground='white')],
-                   transform=ccrs.PlateCarree())
-    
-    # Add grid field labels - only show if they fit in the visible area
-    field_centers = {}
-    for grid in valid_grids.keys():
-        field = grid[:2]
-        if field not in field_centers:
-            field_lon_center = (ord(field[0]) - ord('A')) * 20 - 180 + 10
-            field_lat_center = (ord(field[1]) - ord('A')) * 10 - 90 + 5
-            # Only show labels if they're in the visible area
-            if lon_min <= field_lon_center <= lon_max and lat_min <= field_lat_center <= lat_max:
-                field_centers[field] = (field_lon_center, field_lat_center)
-    
-    for field, (lon, lat) in field_centers.items():
-        ax.text(lon, lat, field, fontsize=12, fontweight='bold',
-                ha='center', va='center', color='blue',
-                transform=ccrs.PlateCarree())
+    if basemap_cache:
+        background = basemap_cache.get(extent, MAP_FIGSIZE, MAP_DPI)
+        ax.imshow(background, origin='upper', extent=[lon_min, lon_max, lat_min, lat_max],
+                  transform=ccrs.PlateCarree(), interpolation='antialiased', zorder=0)
+        ax.set_extent([lon_min, lon_max, lat_min, lat_max], crs=ccrs.PlateCarree())
+    else:
+        _add_base_features(ax)
     
     # Configure gridlines with whole degree increments
-    import matplotlib.ticker as mticker
     gl = ax.gridlines(draw_labels=True, alpha=0.3, 
                      xlocs=range(int(lon_min), int(lon_max) + 1),
                      ylocs=range(int(lat_min), int(lat_max) + 1))
     gl.xformatter = mticker.FuncFormatter(lambda x, p: f'{abs(int(x))}°W' if x < 0 else f'{int(x)}°E')
     gl.yformatter = mticker.FuncFormatter(lambda y, p: f'{int(y)}°N' if y >= 0 else f'{abs(int(y))}°S')
     
-    plt.title(f'{callsign} - {band} Band - Maidenhead Grid Squares\n{region_name.replace("_", " ").title()}', 
-              fontsize=14, fontweight='bold')
+    base = {'key': key, 'fig': fig, 'ax': ax, 'subplotspec': ax.get_subplotspec()}
+    if reuse:
+        _base_map_cache[key] = base
+    return base
+
+def _init_render_worker(continent_table=None):
+    """Process pool initializer: render off-screen with the parent's continent table"""
+    _load_plotting()
+    plt.switch_backend('Agg')
+    if continent_table:
+        load_continent_table(continent_table)
+
+def _render_band_task(task):
+    """Worker entry point: render one band
     
-    # Add colorbar
-    sm = plt.cm.ScalarMappable(cmap=plt.cm.Reds, 
-                               norm=plt.Normalize(vmin=1, vmax=max_count))
-    sm.set_array([])
-    cbar = plt.colorbar(sm, ax=ax, shrink=0.6)
-    cbar.set_label('Number of Contacts', fontsize=12)
+    Returns its output file, captured console output and, when the parent
+    is profiling (`trace_memory` is not None), the worker's stage records.
+    """
+    grids, callsign, band, render_options, trace_memory = task
+    output = io.StringIO()
+    records = None
+    with contextlib.redirect_stdout(output):
+        if trace_memory is None:
+            output_file = create_grid_map(grids, callsign, band, **render_options)
+        else:
+            with StageProfiler(trace_memory) as profiler, stage('create_grid_map', band):
+                output_file = create_grid_map(grids, callsign, band, **render_options)
+            records = profiler.records
+    return output_file, output.getvalue(), records
+
+def render_bands(grids_by_band, callsign, continents=None, jobs=1, **render_options):
+    """Render one map per band, optionally across `jobs` worker processes
     
-    plt.tight_layout()
+    Only the compact per-band GridCounts are sent to the workers. Console
+    output is replayed in band order, so it does not depend on which worker
+    finishes first. Extra keyword arguments are passed to create_grid_map.
+    Returns {band: output_file} (None for bands with nothing to draw).
+    """
+    render_options = dict(render_options, continents=continents)
+    if jobs == 1 or len(grids_by_band) <= 1:
+        output_files = {}
+        for band, grids in grids_by_band.items():
+            with stage('create_grid_map', band):
+                output_files[band] = create_grid_map(grids, callsign, band, **render_options)
+        return output_files
     
-    if not output_file:
-        output_file = f"{callsign}_{band}_{region_name}_maidenhead_map.png"
+    trace_memory = _profiler.trace_memory if _profiler is not None else None
+    tasks = [(grids, callsign, band, render_options, trace_memory) for band, grids in grids_by_band.items()]
+    workers = min(jobs or os.cpu_count() or 1, len(tasks))
+    output_files = {}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                initializer=_init_render_worker,
+                                                initargs=(_continent_table_path,)) as pool:
+        for task, (output_file, output, records) in zip(tasks, pool.map(_render_band_task, tasks)):
+            sys.stdout.write(output)
+            output_files[task[2]] = output_file
+            if records:
+                _profiler.merge(records)
+    return output_files
+
+def watch_log(filename, continents=None, interval=1.0, debounce=5.0, band_plan=None,
+              basemap_cache=None, output_dir=None, keep_figures=8, backend='vector', lod=False):
+    """Follow a growing Cabrillo log, re-rendering bands whose counts changed until interrupted
     
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
-    print(f"Map saved as {output_file}")
-    print(f"{band}: {len(valid_grids)} unique grid squares, {sum(valid_grids.values())} contacts")
+    The file is parsed incrementally (see CabrilloTail) every `interval`
+    seconds. Changed bands are rendered at most once per `debounce` seconds,
+    in this process, with up to `keep_figures` base maps kept open so
+    later updates only redraw the overlay.
+    """
+    global BASE_MAP_CACHE_SIZE
+    tail = CabrilloTail(filename, band_plan)
+    rendered = {}
+    pending = set()
+    pending_since = None
+    cache_size, BASE_MAP_CACHE_SIZE = BASE_MAP_CACHE_SIZE, max(keep_figures, 1)
+    print(f"Watching {filename} (Ctrl-C to stop)")
+    try:
+        while True:
+            changed = tail.poll()
+            if changed:
+                pending |= changed
+                # The first pass renders at once; later ones wait out the debounce period
+                pending_since = pending_since or (time.monotonic() if rendered else float('-inf'))
+            if pending and time.monotonic() - pending_since >= debounce:
+                start = time.perf_counter()
+                grids_by_band = tail.result()
+                updated = []
+                for band, grids in grids_by_band.items():
+                    previous = rendered.get(band)
+                    if band not in pending or (previous is not None and
+                                               np.array_equal(previous.ids, grids.ids) and
+                                               np.array_equal(previous.counts, grids.counts)):
+                        continue
+                    create_grid_map(grids, tail.callsign, band, continents, output_dir=output_dir,
+                                    reuse_figure=True, basemap_cache=basemap_cache, backend=backend, lod=lod)
+                    rendered[band] = grids
+                    updated.append(band)
+                pending.clear()
+                pending_since = None
+                if updated:
+                    print(f"{time.strftime('%H:%M:%S')} updated {', '.join(updated)} "
+                          f"in {time.perf_counter() - start:.2f}s")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("Stopped watching")
+    finally:
+        BASE_MAP_CACHE_SIZE = cache_size
+
+def _add_band_plan_argument(parser):
+    """Add the --band-plan option shared by the CLI entry points"""
+    parser.add_argument('--band-plan', default=DEFAULT_BAND_PLAN, metavar='{r1,r2,r3,FILE}',
+                       help='IARU region band plan or a JSON band plan file (default: r2)')
+
+def _add_continent_table_argument(parser):
+    parser.add_argument('--continent-table', metavar='FILE',
+                       help="Continent lookup table (.npz) built with 'maidenhead-map continent-table'")
+
+def _job_count(value):
+    """argparse type for worker process counts: 0 (one per CPU) or more"""
+    import argparse
+    
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"must be a whole number, not {value}") from None
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 (one per CPU) or more, not {value}")
+    return number
+
+def _add_render_arguments(parser):
+    """Command-line options shared by every rendering command for how grids are drawn"""
+    parser.add_argument('--backend', choices=MAP_BACKENDS, default='vector',
+                       help='Draw grids as outlined rectangles (vector, default) or as one count image (raster), '
+                            'which stays fast with tens of thousands of grids')
+    parser.add_argument('--lod', action='store_true',
+                       help='Draw grids merged into enclosing grids that are at most a pixel wide at the map '
+                            'extent (fewer shapes for very dense logs)')
+
+def _add_cache_arguments(parser, parse_cache=True):
+    """Command-line options shared by every rendering command for the on-disk caches"""
+    parser.add_argument('--cache-dir', help='Cache directory (default: $MAIDENHEAD_MAP_CACHE or ~/.cache/maidenhead-map)')
+    parser.add_argument('--basemap-cache', action='store_true',
+                       help='Draw background layers from cached rasters instead of with cartopy on every map '
+                            '(only faster when cartopy features are slow to load; output files are larger)')
+    parser.add_argument('--basemap-cache-mb', type=int, default=256,
+                       help='Size limit of the basemap cache in MB (least recently used maps are evicted)')
+    if not parse_cache:
+        return
+    parser.add_argument('--no-parse-cache', action='store_true',
+                       help='Always parse logs instead of loading earlier parse results from the cache')
+    parser.add_argument('--parse-cache-mb', type=int, default=64,
+                       help='Size limit of the parsed log cache in MB (least recently used logs are evicted)')
+
+def _add_profile_arguments(parser):
+    parser.add_argument('--profile', metavar='REPORT.json',
+                       help='Write wall time, CPU time and peak memory of each stage, per band, as JSON')
+    parser.add_argument('--profile-memory', action='store_true',
+                       help='Also trace peak memory per stage with --profile (slows the run)')
+    parser.add_argument('--profile-dump', metavar='FILE.prof',
+                       help='Write a cProfile dump of the main process (for pstats, snakeviz or flameprof)')
+
+@contextlib.contextmanager
+def _profiling_from_args(args):
+    """Profile the enclosed command as a 'main' stage when --profile or --profile-dump is given"""
+    if not (args.profile or args.profile_dump):
+        yield
+        return
+    profiler = StageProfiler(trace_memory=args.profile_memory)
+    cprofile = None
+    if args.profile_dump:
+        import cProfile
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+    try:
+        with profiler, stage('main'):
+            yield
+    finally:
+        if cprofile:
+            cprofile.disable()
+            cprofile.dump_stats(args.profile_dump)
+            print(f"cProfile dump written to {args.profile_dump}")
+        if args.profile:
+            profiler.write_json(args.profile)
+            profiler.print_summary()
+            print(f"Profile written to {args.profile}")
+
+def _basemap_cache_from_args(args):
+    if not args.basemap_cache:
+        return None
+    directory = os.path.join(args.cache_dir, 'basemaps') if args.cache_dir else None
+    return BasemapCache(directory, args.basemap_cache_mb * 1024 * 1024)
+
+def _parse_cache_from_args(args):
+    if args.no_parse_cache:
+        return None
+    directory = os.path.join(args.cache_dir, 'parsed') if args.cache_dir else None
+    return ParseCache(directory, args.parse_cache_mb * 1024 * 1024)
+
+MANIFEST_LIST_EXTENSIONS = ('.txt', '.lst')
+
+def expand_log_inputs(inputs):
+    """Expand directories, glob patterns and list files (one log path per line) into log paths
+    
+    Directory and glob matches are sorted; duplicates are dropped.
+    """
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            found = sorted(os.path.join(item, name) for name in os.listdir(item)
+                           if detect_log_format(name) and os.path.isfile(os.path.join(item, name)))
+        elif any(ch in item for ch in '*?['):
+            found = sorted(path for path in glob.glob(item, recursive=True) if os.path.isfile(path))
+        elif item.lower().endswith(MANIFEST_LIST_EXTENSIONS):
+            base = os.path.dirname(item)
+            with open(item, 'r') as f:
+                found = [os.path.join(base, line.strip()) for line in f
+                         if line.strip() and not line.startswith('#')]
+        else:
+            found = [item]
+        paths.extend(found)
+    
+    seen = set()
+    unique_paths = []
+    for path in paths:
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            unique_paths.append(path)
+    return unique_paths
+
+def _parse_log_task(task):
+    """Worker entry point: parse one log, returning (grids_by_band, callsign, seconds, captured output)"""
+    filename, log_format, band_plan, parse_cache = task
+    start = time.perf_counter()
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        grids_by_band, callsign = parse_log(filename, log_format, band_plan, parse_cache)
+    return grids_by_band, callsign, time.perf_counter() - start, output.getvalue()
+
+# Bump when a change alters rendered maps; batch runs then re-render logs rendered before it
+RENDER_VERSION = 1
+
+def _render_options_digest(options, band_plan=None):
+    """SHA-256 of everything that decides a batch log's maps besides the log itself
+    
+    That is the readable `options`, the band plan's bands, the continent
+    table's contents, the map size and the parser and renderer versions.
+    """
+    plan = _as_band_plan(band_plan)
+    table = file_digest(_continent_table_path) if _continent_table_path else None
+    key = repr((sorted(options.items()), plan.names, plan.lows, plan.highs, table, MAP_FIGSIZE, MAP_DPI,
+                RASTER_MAX_SHAPE, PARSER_VERSION, RENDER_VERSION))
+    return hashlib.sha256(key.encode()).hexdigest()
+
+def _log_is_up_to_date(entry, stat, options_digest, output_dir):
+    """Whether a previous manifest entry still describes a log with os.stat result `stat` and its outputs
+    
+    Output paths in the entry are relative to `output_dir`.
+    """
+    if not entry or entry.get('options_digest') != options_digest or entry.get('status') == 'error':
+        return False
+    if entry.get('size') != stat.st_size or entry.get('mtime') != stat.st_mtime:
+        return False
+    outputs = [os.path.join(output_dir, band['output'])
+               for band in entry.get('bands', {}).values() if band.get('output')]
+    return all(os.path.exists(path) and os.path.getmtime(path) >= stat.st_mtime for path in outputs)
+
+def run_batch(filenames, output_dir='.', continents=None, jobs=0, log_format=None,
+              manifest_file=None, force=False, basemap_cache=None, band_plan=None, parse_cache=None,
+              backend='vector', lod=False):
+    """Render many logs with one warm worker pool, skipping logs whose maps are up to date
+    
+    Each log's maps go to `output_dir/<log file name>_<path hash>/` (dots
+    replaced by underscores, the hash telling apart logs of the same name in
+    different directories). Parsing and rendering are
+    both scheduled on the pool: a log's bands are queued for rendering as soon
+    as its parse finishes. Per-log results are written to a JSON manifest
+    (default `output_dir/maidenhead_manifest.json`), with output paths
+    relative to `output_dir`, which is also what later runs consult to skip
+    unchanged logs: a log is re-rendered when it, its outputs or anything
+    that decides its maps (see _render_options_digest) changed. Logs that
+    are missing or fail to parse or render get status 'error' and are
+    retried on the next run. Logs
+    are loaded from `parse_cache` (a ParseCache) when they were parsed
+    before. Returns the manifest dict.
+    """
+    render_options = {'continents': continents, 'reuse_figure': True, 'basemap_cache': basemap_cache,
+                      'backend': backend, 'lod': lod}
+    manifest_file = manifest_file or os.path.join(output_dir, 'maidenhead_manifest.json')
+    previous = {}
+    if os.path.exists(manifest_file):
+        with open(manifest_file, 'r') as f:
+            previous = {entry['source']: entry for entry in json.load(f).get('logs', [])}
+    
+    options = {'continents': sorted(continents) if continents else None, 'format': log_format,
+               'band_plan': _as_band_plan(band_plan).name, 'backend': backend, 'lod': lod}
+    options_digest = _render_options_digest(options, band_plan)
+    entries = {}
+    pending = []
+    stats = {}
+    for filename in filenames:
+        source = os.path.abspath(filename)
+        try:
+            stats[filename] = os.stat(filename)
+        except OSError as e:
+            print(f"== {filename}")
+            print(f"Error reading {filename}: {e}")
+            entries[source] = {'source': source, 'options': options, 'options_digest': options_digest,
+                               'bands': {}, 'status': 'error', 'error': str(e)}
+            continue
+        if not force and _log_is_up_to_date(previous.get(source), stats[filename], options_digest, output_dir):
+            entries[source] = dict(previous[source], status='up_to_date')
+        else:
+            pending.append(filename)
+    
+    workers = jobs or os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                initializer=_init_render_worker,
+                                                initargs=(_continent_table_path,)) as pool:
+        parse_futures = {pool.submit(_parse_log_task, (filename, log_format, band_plan, parse_cache)):
+                         filename for filename in pending}
+        render_futures = {}
+        parsed = {}
+        errors = {}
+        for future in concurrent.futures.as_completed(parse_futures):
+            filename = parse_futures[future]
+            try:
+                parsed[filename] = future.result()
+            except Exception as e:
+                parsed[filename] = ({}, "Unknown", 0.0, f"{e}\n")
+                errors[filename] = str(e)
+                continue
+            grids_by_band, callsign = parsed[filename][:2]
+            if not grids_by_band:
+                continue
+            path_hash = hashlib.sha1(os.path.abspath(filename).encode('utf-8')).hexdigest()[:8]
+            log_dir = os.path.join(output_dir, f"{os.path.basename(filename).replace('.', '_')}_{path_hash}")
+            os.makedirs(log_dir, exist_ok=True)
+            for band, grids in grids_by_band.items():
+                task = (grids, callsign, band, dict(render_options, output_dir=log_dir), None)
+                render_futures[filename, band] = pool.submit(_render_band_task, task)
+        
+        # Report in input order regardless of completion order
+        for filename in pending:
+            grids_by_band, callsign, parse_seconds, output = parsed[filename]
+            print(f"== {filename}")
+            sys.stdout.write(output)
+            stat = stats[filename]
+            bands = {}
+            for band, grids in grids_by_band.items():
+                bands[band] = {'output': None,
+                               'unique_grids': int(len(grids.ids)),
+                               'contacts': int(grids.counts.sum())}
+                try:
+                    output_file, output, _ = render_futures[filename, band].result()
+                except Exception as e:
+                    print(f"Error rendering {band}: {e}")
+                    bands[band]['error'] = str(e)
+                    errors.setdefault(filename, f"{band}: {e}")
+                    continue
+                if output_file:
+                    bands[band]['output'] = os.path.relpath(output_file, output_dir)
+                sys.stdout.write(output)
+            entries[os.path.abspath(filename)] = {
+                'source': os.path.abspath(filename),
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'callsign': callsign,
+                'options': options,
+                'options_digest': options_digest,
+                'parse_seconds': round(parse_seconds, 4),
+                'bands': bands,
+                'status': 'error' if filename in errors else 'rendered' if bands else 'no_grids',
+            }
+            if filename in errors:
+                entries[os.path.abspath(filename)]['error'] = errors[filename]
+    
+    # Logs from earlier runs that were not part of this one keep their entries
+    current = [entries[os.path.abspath(filename)] for filename in filenames]
+    earlier = [entry for source, entry in previous.items() if source not in entries]
+    manifest = {'logs': current + earlier}
+    os.makedirs(os.path.dirname(os.path.abspath(manifest_file)), exist_ok=True)
+    with open(manifest_file, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    
+    up_to_date = sum(1 for entry in current if entry['status'] == 'up_to_date')
+    failed = sum(1 for entry in current if entry['status'] == 'error')
+    print(f"Batch complete: {len(filenames) - up_to_date - failed} rendered, {up_to_date} up to date"
+          f"{f', {failed} failed' if failed else ''}; manifest written to {manifest_file}")
+    return manifest
+
+def batch_main(argv):
+    """`maidenhead-map batch`: render every log in directories, globs or list files"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='maidenhead-map batch',
+                                     description='Render maps for many contest logs in one invocation')
+    parser.add_argument('inputs', nargs='+',
+                       help='Log files, directories, glob patterns or .txt/.lst files listing logs')
+    parser.add_argument('--output-dir', '-o', default='.', help='Directory for maps and the manifest')
+    parser.add_argument('--manifest', help='Manifest path (default: OUTPUT_DIR/maidenhead_manifest.json)')
+    parser.add_argument('--format', dest='log_format', choices=sorted(LOG_PARSERS),
+                       help='Log format (detected from each file extension if not specified)')
+    parser.add_argument('--continents', nargs='+', 
+                       choices=['north_america', 'south_america', 'europe', 'africa', 'asia', 'oceania'],
+                       help='Continents to include (auto-detected per band if not specified)')
+    parser.add_argument('--jobs', '-j', type=_job_count, default=0,
+                       help='Worker processes for parsing and rendering (0 = one per CPU)')
+    parser.add_argument('--force', action='store_true', help='Re-render logs even if their maps are up to date')
+    _add_band_plan_argument(parser)
+    _add_continent_table_argument(parser)
+    _add_render_arguments(parser)
+    _add_cache_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.continent_table:
+        load_continent_table(args.continent_table)
+    
+    filenames = expand_log_inputs(args.inputs)
+    if not filenames:
+        print("No log files found")
+        return 1
+    manifest = run_batch(filenames, args.output_dir, args.continents, args.jobs, args.log_format,
+                         args.manifest, args.force, _basemap_cache_from_args(args), args.band_plan,
+                         _parse_cache_from_args(args), args.backend, args.lod)
+    return 1 if any(entry['status'] == 'error' for entry in manifest['logs']) else 0
+
+def _merge_log_task(task):
+    """Worker entry point: one log's QSO keys, returning (QsoKeySet, callsign, seconds, captured output)"""
+    filename, log_format, band_plan = task
+    start = time.perf_counter()
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        keys, callsign = parse_log_qsos(filename, log_format, band_plan)
+        keys.flush()
+    return keys, callsign, time.perf_counter() - start, output.getvalue()
+
+def merge_logs(filenames, jobs=0, log_format=None, band_plan=None):
+    """Merge many logs into one set of distinct (call, band, grid) contacts
+    
+    Logs are parsed into hashed QSO keys across `jobs` worker processes (0 =
+    one per CPU) and folded into a single QsoKeySet as each one finishes,
+    so the parent holds only the merged keys plus results in flight.
+    Returns (QsoKeySet, per-log list of {source, callsign, qsos,
+    unique_qsos, seconds}) with the logs in input order. A log that fails
+    to parse is left out of the merge and listed as {source, error}.
+    """
+    merged = QsoKeySet()
+    tasks = [(filename, log_format, band_plan) for filename in filenames]
+    results = {}
+    
+    def fold(filename, result):
+        try:
+            keys, callsign, seconds, output = result()
+        except Exception as e:
+            results[filename] = {'source': filename, 'error': str(e)}
+            return
+        sys.stdout.write(output)
+        results[filename] = {'source': filename, 'callsign': callsign, 'qsos': keys.qsos,
+                             'unique_qsos': len(keys), 'seconds': round(seconds, 4)}
+        merged.update(keys)
+    
+    if jobs == 1 or len(tasks) <= 1:
+        for task in tasks:
+            fold(task[0], functools.partial(_merge_log_task, task))
+    else:
+        workers = min(jobs or os.cpu_count() or 1, len(tasks))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_merge_log_task, task): task[0] for task in tasks}
+            for future in concurrent.futures.as_completed(futures):
+                fold(futures[future], future.result)
+    return merged, [results[filename] for filename in filenames]
+
+def merge_main(argv):
+    """`maidenhead-map merge`: one map per band of the distinct contacts across many logs"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='maidenhead-map merge',
+                                     description='Merge club or contest logs into aggregate maps, '
+                                                 'counting each (call, band, grid) contact once')
+    parser.add_argument('inputs', nargs='+',
+                       help='Log files, directories, glob patterns or .txt/.lst files listing logs')
+    parser.add_argument('--name', default='MERGED',
+                       help='Name used in map titles and output file names (default: MERGED)')
+    parser.add_argument('--output-dir', '-o', default='.', help='Directory for the maps')
+    parser.add_argument('--format', dest='log_format', choices=sorted(LOG_PARSERS),
+                       help='Log format (detected from each file extension if not specified)')
+    parser.add_argument('--continents', nargs='+', 
+                       choices=['north_america', 'south_america', 'europe', 'africa', 'asia', 'oceania'],
+                       help='Continents to include (auto-detected per band if not specified)')
+    parser.add_argument('--jobs', '-j', type=_job_count, default=0,
+                       help='Worker processes for parsing and rendering (0 = one per CPU)')
+    parser.add_argument('--no-maps', action='store_true', help='Only print the merged counts')
+    _add_band_plan_argument(parser)
+    _add_continent_table_argument(parser)
+    _add_render_arguments(parser)
+    _add_cache_arguments(parser, parse_cache=False)
+    _add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.continent_table:
+        load_continent_table(args.continent_table)
+    
+    filenames = expand_log_inputs(args.inputs)
+    if not filenames:
+        print("No log files found")
+        return 1
+    
+    with _profiling_from_args(args):
+        with stage('merge'):
+            keys, logs = merge_logs(filenames, args.jobs, args.log_format, args.band_plan)
+            grids_by_band = keys.grid_counts()
+        for log in logs:
+            if 'error' in log:
+                print(f"{log['source']}: error parsing log, skipped: {log['error']}")
+                continue
+            print(f"{log['source']}: {log['callsign']}, {log['qsos']} QSOs with grids, "
+                  f"{log['unique_qsos']} distinct")
+        failed = sum(1 for log in logs if 'error' in log)
+        print(f"Merged {len(logs) - failed} logs{f' ({failed} skipped)' if failed else ''}: "
+              f"{keys.qsos} QSOs, {len(keys)} distinct (call, band, grid) contacts")
+        for band, grids in grids_by_band.items():
+            print(f"  {band}: {len(grids.ids)} grids, {int(grids.counts.sum())} contacts")
+        
+        if not grids_by_band:
+            print("No Maidenhead grid squares found in the logs")
+        elif not args.no_maps:
+            os.makedirs(args.output_dir, exist_ok=True)
+            with stage('render'):
+                render_bands(grids_by_band, args.name, args.continents, jobs=args.jobs,
+                             output_dir=args.output_dir, reuse_figure=True,
+                             basemap_cache=_basemap_cache_from_args(args),
+                             backend=args.backend, lod=args.lod)
+    return 0
+
+def continent_table_main(argv):
+    """`maidenhead-map continent-table`: precompute the square-to-continent lookup table"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='maidenhead-map continent-table',
+                                     description='Build the 4-character square continent lookup table')
+    parser.add_argument('output', nargs='?', default=CONTINENT_TABLE_FILE,
+                       help='Output .npz file (default: the packaged table next to this module)')
+    parser.add_argument('--source', choices=['polygons', 'bounds'], default='polygons',
+                       help='Natural Earth country polygons (accurate) or the built-in continent boxes')
+    parser.add_argument('--resolution', choices=['110m', '50m', '10m'], default='110m',
+                       help='Natural Earth resolution for --source polygons')
+    args = parser.parse_args(argv)
+    
+    if args.source == 'polygons':
+        table = build_polygon_continent_table(args.resolution)
+    else:
+        table = build_continent_table()
+    save_continent_table(args.output, table)
+    for code, name in enumerate(table.names):
+        print(f"{name}: {int(np.count_nonzero(table.codes == code))} squares")
+    print(f"Continent table written to {args.output}")
+    return 0
+
+def log_stats(grids_by_band):
+    """Per-band summary {band: {unique_grids, contacts, continents, extent}} from parsed counts
+    
+    `continents` maps continent name to unique grids; `extent` is
+    (lon_min, lon_max, lat_min, lat_max) of the worked grids, unpadded.
+    """
+    stats = {}
+    for band, grids in grids_by_band.items():
+        lat_mins, lat_maxs, lon_mins, lon_maxs = grid_id_bounds(grids.ids)
+        names, counts = np.unique(grid_id_continents(grids.ids).astype(str), return_counts=True)
+        stats[band] = {
+            'unique_grids': int(len(grids.ids)),
+            'contacts': int(grids.counts.sum()),
+            'continents': {str(name): int(count) for name, count in zip(names, counts)},
+            'extent': [float(np.nanmin(lon_mins)), float(np.nanmax(lon_maxs)),
+                       float(np.nanmin(lat_mins)), float(np.nanmax(lat_maxs))],
+        }
+    return stats
+
+def stats_main(argv):
+    """`maidenhead-map stats`: per-band grid and contact counts without rendering"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='maidenhead-map stats',
+                                     description='Summarize worked grids per band without drawing maps')
+    parser.add_argument('filename', help="Contest log file ('-' for stdin)")
+    parser.add_argument('--format', dest='log_format', choices=sorted(LOG_PARSERS),
+                       help='Log format (detected from the file extension if not specified)')
+    parser.add_argument('--json', action='store_true', help='Print JSON instead of a table')
+    _add_band_plan_argument(parser)
+    _add_continent_table_argument(parser)
+    args = parser.parse_args(argv)
+    if args.continent_table:
+        load_continent_table(args.continent_table)
+    
+    try:
+        grids_by_band, callsign = parse_log(args.filename, args.log_format, args.band_plan)
+    except ValueError as e:
+        print(e)
+        return 1
+    stats = log_stats(grids_by_band)
+    
+    if args.json:
+        print(json.dumps({'source': args.filename, 'callsign': callsign, 'bands': stats}, indent=2))
+        return 0
+    
+    print(f"{callsign} ({args.filename})")
+    if not stats:
+        print("No Maidenhead grid squares found in file")
+        return 0
+    print(f"{'Band':<8} {'Grids':>7} {'Contacts':>9}  {'Extent (lon, lat)':<30} Continents")
+    for band, band_stats in stats.items():
+        lon_min, lon_max, lat_min, lat_max = band_stats['extent']
+        extent = f"{lon_min:g}..{lon_max:g}, {lat_min:g}..{lat_max:g}"
+        continents = ', '.join(f"{name} ({count})" for name, count in band_stats['continents'].items())
+        print(f"{band:<8} {band_stats['unique_grids']:>7} {band_stats['contacts']:>9}  {extent:<30} {continents}")
+    print(f"{'Total':<8} {'':>7} {sum(b['contacts'] for b in stats.values()):>9}")
+    return 0
+
+def tiles_main(argv):
+    """`maidenhead-map tiles`: serve a log as slippy-map tiles (see maidenhead_tiles)"""
+    import maidenhead_tiles
+    return maidenhead_tiles.main(argv)
+
+def export_main(argv):
+    """`maidenhead-map export`: GeoJSON/SVG/CSV/Parquet output (see maidenhead_export)"""
+    import maidenhead_export
+    return maidenhead_export.main(argv)
+
+def animate_main(argv):
+    """`maidenhead-map animate`: time-lapse GIF/MP4 of a contest (see maidenhead_animate)"""
+    import maidenhead_animate
+    return maidenhead_animate.main(argv)
+
+def score_main(argv):
+    """`maidenhead-map score`: distance scoring from the own grid (see maidenhead_score)"""
+    import maidenhead_score
+    return maidenhead_score.main(argv)
+
+def serve_main(argv):
+    """`maidenhead-map serve`: render maps of uploaded logs on demand (see maidenhead_service)"""
+    import maidenhead_service
+    return maidenhead_service.main(argv)
 
 def main():
     """Main entry point for console script"""
-    import sys
     import argparse
     
-    parser = argparse.ArgumentParser(description='Generate Maidenhead grid square maps from contest logs')
-    parser.add_argument('filename', help='Contest log file (.cbr for Cabrillo, .csv for CSV)')
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        sys.exit(SUBCOMMANDS[sys.argv[1]](sys.argv[2:]))
+    
+    parser = argparse.ArgumentParser(description='Generate Maidenhead grid square maps from contest logs',
+                                     epilog='Subcommands: ' + ', '.join(SUBCOMMANDS) +
+                                            " (run 'maidenhead-map <subcommand> --help')")
+    parser.add_argument('filename', help="Contest log file (.cbr for Cabrillo, .csv for CSV, .adi/.adif for ADIF, "
+                                         "optionally .gz; '-' for stdin)")
+    parser.add_argument('--format', dest='log_format', choices=sorted(LOG_PARSERS),
+                       help='Log format (detected from the file extension if not specified)')
     parser.add_argument('--continents', nargs='+', 
                        choices=['north_america', 'south_america', 'europe', 'africa', 'asia', 'oceania'],
                        help='Continents to include (auto-detected if not specified)')
+    parser.add_argument('--jobs', '-j', type=_job_count, default=1,
+                       help='Number of bands to render in parallel worker processes (0 = one per CPU)')
+    parser.add_argument('--watch', action='store_true',
+                       help='Keep following a Cabrillo log as it grows and re-render bands that change')
+    parser.add_argument('--watch-interval', type=float, default=1.0, metavar='SECONDS',
+                       help='How often to check the log for new QSOs in --watch mode (default: 1)')
+    parser.add_argument('--debounce', type=float, default=5.0, metavar='SECONDS',
+                       help='Minimum time between re-renders in --watch mode (default: 5)')
+    _add_band_plan_argument(parser)
+    _add_continent_table_argument(parser)
+    _add_render_arguments(parser)
+    _add_cache_arguments(parser)
+    _add_profile_arguments(parser)
     
     if len(sys.argv) == 1:
         parser.print_help()
@@ -566,23 +2967,50 @@ def main():
     
     args = parser.parse_args()
     filename = args.filename
+    if args.continent_table:
+        load_continent_table(args.continent_table)
     
-    # Determine file format based on extension
-    if filename.lower().endswith('.csv'):
-        grids_by_band, callsign = parse_csv_grids(filename)
-        print(f"Parsed CSV file: {filename}")
-    elif filename.lower().endswith(('.cbr', '.log')):
-        grids_by_band, callsign = parse_cabrillo_grids(filename)
-        print(f"Parsed Cabrillo file: {filename}")
-    else:
-        print("Unsupported file format. Use .csv, .cbr, or .log files.")
-        sys.exit(1)
-    
-    if grids_by_band:
-        for band, grids in grids_by_band.items():
-            create_grid_map(grids, callsign, band, args.continents)
-    else:
-        print("No Maidenhead grid squares found in file")
+    with _profiling_from_args(args):
+        # Determine file format based on extension
+        log_format = detect_log_format(filename, args.log_format)
+        if args.watch:
+            if log_format != 'cabrillo' or filename == '-' or filename.lower().endswith('.gz'):
+                print("--watch needs an uncompressed Cabrillo log file")
+                sys.exit(1)
+            watch_log(filename, args.continents, args.watch_interval, args.debounce, args.band_plan,
+                      _basemap_cache_from_args(args), backend=args.backend, lod=args.lod)
+            return
+        if log_format not in LOG_PARSERS:
+            print("Unsupported file format. Use .csv, .cbr, .log, .adi or .adif files.")
+            sys.exit(1)
+        try:
+            with stage('parse'):
+                grids_by_band, callsign = parse_log(filename, log_format, args.band_plan,
+                                                    _parse_cache_from_args(args))
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+        print(f"Parsed {LOG_FORMAT_NAMES[log_format]} file: {filename}")
+        
+        if grids_by_band:
+            with stage('render'):
+                render_bands(grids_by_band, callsign, args.continents, jobs=args.jobs, reuse_figure=True,
+                             basemap_cache=_basemap_cache_from_args(args), backend=args.backend,
+                             lod=args.lod)
+        else:
+            print("No Maidenhead grid squares found in file")
+
+SUBCOMMANDS = {
+    'animate': animate_main,
+    'batch': batch_main,
+    'continent-table': continent_table_main,
+    'export': export_main,
+    'merge': merge_main,
+    'score': score_main,
+    'serve': serve_main,
+    'stats': stats_main,
+    'tiles': tiles_main,
+}
 
 if __name__ == "__main__":
     main()
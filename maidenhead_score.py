@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Distance scoring of Cabrillo logs from the station's own grid
+
+Each QSO line is reduced in one regex pass per chunk to its band, time,
+sent (own) grid, worked call and worked grid; everything after that is
+whole-array NumPy. The own grid comes from the QSO's sent exchange
+(rovers change it along the way), else from --grid, else from a LOCATION:
+header that holds a grid. Distances are haversine great-circle kilometres
+between grid centers.
+"""
+
+import json
+import re
+import sys
+from collections import defaultdict, namedtuple
+
+import numpy as np
+
+import maidenhead_map as mm
+
+# Per-band QSO columns: UTC datetime64[m] times, worked calls (bytes), own and worked grid IDs (-1 if missing)
+Contacts = namedtuple('Contacts', ['times', 'calls', 'own_ids', 'ids'])
+
+_GRID = rb'[A-Ra-r]{2}[0-9]{2}(?:[A-Xa-x]{2}(?:[0-9]{2})?)?'
+_CALL = rb'(?=[A-Za-z0-9/]*[A-Za-z])[A-Za-z0-9/]*[0-9][A-Za-z0-9/]*'
+# One match per QSO: or header line. QSO groups: frequency, date, time (mode and
+# own call skipped), the own grid when it is the first exchange token after any
+# numbers such as a sent report, and the worked call (the last call-like token,
+# then only numbers such as reports) and grid as the last token before an
+# optional transmitter ID.
+_CONTACT_RE = re.compile(
+    rb'^[ \t]*QSO:[ \t]+(\S+)[ \t]+\S+[ \t]+(\S+)[ \t]+(\S+)[ \t]+\S+'
+    rb'(?:(?:[ \t]+[0-9]+)*[ \t]+(' + _GRID + rb')(?=[ \t]))?'
+    rb'(?:[ \t]+\S+)*?[ \t]+(' + _CALL + rb')(?:[ \t]+[0-9]+)*[ \t]+(' + _GRID + rb')(?:[ \t]+[0-9])?[ \t]*\r?$'
+    rb'|^[ \t]*(CALLSIGN|LOCATION):[ \t]*([^\r\n]*)', re.M)
+
+def parse_cabrillo_contacts(filename, band_plan=None):
+    """Per-band Contacts from a Cabrillo log, for distance scoring
+
+    QSO lines without a worked grid are skipped. Returns
+    ({band: Contacts}, callsign, LOCATION: grid ID or -1).
+    """
+    band_plan = mm._as_band_plan(band_plan)
+    callsign, location = "Unknown", -1
+    columns = defaultdict(lambda: ([], [], [], [], []))
+    bands = {}
+    try:
+        with mm.open_log(filename) as f:
+            for chunk in mm._iter_line_chunks(f):
+                matches = _CONTACT_RE.findall(chunk)
+                if not matches:
+                    continue
+                freqs, dates, hhmms, own, calls, grids, headers, values = (np.array(column)
+                                                                           for column in zip(*matches))
+                for name, value in zip(headers[headers != b''], values[headers != b'']):
+                    if name == b'CALLSIGN':
+                        callsign = value.decode('latin-1').strip() or callsign
+                    else:
+                        location_id = mm.encode_grids(np.array([value.decode('latin-1').strip()]))[0]
+                        location = location_id if location_id >= 0 else location
+                qso = freqs != b''
+                unique_freqs, freq_index = np.unique(freqs[qso], return_inverse=True)
+                for freq in unique_freqs:
+                    if freq not in bands:
+                        bands[freq] = mm.freq_to_band(freq.decode('latin-1'), band_plan)
+                band_names, band_of_freq = np.unique([bands[freq] for freq in unique_freqs], return_inverse=True)
+                chunk_bands = band_of_freq.reshape(-1)[freq_index.reshape(-1)]
+                rows = [column[qso] for column in (dates, hhmms, own, calls, grids)]
+                for code, band in enumerate(band_names.tolist()):
+                    in_band = chunk_bands == code
+                    for column, values in zip(columns[band], rows):
+                        column.append(values[in_band])
+    except FileNotFoundError:
+        print(f"File {filename} not found")
+        return {}, "Unknown", -1
+
+    contacts = {}
+    for band, (dates, hhmms, own, calls, grids) in columns.items():
+        dates, hhmms = np.concatenate(dates), np.concatenate(hhmms)
+        # Unreadable dates or times become NaT rather than failing the whole log
+        ok = np.char.isdigit(hhmms) & (np.char.str_len(hhmms) == 4)
+        minutes = np.where(ok, hhmms, b'0').astype(np.int64)
+        try:
+            days = dates.astype('U10').astype('datetime64[D]')
+        except ValueError:
+            days = np.array([_parse_date(date) for date in dates.astype('U10')], dtype='datetime64[D]')
+        times = days.astype('datetime64[m]') + (minutes // 100 * 60 + minutes % 100).astype('timedelta64[m]')
+        times[~ok] = np.datetime64('NaT')
+        own, grids = np.concatenate(own), np.concatenate(grids)
+        contacts[band] = Contacts(times, np.concatenate(calls),
+                                  mm.encode_grids(own.astype('U8')), mm.encode_grids(grids.astype('U8')))
+    return contacts, callsign, location
+
+def _parse_date(date):
+    try:
+        return np.datetime64(date, 'D')
+    except ValueError:
+        return np.datetime64('NaT')
+
+def home_grid(contacts_by_band, station_id=-1):
+    """The station's most frequently sent grid ID, else `station_id`"""
+    own = np.concatenate([contacts.own_ids for contacts in contacts_by_band.values()] or [np.empty(0, np.int64)])
+    own = own[own >= 0]
+    if not len(own):
+        return station_id
+    ids, counts = np.unique(own, return_counts=True)
+    return int(ids[np.argmax(counts)])
+
+def contact_distances(contacts, station_id=-1):
+    """Great-circle km of each QSO from its own grid (or `station_id` where none was sent); NaN if unknown"""
+    own = np.where(contacts.own_ids >= 0, contacts.own_ids, station_id)
+    return mm.great_circle_km(*mm.grid_id_centers(own), *mm.grid_id_centers(contacts.ids))
+
+def score_contacts(contacts_by_band, station_id=-1, bin_km=100, qso_points=0, km_points=1):
+    """Per-band distance summary {band: {...}} from parse_cabrillo_contacts output
+
+    Each band reports scored and unscored QSOs, total, mean and median km,
+    points (`qso_points` per QSO plus `km_points` per whole km), the longest
+    contact and a histogram of QSOs per `bin_km` distance bin.
+    """
+    results = {}
+    for band, contacts in contacts_by_band.items():
+        km = contact_distances(contacts, station_id)
+        scored = ~np.isnan(km)
+        distances = km[scored]
+        result = {
+            'qsos': int(scored.sum()),
+            'unscored': int((~scored).sum()),
+            'total_km': float(distances.sum()),
+            'mean_km': float(distances.mean()) if len(distances) else 0.0,
+            'median_km': float(np.median(distances)) if len(distances) else 0.0,
+            'points': int(qso_points * len(distances) + km_points * np.floor(distances).sum()),
+            'longest': None,
+            'histogram': {'bin_km': bin_km, 'counts': np.bincount((distances // bin_km).astype(np.int64)).tolist()},
+        }
+        if len(distances):
+            i = int(np.flatnonzero(scored)[np.argmax(distances)])
+            own_id = contacts.own_ids[i] if contacts.own_ids[i] >= 0 else station_id
+            time = contacts.times[i]
+            result['longest'] = {
+                'call': contacts.calls[i].decode('latin-1'),
+                'grid': str(mm.decode_grid_ids(contacts.ids[i:i + 1])[0]),
+                'own_grid': str(mm.decode_grid_ids(np.array([own_id]))[0]),
+                'time': None if np.isnat(time) else str(time).replace('T', ' '),
+                'km': float(km[i]),
+            }
+        results[band] = result
+    return results
+
+def format_histogram(histogram, width=40):
+    """Text rows of a score_contacts histogram, with bars scaled to `width` characters"""
+    counts, bin_km = histogram['counts'], histogram['bin_km']
+    peak = max(counts) if counts else 0
+    return [f"  {f'{i * bin_km:g}-{(i + 1) * bin_km:g} km':>16} {count:>8} {'#' * int(round(width * count / peak))}"
+            for i, count in enumerate(counts) if count] if peak else []
+
+def main(argv=None):
+    """`maidenhead-map score`: great-circle distance totals, longest contacts and histograms per band"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='maidenhead-map score',
+                                     description='Score a Cabrillo log by great-circle distance from the own grid')
+    parser.add_argument('filename', help="Cabrillo log file ('-' for stdin, optionally .gz)")
+    parser.add_argument('--grid', help='Station grid for QSOs that do not send one '
+                                       '(default: LOCATION: header if it is a grid)')
+    parser.add_argument('--bin-km', type=float, default=100, help='Histogram bin width in km (default: 100)')
+    parser.add_argument('--qso-points', type=float, default=0, help='Points per scored QSO (default: 0)')
+    parser.add_argument('--km-points', type=float, default=1, help='Points per whole km (default: 1)')
+    parser.add_argument('--json', action='store_true', help='Print JSON instead of tables')
+    parser.add_argument('--maps', action='store_true',
+                       help='Also render per-band maps colored by distance from the most used own grid')
+    parser.add_argument('--output-dir', '-o', help='Directory for --maps (default: current directory)')
+    parser.add_argument('--continents', nargs='+',
+                       choices=['north_america', 'south_america', 'europe', 'africa', 'asia', 'oceania'],
+                       help='Continents to include in --maps (auto-detected if not specified)')
+    mm._add_band_plan_argument(parser)
+    mm._add_continent_table_argument(parser)
+    mm._add_render_arguments(parser)
+    mm._add_cache_arguments(parser, parse_cache=False)
+    args = parser.parse_args(argv)
+    if args.continent_table:
+        mm.load_continent_table(args.continent_table)
+
+    contacts_by_band, callsign, station_id = parse_cabrillo_contacts(args.filename, args.band_plan)
+    if args.grid:
+        station_id = int(mm.encode_grids(np.array([args.grid]))[0])
+        if station_id < 0:
+            print(f"Invalid grid square: {args.grid}")
+            return 1
+    if not contacts_by_band:
+        print("No QSOs with Maidenhead grid squares found in file")
+        return 1
+    results = score_contacts(contacts_by_band, station_id, args.bin_km, args.qso_points, args.km_points)
+
+    if args.json:
+        print(json.dumps({'source': args.filename, 'callsign': callsign, 'bands': results}, indent=2))
+    else:
+        print(f"{'Band':<8} {'QSOs':>8} {'Total km':>12} {'Mean km':>9} {'Points':>12}  Longest")
+        for band, result in results.items():
+            longest = result['longest']
+            summary = (f"{longest['call']} {longest['own_grid']}-{longest['grid']} {longest['km']:.0f} km"
+                       if longest else '-')
+            print(f"{band:<8} {result['qsos']:>8} {result['total_km']:>12.0f} {result['mean_km']:>9.0f} "
+                  f"{result['points']:>12}  {summary}")
+        print(f"{'Total':<8} {sum(r['qsos'] for r in results.values()):>8} "
+              f"{sum(r['total_km'] for r in results.values()):>12.0f} {'':>9} "
+              f"{sum(r['points'] for r in results.values()):>12}")
+        unscored = sum(r['unscored'] for r in results.values())
+        if unscored:
+            print(f"{unscored} QSO(s) without an own grid were not scored; pass --grid")
+        for band, result in results.items():
+            rows = format_histogram(result['histogram'])
+            if rows:
+                print(f"\n{band} distance histogram")
+                print('\n'.join(rows))
+
+    if args.maps:
+        home_id = home_grid(contacts_by_band, station_id)
+        if home_id < 0:
+            print("No own grid for --maps; pass --grid")
+            return 1
+        home = str(mm.decode_grid_ids(np.array([home_id]))[0])
+        basemap_cache = mm._basemap_cache_from_args(args)
+        for band, contacts in contacts_by_band.items():
+            mm.create_grid_map(mm.count_grid_ids(contacts.ids), callsign, band, args.continents,
+                               output_dir=args.output_dir, reuse_figure=True, basemap_cache=basemap_cache,
+                               backend=args.backend, lod=args.lod, distance_from=home)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
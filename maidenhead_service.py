@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Long-running render service: maps of uploaded logs over HTTP or a Unix socket
+
+An asyncio server accepts uploads and hands parsing and rendering to a pool
+of worker processes. The workers are started and warmed up (matplotlib,
+cartopy and the Natural Earth features loaded, one map drawn) before the
+first request, and they keep recent base maps open. Results are kept in an
+in-memory LRU cache keyed by the upload's SHA-256 and the options, and
+identical requests arriving while one is rendering wait for that render
+instead of starting another.
+
+    POST /render?band=6m&continents=europe,asia&format=cabrillo   (log as the body; PNG map)
+    POST /stats                                                  (JSON per-band summary)
+    GET  /status                                                 (workers and cache counters)
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import contextlib
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import traceback
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import maidenhead_map as mm
+
+CONTINENTS = ('north_america', 'south_america', 'europe', 'africa', 'asia', 'oceania')
+# Base maps each worker keeps open, so repeated regions only redraw the overlay
+WORKER_BASE_MAPS = 4
+
+class ResultCache:
+    """In-memory LRU cache of response bodies, bounded by their total size"""
+
+    def __init__(self, max_bytes=128 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = self.misses = 0
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, content_type, body):
+        if len(body) > self.max_bytes:
+            return
+        if key in self._entries:
+            self.bytes -= len(self._entries.pop(key)[1])
+        self._entries[key] = (content_type, body)
+        self.bytes += len(body)
+        while self.bytes > self.max_bytes:
+            self.bytes -= len(self._entries.popitem(last=False)[1][1])
+
+def sniff_log_format(data):
+    """Log format of an upload from its contents: 'cabrillo', 'adif' or 'csv' (None if unrecognized)"""
+    if data[:2] == b'\x1f\x8b':
+        import gzip
+        try:
+            with gzip.GzipFile(fileobj=io.BytesIO(data)) as f:
+                data = f.read(64 * 1024)
+        except (OSError, EOFError):
+            return None
+    head = data[:64 * 1024].lstrip().upper()
+    if head.startswith(b'START-OF-LOG'):
+        return 'cabrillo'
+    if b'<EOH>' in head or b'<EOR>' in head:
+        return 'adif'
+    if b',' in head.split(b'\n', 1)[0]:
+        return 'csv'
+    return None
+
+# Per-process settings of the service workers, set by _init_service_worker
+_worker_settings = {}
+
+def _init_service_worker(continent_table, settings):
+    """Process pool initializer: off-screen rendering, then one throwaway map to load everything up front"""
+    mm._init_render_worker(continent_table)
+    mm.BASE_MAP_CACHE_SIZE = WORKER_BASE_MAPS
+    _worker_settings.update(settings)
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        mm.create_grid_map(['FN31'], 'WARMUP', 'warmup', ['north_america'], output_dir=tmp, reuse_figure=False,
+                           basemap_cache=settings['basemap_cache'], backend=settings['backend'])
+
+def _warm_task(_):
+    return os.getpid()
+
+def _error(status, message, **extra):
+    return status, 'application/json', json.dumps(dict(extra, error=message)).encode()
+
+def _service_task(task):
+    """Worker entry point: parse an uploaded log and render one band's map or summarize it
+
+    Returns (HTTP status, content type, body). Unreadable uploads are 400
+    and any other failure is 500, so every request gets a response.
+    """
+    try:
+        return _serve_upload(*task)
+    except Exception as e:
+        traceback.print_exc()
+        return _error(500, f"Could not render map: {e}")
+
+def _serve_upload(kind, data, log_format, options):
+    settings = _worker_settings
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        path = os.path.join(tmp, 'upload')
+        with open(path, 'wb') as f:
+            f.write(data)
+        try:
+            grids_by_band, callsign = mm.parse_log(path, log_format, settings['band_plan'],
+                                                   settings['parse_cache'])
+        except ValueError as e:
+            # Includes corrupt or truncated gzip uploads
+            return _error(400, str(e))
+        if not grids_by_band:
+            return _error(422, "No Maidenhead grid squares found in log")
+        if kind == 'stats':
+            body = json.dumps({'callsign': callsign, 'bands': mm.log_stats(grids_by_band)}).encode()
+            return 200, 'application/json', body
+
+        band = options['band']
+        if band is None and len(grids_by_band) == 1:
+            band = next(iter(grids_by_band))
+        if band not in grids_by_band:
+            message = "Choose a band with ?band=" if band is None else f"No grids on {band}"
+            return _error(404 if band else 400, message, bands=list(grids_by_band))
+        # A fixed name: the default one is built from the uploaded log's CALLSIGN
+        output_file = mm.create_grid_map(grids_by_band[band], callsign, band, options['continents'],
+                                         output_file=os.path.join(tmp, 'map.png'), reuse_figure=True,
+                                         basemap_cache=settings['basemap_cache'], backend=options['backend'],
+                                         lod=options['lod'])
+        if output_file is None:
+            return _error(404, f"No valid grid squares found for {band} in selected continents")
+        with open(output_file, 'rb') as f:
+            return 200, 'image/png', f.read()
+
+class RenderService:
+    """asyncio HTTP front end over a pool of warm render workers and a ResultCache"""
+
+    REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               411: 'Length Required', 413: 'Payload Too Large', 422: 'Unprocessable Entity',
+               500: 'Internal Server Error'}
+
+    def __init__(self, workers=0, result_cache=None, basemap_cache=None, parse_cache=None, band_plan=None,
+                 backend='vector', max_upload_bytes=32 * 1024 * 1024, lod=False):
+        self.workers = workers or os.cpu_count() or 1
+        self.result_cache = result_cache
+        self.max_upload_bytes = max_upload_bytes
+        self.backend = backend
+        self.lod = lod
+        self._settings = {'basemap_cache': basemap_cache, 'parse_cache': parse_cache, 'band_plan': band_plan,
+                          'backend': backend}
+        self._pool = None
+        self._inflight = {}
+        self.requests = self.renders = 0
+
+    def start_workers(self):
+        """Start every worker process and wait until each has finished warming up"""
+        self._pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_service_worker,
+            initargs=(mm._continent_table_path, self._settings))
+        # Submitted together, so no worker is idle yet and each one starts its own process
+        list(self._pool.map(_warm_task, range(self.workers)))
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def status(self):
+        cache = self.result_cache
+        return {
+            'workers': self.workers,
+            'requests': self.requests,
+            'renders': self.renders,
+            'in_progress': len(self._inflight),
+            'result_cache': None if cache is None else {
+                'entries': len(cache), 'bytes': cache.bytes, 'max_bytes': cache.max_bytes,
+                'hits': cache.hits, 'misses': cache.misses},
+        }
+
+    @staticmethod
+    def _reject(status, message, **extra):
+        return _error(status, message, **extra) + ({},)
+
+    async def _run(self, key, task):
+        """Run `task` in the pool, sharing the result with identical requests already in flight"""
+        future = self._inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = asyncio.ensure_future(loop.run_in_executor(self._pool, _service_task, task))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self.renders += 1
+        return await asyncio.shield(future)
+
+    async def dispatch(self, method, target, body):
+        """(status, content type, body, extra headers) for one request"""
+        url = urlsplit(target)
+        path, query = unquote(url.path), parse_qs(url.query)
+        if path == '/status':
+            return 200, 'application/json', json.dumps(self.status()).encode(), {}
+        if path not in ('/render', '/stats'):
+            return self._reject(404, "Unknown path; POST a log to /render or /stats")
+        if method != 'POST':
+            return self._reject(405, "POST the log as the request body")
+
+        def param(name):
+            values = query.get(name)
+            return values[-1] if values else None
+
+        log_format = param('format') or mm.detect_log_format(param('filename') or '') or sniff_log_format(body)
+        if log_format not in mm.LOG_PARSERS:
+            return self._reject(400, "Unknown log format; pass ?format=" + '|'.join(sorted(mm.LOG_PARSERS)))
+        continents = None
+        if param('continents'):
+            continents = sorted(set(param('continents').replace(' ', ',').split(',')) - {''})
+            unknown = [name for name in continents if name not in CONTINENTS]
+            if unknown:
+                return self._reject(400, f"Unknown continents: {', '.join(unknown)}", continents=list(CONTINENTS))
+        backend = param('backend') or self.backend
+        if backend not in mm.MAP_BACKENDS:
+            return self._reject(400, f"Unknown backend: {backend}")
+        lod = self.lod if param('lod') is None else param('lod').lower() in ('1', 'true', 'yes')
+        kind = path[1:]
+        options = {'band': param('band'), 'continents': continents, 'backend': backend, 'lod': lod}
+
+        key = (hashlib.sha256(body).hexdigest(), kind, log_format,
+               None if kind == 'stats' else (options['band'], tuple(continents or ()), backend, lod))
+        if self.result_cache is not None:
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                return 200, cached[0], cached[1], {'X-Cache': 'hit'}
+        shared = key in self._inflight
+        status, content_type, payload = await self._run(key, (kind, body, log_format, options))
+        if status == 200 and self.result_cache is not None:
+            self.result_cache.put(key, content_type, payload)
+        return status, content_type, payload, {'X-Cache': 'shared' if shared else 'miss'}
+
+    async def handle_connection(self, reader, writer):
+        """Serve one request per connection"""
+        start = time.perf_counter()
+        method, target = '-', '-'
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+            request_line, *header_lines = head.decode('latin-1').rstrip('\r\n').split('\r\n')
+            method, target, _ = request_line.split(' ', 2)
+            headers = {}
+            for line in header_lines:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+            self.requests += 1
+            if 'chunked' in headers.get('transfer-encoding', '').lower():
+                response = self._reject(411, "Send the log with a Content-Length")
+            elif int(headers.get('content-length') or 0) > self.max_upload_bytes:
+                response = self._reject(413, f"Logs are limited to {self.max_upload_bytes // (1024 * 1024)} MB")
+            else:
+                body = await reader.readexactly(int(headers.get('content-length') or 0))
+                response = await self.dispatch(method, target, body)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            response = self._reject(400, "Malformed request")
+        except concurrent.futures.BrokenExecutor:
+            response = self._reject(500, "A render worker died; restart the service")
+        except Exception:
+            traceback.print_exc()
+            response = self._reject(500, "Internal error")
+        status, content_type, payload, extra = response
+        lines = [f"HTTP/1.1 {status} {self.REASONS.get(status, '')}",
+                 f"Content-Type: {content_type}", f"Content-Length: {len(payload)}", "Connection: close"]
+        lines += [f"{name}: {value}" for name, value in extra.items()]
+        try:
+            writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload)
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+        print(f"{time.strftime('%H:%M:%S')} {method} {target} {status} {extra.get('X-Cache', '')} "
+              f"{time.perf_counter() - start:.2f}s", flush=True)
+
+    async def serve(self, host='127.0.0.1', port=8080, socket_path=None):
+        """Listen on `socket_path` (a Unix socket) or host:port until cancelled"""
+        if socket_path:
+            server = await asyncio.start_unix_server(self.handle_connection, socket_path)
+            where = f"unix:{socket_path}"
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+            where = f"http://{host}:{server.sockets[0].getsockname()[1]}/"
+        print(f"Render service with {self.workers} worker(s) at {where} (Ctrl-C to stop)", flush=True)
+        async with server:
+            await server.serve_forever()
+
+def main(argv=None):
+    """`maidenhead-map serve`: render maps of uploaded logs on demand"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='maidenhead-map serve',
+                                     description='Render maps of uploaded logs on demand with warm worker processes')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on (default: 8080)')
+    parser.add_argument('--socket', metavar='PATH', help='Listen on a Unix socket instead of TCP')
+    parser.add_argument('--workers', '-j', type=mm._job_count, default=0,
+                       help='Render worker processes (0 = one per CPU)')
+    parser.add_argument('--result-cache-mb', type=int, default=128,
+                       help='Size limit of the in-memory result cache in MB (0 disables it)')
+    parser.add_argument('--max-upload-mb', type=int, default=32, help='Largest accepted log in MB (default: 32)')
+    mm._add_band_plan_argument(parser)
+    mm._add_continent_table_argument(parser)
+    mm._add_render_arguments(parser)
+    mm._add_cache_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.continent_table:
+        mm.load_continent_table(args.continent_table)
+
+    service = RenderService(args.workers,
+                            ResultCache(args.result_cache_mb * 1024 * 1024) if args.result_cache_mb else None,
+                            mm._basemap_cache_from_args(args), mm._parse_cache_from_args(args), args.band_plan,
+                            args.backend, args.max_upload_mb * 1024 * 1024, args.lod)
+    started = time.perf_counter()
+    print(f"Starting {service.workers} render worker(s)...", flush=True)
+    service.start_workers()
+    print(f"Workers ready in {time.perf_counter() - started:.1f}s", flush=True)
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        print("Stopped render service")
+    finally:
+        service.shutdown()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Slippy-map (z/x/y web mercator) tiles of Maidenhead grid counts
+
+Tiles are rasterized straight from a band's GridCounts with NumPy (no
+matplotlib), using the same Reds color scale as create_grid_map, encoded as
+PNG with zlib and cached on disk. A small HTTP server serves them with a
+Leaflet page.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import sys
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import numpy as np
+
+import maidenhead_map as mm
+
+TILE_SIZE = 256
+
+def encode_png(rgba):
+    """Encode an (height, width, 4) uint8 array as an RGBA PNG"""
+    height, width = rgba.shape[:2]
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)  # filter byte 0 per row
+    raw[:, 1:] = rgba.reshape(height, -1)
+
+    def chunk(tag, data):
+        return (struct.pack('>I', len(data)) + tag + data +
+                struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+    return (b'\x89PNG\r\n\x1a\n' +
+            chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)) +
+            chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)) +
+            chunk(b'IEND', b''))
+
+EMPTY_TILE = encode_png(np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8))
+
+def tile_pixel_centers(z, x, y, size=TILE_SIZE):
+    """Longitudes (columns) and latitudes (rows) of the pixel centers of tile z/x/y"""
+    n = 2 ** z
+    offsets = (np.arange(size) + 0.5) / size
+    lons = (x + offsets) / n * 360 - 180
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + offsets) / n))))
+    return lons, lats
+
+class TileLayer:
+    """One band's grid counts prepared for tile rendering
+
+    At each zoom, grids smaller than a pixel are summed into the finest grid
+    level whose squares are still at least a pixel wide.
+    """
+
+    def __init__(self, grids):
+        self.grids = mm.as_grid_counts(grids)
+        self.pyramid = mm.CountPyramid(self.grids)
+        self.max_count = int(self.grids.counts.max()) if len(self.grids.ids) else 1
+        self.digest = hashlib.sha1(self.grids.ids.tobytes() + self.grids.counts.tobytes()).hexdigest()
+        self._levels = {}
+
+    def display_level(self, z):
+        """Finest grid level (index into GRID_ID_LENGTHS, at least 4 characters) drawn at zoom z"""
+        pixels = TILE_SIZE * 2 ** z
+        return max(1, int(np.searchsorted(mm.GRID_ID_SIDES, pixels, side='right')) - 1)
+
+    def levels(self, display):
+        """[(level, GridCounts)] from coarsest to finest, with finer grids merged into `display`"""
+        if display not in self._levels:
+            length = mm.GRID_ID_LENGTHS[display]
+            merged = self.pyramid.at(length)
+            level = mm.grid_id_lengths(merged.ids)
+            self._levels[display] = [
+                (int(i), mm.GridCounts(merged.ids[level == length_i], merged.counts[level == length_i]))
+                for i, length_i in enumerate(mm.GRID_ID_LENGTHS[:display + 1]) if (level == length_i).any()]
+        return self._levels[display]
+
+    def render(self, z, x, y):
+        """PNG bytes of tile z/x/y"""
+        lons, lats = tile_pixel_centers(z, x, y)
+        display = self.display_level(z)
+        counts = np.zeros((TILE_SIZE, TILE_SIZE), dtype=np.int64)
+        cells = np.full((TILE_SIZE, TILE_SIZE), -1, dtype=np.int64)
+        cell_pixels = np.zeros((TILE_SIZE, TILE_SIZE))
+        for level, grids in self.levels(display):
+            side = int(mm.GRID_ID_SIDES[level])
+            lat_idx = np.clip(((lats + 90) / 180 * side).astype(np.int64), 0, side - 1)
+            lon_idx = np.clip(((lons + 180) / 360 * side).astype(np.int64), 0, side - 1)
+            pixel_ids = mm.GRID_ID_OFFSETS[level] + lat_idx[:, None] * side + lon_idx[None, :]
+            idx = np.minimum(np.searchsorted(grids.ids, pixel_ids), len(grids.ids) - 1)
+            hit = grids.ids[idx] == pixel_ids
+            # Finer levels are drawn over coarser ones
+            counts[hit] = grids.counts[idx[hit]]
+            cells[hit] = pixel_ids[hit]
+            cell_pixels[hit] = TILE_SIZE * 2 ** z / side
+        worked = cells >= 0
+        if not worked.any():
+            return EMPTY_TILE
+
+        rgba = np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8)
+        rgba[worked, :3] = np.round(mm.count_colors(counts[worked], self.max_count) * 255)
+        rgba[worked, 3] = round(0.8 * 255)  # overlay alpha
+
+        # Outline squares that are a few pixels wide, like the map's black edges
+        edge = np.zeros(cells.shape, dtype=bool)
+        edge[:, :-1] |= cells[:, :-1] != cells[:, 1:]
+        edge[:, 1:] |= cells[:, :-1] != cells[:, 1:]
+        edge[:-1, :] |= cells[:-1, :] != cells[1:, :]
+        edge[1:, :] |= cells[:-1, :] != cells[1:, :]
+        rgba[edge & (cell_pixels >= 6)] = (0, 0, 0, round(0.8 * 255))
+        return encode_png(rgba)
+
+    def bounds(self):
+        """(lon_min, lon_max, lat_min, lat_max) to fit the map view to"""
+        return mm.get_optimal_bounds(self.grids)
+
+class TileCache:
+    """Size-bounded on-disk LRU cache of rendered tiles
+
+    Entries are keyed by the layer's count digest, so tiles of a band are
+    invalidated as soon as its counts change.
+    """
+
+    # Bump when TileLayer.render output changes
+    STYLE_VERSION = 1
+    EVICT_EVERY = 64
+
+    def __init__(self, directory=None, max_bytes=128 * 1024 * 1024):
+        self.directory = directory or os.path.join(mm.default_cache_dir(), 'tiles')
+        self.max_bytes = max_bytes
+        self._writes = 0
+
+    def path_for(self, layer, z, x, y):
+        key = f"{layer.digest}/{z}/{x}/{y}/{self.STYLE_VERSION}"
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + '.png')
+
+    def get(self, layer, z, x, y):
+        """PNG bytes for tile z/x/y of `layer`, rendering and storing it on a miss"""
+        path = self.path_for(layer, z, x, y)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # mark as recently used
+            return data
+        except FileNotFoundError:
+            pass
+        data = layer.render(z, x, y)
+        os.makedirs(self.directory, exist_ok=True)
+
+        def write(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+
+        mm.write_atomic(path, write)
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            mm.evict_lru(self.directory, self.max_bytes, keep=(path,))
+        return data
+
+VIEWER_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css">
+<script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+<style>html, body, #map {{ height: 100%; margin: 0; }}</style>
+</head>
+<body>
+<div id="map"></div>
+<script>
+var map = L.map('map');
+L.tileLayer('https://tile.openstreetmap.org/{{z}}/{{x}}/{{y}}.png', {{
+  maxZoom: 12, attribution: '&copy; OpenStreetMap contributors'}}).addTo(map);
+fetch('bands.json').then(function (r) {{ return r.json(); }}).then(function (bands) {{
+  var overlays = {{}}, first = null;
+  bands.forEach(function (band) {{
+    overlays[band.name + ' (' + band.unique_grids + ' grids)'] = L.tileLayer(
+      'tiles/' + encodeURIComponent(band.name) + '/{{z}}/{{x}}/{{y}}.png', {{maxZoom: 12}});
+    first = first || band;
+  }});
+  var names = Object.keys(overlays);
+  if (first) {{
+    overlays[names[0]].addTo(map);
+    map.fitBounds([[first.bounds[2], first.bounds[0]], [first.bounds[3], first.bounds[1]]]);
+  }} else {{
+    map.setView([20, 0], 2);
+  }}
+  L.control.layers(overlays, null, {{collapsed: false}}).addTo(map);
+}});
+</script>
+</body>
+</html>
+"""
+
+class TileRequestHandler(BaseHTTPRequestHandler):
+    """Serves the viewer page, bands.json and /tiles/<band>/<z>/<x>/<y>.png"""
+
+    layers = {}
+    cache = None
+    title = 'Maidenhead grid map'
+
+    def do_GET(self):
+        path = unquote(self.path.split('?', 1)[0])
+        if path in ('/', '/index.html'):
+            self._send(200, 'text/html; charset=utf-8', VIEWER_PAGE.format(title=self.title).encode())
+        elif path == '/bands.json':
+            bands = [{'name': band, 'unique_grids': int(len(layer.grids.ids)),
+                      'contacts': int(layer.grids.counts.sum()), 'bounds': list(layer.bounds())}
+                     for band, layer in self.layers.items()]
+            self._send(200, 'application/json', json.dumps(bands).encode())
+        elif path.startswith('/tiles/') and path.endswith('.png'):
+            try:
+                band, z, x, y = path[len('/tiles/'):-len('.png')].rsplit('/', 3)
+                z, x, y = int(z), int(x), int(y)
+                layer = self.layers[band]
+            except (ValueError, KeyError):
+                self._send(404, 'text/plain', b'Not found')
+                return
+            if not (0 <= z <= 22 and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+                self._send(404, 'text/plain', b'Not found')
+                return
+            data = self.cache.get(layer, z, x, y) if self.cache else layer.render(z, x, y)
+            self._send(200, 'image/png', data, cache_control='max-age=60')
+        else:
+            self._send(404, 'text/plain', b'Not found')
+
+    def _send(self, status, content_type, body, cache_control='no-cache'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', cache_control)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_tiles(grids_by_band, callsign='Unknown', host='127.0.0.1', port=8000, cache=None):
+    """Serve tiles for {band: GridCounts} over HTTP until interrupted"""
+    handler = type('Handler', (TileRequestHandler,), {
+        'layers': {band: TileLayer(grids) for band, grids in grids_by_band.items()},
+        'cache': cache,
+        'title': f'{callsign} - Maidenhead Grid Squares',
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Serving {len(grids_by_band)} band(s) at http://{host}:{server.server_address[1]}/ (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopped tile server")
+    finally:
+        server.server_close()
+
+def main(argv=None):
+    """`maidenhead-map tiles`: serve a log as slippy-map tiles"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='maidenhead-map tiles',
+                                     description='Serve grid counts from a log as z/x/y map tiles in the browser')
+    parser.add_argument('filename', help="Contest log file ('-' for stdin)")
+    parser.add_argument('--format', dest='log_format', choices=sorted(mm.LOG_PARSERS),
+                       help='Log format (detected from the file extension if not specified)')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on (default: 8000)')
+    parser.add_argument('--cache-dir', help='Cache directory (default: $MAIDENHEAD_MAP_CACHE or ~/.cache/maidenhead-map)')
+    parser.add_argument('--no-tile-cache', action='store_true', help='Render every tile request')
+    parser.add_argument('--tile-cache-mb', type=int, default=128,
+                       help='Size limit of the tile cache in MB (least recently used tiles are evicted)')
+    mm._add_band_plan_argument(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        grids_by_band, callsign = mm.parse_log(args.filename, args.log_format, args.band_plan)
+    except ValueError as e:
+        print(e)
+        return 1
+    if not grids_by_band:
+        print("No Maidenhead grid squares found in file")
+        return 1
+
+    cache = None
+    if not args.no_tile_cache:
+        directory = os.path.join(args.cache_dir, 'tiles') if args.cache_dir else None
+        cache = TileCache(directory, args.tile_cache_mb * 1024 * 1024)
+    serve_tiles(grids_by_band, callsign, args.host, args.port, cache)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
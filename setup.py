@@ -16,7 +16,7 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/yourusername/maidenhead-contest-maps",
-    py_modules=["maidenhead_map"],
+    py_modules=["maidenhead_map", "maidenhead_tiles", "maidenhead_export", "maidenhead_animate", "maidenhead_service", "maidenhead_score"],
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Other Audience",
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the modules from the checkout and render off-screen
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep the on-disk caches of every test in its own directory"""
+    directory = tmp_path / 'cache'
+    monkeypatch.setenv('MAIDENHEAD_MAP_CACHE', str(directory))
+    return directory
+
+
+def cabrillo(callsign, qsos):
+    """Bytes of a minimal Cabrillo log with (frequency, grid) QSOs"""
+    lines = ['START-OF-LOG: 3.0', f'CALLSIGN: {callsign}']
+    lines += [f'QSO: {freq} PH 2025-09-13 18{i % 60:02d} {callsign} EL87 W{i}ABC {grid}'
+              for i, (freq, grid) in enumerate(qsos)]
+    lines.append('END-OF-LOG:')
+    return ('\n'.join(lines) + '\n').encode()
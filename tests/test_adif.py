@@ -0,0 +1,78 @@
+import gzip
+import io
+
+import numpy as np
+import pytest
+
+import maidenhead_map as mm
+
+
+def grids(adif, chunk_size=mm.STREAM_CHUNK_SIZE):
+    """{band: {grid: count}} and callsign of an ADIF log"""
+    grids_by_band, callsign = mm.stream_adif_grids(io.BytesIO(adif), chunk_size=chunk_size)
+    return {band: dict(zip(mm.decode_grid_ids(counts.ids).tolist(), counts.counts.tolist()))
+            for band, counts in grids_by_band.items()}, callsign
+
+
+def fields(chunk):
+    names, values = mm._adif_fields(chunk)
+    return list(zip(names.tolist(), values.tolist()))
+
+
+def exact_fields(chunk):
+    names, values = mm._adif_fields_exact(chunk)
+    return list(zip(names.tolist(), values.tolist()))
+
+
+def test_header_case_and_data_types():
+    adif = (b'Exported by <logger> v1 <ADIF_VER:5>3.1.4 <eoh>\n'
+            b'<call:5>k1abc <band:2>6m <gridsquare:6>fn42ab <station_callsign:4>w1aw <eor>\n'
+            b'<CALL:5:S>K2DEF <FREQ:7>144.200 <GRIDSQUARE:4:G>FN20 <EOR>\n')
+    assert grids(adif) == ({'6m': {'FN42AB': 1}, '2m': {'FN20': 1}}, 'W1AW')
+
+
+@pytest.mark.parametrize('comment', [b'<GRIDSQUARE:4>FN31', b'<EOR>', b'a<b>c', b'<BAND:3>40M'])
+def test_tags_inside_skipped_values_are_not_fields(comment):
+    adif = (b'<CALL:4>W1AW <COMMENT:%d>%s <BAND:3>20M <GRIDSQUARE:4>EM10 <EOR>\n'
+            b'<CALL:4>K1TO <BAND:3>20M <NOTES:%d>%s<EOR>\n') % (len(comment), comment, len(comment), comment)
+    assert grids(adif)[0] == {'20m': {'EM10': 1}}
+
+
+def test_tag_inside_kept_value():
+    adif = b'<CALL:7>W7<X>YZ <BAND:2>2M <GRIDSQUARE:4>DM43 <EOR>'
+    assert fields(adif.upper()) == exact_fields(adif.upper())
+    assert grids(adif)[0] == {'2m': {'DM43': 1}}
+
+
+def test_vucc_grids_take_precedence():
+    adif = (b'<CALL:4>N1GL <BAND:4>70CM <VUCC_GRIDS:9>FN31,FN32 <GRIDSQUARE:4>FN31 <EOR>'
+            b'<CALL:4>N1GL <BAND:4>70CM <VUCC_GRIDS:19>FN31,FN32,FM31,FM32 <EOR>'
+            b'<CALL:4>W9XX <BAND:2>2M <EOR>')
+    assert grids(adif)[0] == {'70cm': {'FN31': 2, 'FN32': 2, 'FM31': 1, 'FM32': 1}}
+
+
+def test_records_split_across_reads():
+    records = [b'<CALL:4>W1AW <COMMENT:18><GRIDSQUARE:4>FN31 <BAND:3>20M <GRIDSQUARE:4>EM%02d <EOR>\n' % i
+               for i in range(50)]
+    adif = b''.join(records)
+    expected = grids(adif)
+    assert expected[0] == {'20m': {f'EM{i:02d}': 1 for i in range(50)}}
+    for chunk_size in (7, 64, 1000):
+        assert grids(adif, chunk_size) == expected
+
+
+def test_fast_path_matches_exact_parser():
+    rng = np.random.default_rng(0)
+    pieces = [b'<CALL:4>W1AW', b'<BAND:3>20M', b'<FREQ:6>14.200', b'<GRIDSQUARE:4>FN31', b'<EOR>', b'\n',
+              b'<COMMENT:18><GRIDSQUARE:4>EM10', b'<NOTES:3>a<b', b'<VUCC_GRIDS:9>FN31,FN32', b'x < y',
+              b'<CALL:7>W7<X>YZ', b'<MODE:3:S>SSB']
+    for _ in range(200):
+        chunk = b' '.join(pieces[i] for i in rng.integers(len(pieces), size=12))
+        assert fields(chunk) == exact_fields(chunk)
+
+
+def test_gzip_file(tmp_path):
+    path = tmp_path / 'log.adi.gz'
+    path.write_bytes(gzip.compress(b'<CALL:4>W1AW <BAND:3>20M <GRIDSQUARE:4>EM10 <EOR>'))
+    grids_by_band, _ = mm.parse_adif_grids(str(path))
+    assert mm.decode_grid_ids(grids_by_band['20m'].ids).tolist() == ['EM10']
@@ -0,0 +1,57 @@
+import json
+
+import numpy as np
+import pytest
+
+import maidenhead_map as mm
+
+
+@pytest.mark.parametrize('region', sorted(mm.BAND_PLANS))
+def test_band_edges_per_region(region):
+    plan = mm.get_band_plan(region)
+    for band, low, high in mm.BAND_PLANS[region]:
+        assert plan.lookup(low) == band
+        assert plan.lookup(high) == band
+        assert plan.lookup((low + high) / 2) == band
+        assert plan.lookup(low - 0.5) != band
+        assert plan.lookup(high + 0.5) != band
+    freqs = np.array([edge for _, low, high in mm.BAND_PLANS[region] for edge in (low, high, low - 0.5)])
+    expected = [plan.lookup(freq) for freq in freqs]
+    assert [plan.names[i] if i >= 0 else None for i in plan.lookup_array(freqs)] == expected
+
+
+@pytest.mark.parametrize('freq, r1, r2, r3', [
+    ('1805', '1805kHz', '160m', '160m'),
+    ('3850', '3850kHz', '80m', '80m'),
+    ('3950', '3950kHz', '80m', '3950kHz'),
+    ('7250', '7250kHz', '40m', '7250kHz'),
+    ('70200', '4m', '70200kHz', '70200kHz'),
+    ('70.2', '4m', '70.2MHz', '70.2MHz'),
+    ('147', '147MHz', '2m', '2m'),
+    ('223.5', '223.5MHz', '1.25m', '223.5MHz'),
+    ('445', '445MHz', '70cm', '445MHz'),
+    ('903', '903MHz', '33cm', '903MHz'),
+])
+def test_regions_differ(freq, r1, r2, r3):
+    assert [mm.freq_to_band(freq, region) for region in ('r1', 'r2', 'r3')] == [r1, r2, r3]
+
+
+@pytest.mark.parametrize('freq, band', [
+    ('14025', '20m'), ('14.025', '20m'), ('14025kHz', '20m'), ('14.025 MHz', '20m'),
+    ('50', '6m'), ('144.2', '2m'), ('432', '70cm'), ('1296', '23cm'), ('10.368GHz', '3cm'),
+    ('10G', '10G'), ('20m', '20m'), ('2M', '2m'), ('70cm', '70cm'), ('12345', '12345kHz'),
+])
+def test_freq_to_band_units_and_names(freq, band):
+    assert mm.freq_to_band(freq) == band
+
+
+def test_default_plan_is_region_2():
+    assert mm.freq_to_band('7250') == mm.freq_to_band('7250', 'r2') == '40m'
+
+
+def test_band_plan_file(tmp_path):
+    path = tmp_path / 'plan.json'
+    path.write_text(json.dumps({'name': 'test', 'bands': [['20m', 14000, 14100], ['2m', 144000, 146000]]}))
+    assert mm.freq_to_band('14050', str(path)) == '20m'
+    assert mm.freq_to_band('14200', str(path)) == '14200kHz'
+    assert mm.freq_to_band('145', str(path)) == '2m'
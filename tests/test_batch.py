@@ -0,0 +1,87 @@
+import json
+import os
+
+import maidenhead_map as mm
+from conftest import cabrillo
+
+QSOS = [(14200, 'FN31'), (14200, 'EM10'), (7150, 'DM79')]
+
+
+def write_log(path, callsign='W1AW', qsos=QSOS):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(cabrillo(callsign, qsos))
+    return str(path)
+
+
+def batch(filenames, output_dir, **kwargs):
+    kwargs.setdefault('continents', ['north_america'])
+    return mm.run_batch(filenames, output_dir=str(output_dir), jobs=1, **kwargs)
+
+
+def statuses(manifest):
+    return {os.path.basename(entry['source']): entry['status'] for entry in manifest['logs']}
+
+
+def test_outputs_are_relative_to_output_dir(tmp_path):
+    log = write_log(tmp_path / 'logs' / 'w1aw.log')
+    manifest = batch([log], tmp_path / 'maps')
+    (entry,) = manifest['logs']
+    assert entry['status'] == 'rendered'
+    assert set(entry['bands']) == {'20m', '40m'}
+    for band in entry['bands'].values():
+        assert not os.path.isabs(band['output'])
+        assert os.path.exists(tmp_path / 'maps' / band['output'])
+    with open(tmp_path / 'maps' / 'maidenhead_manifest.json') as f:
+        assert json.load(f)['logs'] == manifest['logs']
+
+
+def test_rerun_is_up_to_date_from_any_directory(tmp_path, monkeypatch):
+    log = write_log(tmp_path / 'logs' / 'w1aw.log')
+    batch([log], tmp_path / 'maps')
+    assert statuses(batch([log], tmp_path / 'maps')) == {'w1aw.log': 'up_to_date'}
+    monkeypatch.chdir(tmp_path / 'logs')
+    assert statuses(batch([log], tmp_path / 'maps')) == {'w1aw.log': 'up_to_date'}
+
+
+def test_rerenders_when_options_or_log_change(tmp_path):
+    log = write_log(tmp_path / 'w1aw.log')
+    batch([log], tmp_path / 'maps')
+    assert statuses(batch([log], tmp_path / 'maps', lod=True)) == {'w1aw.log': 'rendered'}
+    assert statuses(batch([log], tmp_path / 'maps', lod=True)) == {'w1aw.log': 'up_to_date'}
+    assert statuses(batch([log], tmp_path / 'maps', lod=True, backend='raster')) == {'w1aw.log': 'rendered'}
+    assert statuses(batch([log], tmp_path / 'maps', lod=True, backend='raster',
+                          continents=['europe'])) == {'w1aw.log': 'rendered'}
+    stat = os.stat(log)
+    os.utime(log, (stat.st_atime, stat.st_mtime + 10))
+    assert statuses(batch([log], tmp_path / 'maps', lod=True, backend='raster',
+                          continents=['europe'])) == {'w1aw.log': 'rendered'}
+
+
+def test_rerenders_when_render_version_changes(tmp_path, monkeypatch):
+    log = write_log(tmp_path / 'w1aw.log')
+    batch([log], tmp_path / 'maps')
+    monkeypatch.setattr(mm, 'RENDER_VERSION', mm.RENDER_VERSION + 1)
+    assert statuses(batch([log], tmp_path / 'maps')) == {'w1aw.log': 'rendered'}
+
+
+def test_rerenders_missing_outputs(tmp_path):
+    log = write_log(tmp_path / 'w1aw.log')
+    manifest = batch([log], tmp_path / 'maps')
+    os.remove(tmp_path / 'maps' / manifest['logs'][0]['bands']['20m']['output'])
+    assert statuses(batch([log], tmp_path / 'maps')) == {'w1aw.log': 'rendered'}
+
+
+def test_missing_log_is_an_error(tmp_path):
+    manifest = batch([str(tmp_path / 'missing.log')], tmp_path / 'maps')
+    (entry,) = manifest['logs']
+    assert entry['status'] == 'error'
+    assert entry['bands'] == {}
+
+
+def test_same_name_logs_render_to_separate_folders(tmp_path):
+    first = write_log(tmp_path / 'a' / 'contest.log', 'W1AW')
+    second = write_log(tmp_path / 'b' / 'contest.log', 'K1TO', [(14200, 'JO62')])
+    manifest = batch([first, second], tmp_path / 'maps')
+    outputs = [entry['bands']['20m']['output'] for entry in manifest['logs']]
+    assert [entry['status'] for entry in manifest['logs']] == ['rendered', 'rendered']
+    assert len({os.path.dirname(output) for output in outputs}) == 2
@@ -0,0 +1,136 @@
+import gzip
+import os
+
+import pytest
+
+import maidenhead_map as mm
+from conftest import cabrillo
+
+EXTENT = (-84.0, -80.0, 26.0, 29.0)
+OTHER_EXTENT = (-74.0, -70.0, 40.0, 43.0)
+FIGSIZE, DPI = (2, 1.5), 40
+
+
+@pytest.fixture
+def basemap_renders(monkeypatch):
+    """Count calls to the basemap renderer"""
+    calls = []
+    render = mm._render_basemap
+
+    def counting_render(extent, figsize, dpi, path):
+        calls.append(extent)
+        render(extent, figsize, dpi, path)
+
+    monkeypatch.setattr(mm, '_render_basemap', counting_render)
+    return calls
+
+
+def test_basemap_cache_miss_then_hit(tmp_path, basemap_renders):
+    cache = mm.BasemapCache(str(tmp_path))
+    first = cache.get(EXTENT, FIGSIZE, DPI)
+    assert basemap_renders == [EXTENT]
+    assert os.path.exists(cache.path_for(EXTENT, FIGSIZE, DPI))
+    second = cache.get(EXTENT, FIGSIZE, DPI)
+    assert basemap_renders == [EXTENT]
+    assert (first == second).all()
+    cache.get(EXTENT, FIGSIZE, DPI * 2)
+    assert len(basemap_renders) == 2
+
+
+def test_basemap_cache_evicts_least_recently_used(tmp_path, basemap_renders):
+    cache = mm.BasemapCache(str(tmp_path))
+    cache.get(EXTENT, FIGSIZE, DPI)
+    cache.max_bytes = os.path.getsize(cache.path_for(EXTENT, FIGSIZE, DPI))
+    cache.get(OTHER_EXTENT, FIGSIZE, DPI)
+    assert not os.path.exists(cache.path_for(EXTENT, FIGSIZE, DPI))
+    assert os.path.exists(cache.path_for(OTHER_EXTENT, FIGSIZE, DPI))
+
+
+def test_basemap_cache_smaller_than_one_entry(tmp_path, basemap_renders):
+    cache = mm.BasemapCache(str(tmp_path), max_bytes=0)
+    image = cache.get(EXTENT, FIGSIZE, DPI)
+    assert image.ndim == 3
+    assert os.path.exists(cache.path_for(EXTENT, FIGSIZE, DPI))
+
+
+def test_basemap_cache_rerenders_unreadable_entry(tmp_path, basemap_renders):
+    cache = mm.BasemapCache(str(tmp_path))
+    os.makedirs(cache.directory, exist_ok=True)
+    with open(cache.path_for(EXTENT, FIGSIZE, DPI), 'wb') as f:
+        f.write(b'not a png')
+    assert cache.get(EXTENT, FIGSIZE, DPI).ndim == 3
+    assert basemap_renders == [EXTENT]
+
+
+def test_evict_lru_keeps_entries_and_partial_writes(tmp_path):
+    for name in ('old', 'new', 'entry.123.tmp'):
+        (tmp_path / name).write_bytes(b'x' * 100)
+    mm.evict_lru(str(tmp_path), 0, keep=(str(tmp_path / 'new'),))
+    assert sorted(os.listdir(tmp_path)) == ['entry.123.tmp', 'new']
+
+
+@pytest.fixture
+def log_parses(monkeypatch):
+    """Count calls to the Cabrillo parser behind parse_log"""
+    calls = []
+    parse = mm.LOG_PARSERS['cabrillo']
+
+    def counting_parse(filename, band_plan=None):
+        calls.append(filename)
+        return parse(filename, band_plan)
+
+    monkeypatch.setitem(mm.LOG_PARSERS, 'cabrillo', counting_parse)
+    return calls
+
+
+def test_parse_cache_miss_then_hit(tmp_path, log_parses):
+    log = tmp_path / 'log.cbr'
+    log.write_bytes(cabrillo('K1TO', [(50125, 'EM90'), (50125, 'EM90'), (144200, 'EL98')]))
+    cache = mm.ParseCache(str(tmp_path / 'parsed'))
+    parsed = mm.parse_log(str(log), parse_cache=cache)
+    cached = mm.parse_log(str(log), parse_cache=cache)
+    assert log_parses == [str(log)]
+    assert cached[1] == parsed[1] == 'K1TO'
+    assert list(cached[0]) == list(parsed[0])
+    for band, grids in parsed[0].items():
+        assert (cached[0][band].ids == grids.ids).all()
+        assert (cached[0][band].counts == grids.counts).all()
+    # Renaming hits, editing misses
+    renamed = tmp_path / 'renamed.cbr'
+    log.rename(renamed)
+    mm.parse_log(str(renamed), parse_cache=cache)
+    assert len(log_parses) == 1
+    renamed.write_bytes(cabrillo('K1TO', [(50125, 'EM91')]))
+    assert list(mm.parse_log(str(renamed), parse_cache=cache)[0]) == ['6m']
+    assert len(log_parses) == 2
+
+
+def test_parse_cache_keys_on_band_plan(tmp_path, log_parses):
+    log = tmp_path / 'log.cbr'
+    log.write_bytes(cabrillo('K1TO', [(7150, 'JN47')]))
+    cache = mm.ParseCache(str(tmp_path / 'parsed'))
+    mm.parse_log(str(log), band_plan='r2', parse_cache=cache)
+    mm.parse_log(str(log), band_plan='r1', parse_cache=cache)
+    assert len(log_parses) == 2
+
+
+def test_parse_cache_evicts(tmp_path):
+    cache = mm.ParseCache(str(tmp_path / 'parsed'), max_bytes=0)
+    for i in range(3):
+        log = tmp_path / f'log{i}.cbr'
+        log.write_bytes(cabrillo('K1TO', [(50125, f'EM{90 + i}')]))
+        mm.parse_log(str(log), parse_cache=cache)
+    # Only the entry just written survives a zero limit
+    assert len(os.listdir(cache.directory)) == 1
+
+
+def test_failed_parse_is_not_cached(tmp_path):
+    log = tmp_path / 'log.csv.gz'
+    with gzip.open(log, 'wb') as f:
+        f.write(b'Freq,Grid\n50125,EL87\n' * 100)
+    log.write_bytes(log.read_bytes()[:30])
+    cache = mm.ParseCache(str(tmp_path / 'parsed'))
+    for _ in range(2):
+        with pytest.raises(ValueError, match='Error parsing CSV file'):
+            mm.parse_log(str(log), parse_cache=cache)
+    assert not os.path.exists(cache.directory) or os.listdir(cache.directory) == []
@@ -0,0 +1,45 @@
+import numpy as np
+
+import maidenhead_map as mm
+
+COAST_TO_COAST = {'FN31pr': 1, 'DM04ab': 1, 'CM87xx': 1}
+
+
+def test_count_pyramid_levels():
+    pyramid = mm.CountPyramid({'FN31pr12': 2, 'FN31pr': 3, 'FN31': 1, 'EM12ab': 4})
+    assert dict(zip(mm.decode_grid_ids(pyramid.at(6).ids), pyramid.at(6).counts)) == {
+        'FN31': 1, 'EM12AB': 4, 'FN31PR': 5}
+    assert dict(zip(mm.decode_grid_ids(pyramid.at(4).ids), pyramid.at(4).counts)) == {'EM12': 4, 'FN31': 6}
+    assert pyramid.at(2).counts.sum() == 10
+
+
+def test_lod_only_merges_into_sub_pixel_cells():
+    # Coast to coast: subsquares are several pixels wide, extended squares are not
+    assert mm.lod_grid_length((-125, -65, 25, 50)) == 8
+    assert mm.lod_grid_length((-180, 180, -90, 90)) == 6
+    assert mm.lod_grid_length((-75, -70, 40, 43)) == 8
+
+
+def draw(grids, lod, continents=('north_america',)):
+    drawn = mm._draw_grid_map(mm.as_grid_counts(grids), 'T', '10G', list(continents),
+                              reuse_figure=False, lod=lod)
+    mm.plt.close(drawn['fig'])
+    return drawn
+
+
+def test_maps_keep_logged_precision():
+    for lod in (False, True):
+        drawn = draw(COAST_TO_COAST, lod)
+        assert drawn['drawn_grids'] is drawn['valid_grids']
+
+
+def test_lod_merges_sub_pixel_extended_squares(monkeypatch):
+    # Subsquares on this near world-wide map are just over a pixel wide
+    monkeypatch.setattr(mm, 'LOD_MAX_CELL_PIXELS', 2)
+    grids = {'FN31pr12': 1, 'FN31pr13': 2, 'CM87xx00': 1, 'QF22ab00': 1, 'JO22ab00': 1}
+    continents = ('north_america', 'europe', 'oceania')
+    assert len(draw(grids, False, continents)['drawn_grids'].ids) == 5
+    drawn = draw(grids, True, continents)
+    assert drawn['lod_length'] == 6
+    assert sorted(mm.decode_grid_ids(drawn['drawn_grids'].ids)) == ['CM87XX', 'FN31PR', 'JO22AB', 'QF22AB']
+    assert drawn['drawn_grids'].counts.sum() == 6
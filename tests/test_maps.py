@@ -0,0 +1,21 @@
+import matplotlib.pyplot as plt
+
+import maidenhead_map as mm
+
+
+def test_library_calls_close_their_figure(tmp_path):
+    plt.close('all')
+    for band in ('20m', '40m'):
+        output_file = mm.create_grid_map(['FN31', 'EM10'], 'W1AW', band, ['north_america'],
+                                         output_dir=str(tmp_path))
+        assert (tmp_path / output_file.rsplit('/', 1)[-1]).exists()
+    assert plt.get_fignums() == []
+
+
+def test_reuse_figure_keeps_the_base_map_open(tmp_path):
+    plt.close('all')
+    for band in ('20m', '40m'):
+        mm.create_grid_map(['FN31', 'EM10'], 'W1AW', band, ['north_america'], output_dir=str(tmp_path),
+                           reuse_figure=True)
+    assert len(plt.get_fignums()) == 1
+    plt.close('all')
@@ -0,0 +1,69 @@
+import numpy as np
+
+import maidenhead_map as mm
+
+
+def write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def merged_counts(keys):
+    return {band: dict(zip(mm.decode_grid_ids(grids.ids).tolist(), grids.counts.tolist()))
+            for band, grids in keys.grid_counts().items()}
+
+
+def club_logs(tmp_path):
+    cabrillo = write(tmp_path / 'k1to.cbr', '\n'.join([
+        'START-OF-LOG: 3.0', 'CALLSIGN: K1TO',
+        'QSO: 50125 PH 2025-09-13 1801 K1TO EL87 W1AW FN31',
+        'QSO: 50125 PH 2025-09-13 1802 K1TO EL87 W1AW FN31',
+        'QSO: 144200 PH 2025-09-13 1803 K1TO EL87 W1AW FN31',
+        'QSO: 50125 PH 2025-09-13 1804 K1TO EL87 N4TB EL97',
+        'END-OF-LOG:', '']))
+    csv = write(tmp_path / 'w4.csv', '\n'.join([
+        'call,freq,grid', 'w1aw,50,fn31', 'K2DEF,50,FN31', 'N4TB,50,EL97', '']))
+    adif = write(tmp_path / 'w5.adi', '<CALL:4>W1AW <BAND:2>6M <GRIDSQUARE:6>FN31AB <EOR>\n'
+                                      '<CALL:4>N4TB <BAND:2>2M <GRIDSQUARE:4>EL97 <EOR>\n')
+    return [cabrillo, csv, adif]
+
+
+def test_contacts_counted_once_across_logs_and_formats(tmp_path):
+    keys, logs = mm.merge_logs(club_logs(tmp_path), jobs=1)
+    assert [(log['qsos'], log['unique_qsos']) for log in logs] == [(4, 3), (3, 3), (2, 2)]
+    assert keys.qsos == 9
+    # W1AW FN31 on 6m counts once, as do N4TB EL97 on 6m; another call or band or grid counts again
+    assert merged_counts(keys) == {'6m': {'FN31': 2, 'EL97': 1, 'FN31AB': 1},
+                                   '2m': {'FN31': 1, 'EL97': 1}}
+    assert len(keys) == 6
+
+
+def test_worker_processes_match_serial(tmp_path):
+    filenames = club_logs(tmp_path)
+    serial, _ = mm.merge_logs(filenames, jobs=1)
+    parallel, logs = mm.merge_logs(filenames, jobs=2)
+    assert [log['source'] for log in logs] == filenames
+    assert merged_counts(parallel) == merged_counts(serial)
+
+
+def test_unreadable_log_is_skipped(tmp_path):
+    filenames = club_logs(tmp_path)
+    (tmp_path / 'bad.adi.gz').write_bytes(b'\x1f\x8b\x08\x00garbage')
+    keys, logs = mm.merge_logs(filenames + [str(tmp_path / 'bad.adi.gz')], jobs=1)
+    assert 'error' in logs[-1]
+    assert len(keys) == 6
+
+
+def test_key_set_batches():
+    keys = mm.QsoKeySet(batch_size=3)
+    for _ in range(2):
+        keys.add('6m', mm.qso_keys(['W1AW', 'K2DEF'], ['FN31', 'FN31']))
+        keys.add('6m', mm.qso_keys(['W1AW'], ['XX99']))
+    assert keys.qsos == 4
+    assert keys.result()['6m'].dtype == np.uint64
+    assert len(keys) == 2
+
+
+def test_merge_main_reports_totals(tmp_path, capsys):
+    assert mm.merge_main(club_logs(tmp_path) + ['--no-maps', '--jobs', '1']) == 0
+    assert '9 QSOs, 6 distinct (call, band, grid) contacts' in capsys.readouterr().out
@@ -0,0 +1,85 @@
+import collections
+import csv
+import gzip
+import io
+import os
+import shutil
+
+import pytest
+
+import maidenhead_map as mm
+from conftest import REPO_DIR
+
+
+def counts(grids_by_band):
+    """{band: {grid: count}} of parsed GridCounts"""
+    return {band: dict(zip(mm.decode_grid_ids(grids.ids).tolist(), grids.counts.tolist()))
+            for band, grids in grids_by_band.items()}
+
+
+def reference_cabrillo(path):
+    """Line-by-line Cabrillo parse: every valid grid after the first six QSO fields"""
+    grids_by_band = collections.defaultdict(collections.Counter)
+    callsign = "Unknown"
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('CALLSIGN:'):
+                callsign = line.split(':', 1)[1].strip()
+            elif line.startswith('QSO:'):
+                parts = line.split()
+                if len(parts) >= 6:
+                    band = mm.freq_to_band(parts[1])
+                    grids_by_band[band].update(field.upper() for field in parts[6:] if mm.is_valid_grid(field))
+    return {band: dict(grids) for band, grids in grids_by_band.items() if grids}, callsign
+
+
+def test_cabrillo_matches_line_by_line_parse():
+    path = os.path.join(REPO_DIR, 'example_contest.cbr')
+    grids_by_band, callsign = mm.parse_log(path)
+    assert (counts(grids_by_band), callsign) == reference_cabrillo(path)
+    assert callsign == 'K1TO'
+
+
+@pytest.mark.parametrize('chunk_size', [1, 17, 256])
+def test_cabrillo_chunk_boundaries(chunk_size):
+    path = os.path.join(REPO_DIR, 'example_contest.cbr')
+    with open(path, 'rb') as f:
+        grids_by_band, callsign = mm.stream_cabrillo_grids(io.BytesIO(f.read()), chunk_size=chunk_size)
+    assert (counts(grids_by_band), callsign) == reference_cabrillo(path)
+
+
+def test_cabrillo_gzip(tmp_path):
+    path = os.path.join(REPO_DIR, 'example_contest.cbr')
+    with open(path, 'rb') as f, gzip.open(tmp_path / 'log.cbr.gz', 'wb') as out:
+        shutil.copyfileobj(f, out)
+    grids_by_band, callsign = mm.parse_log(str(tmp_path / 'log.cbr.gz'))
+    assert (counts(grids_by_band), callsign) == reference_cabrillo(path)
+
+
+def reference_csv(path):
+    """csv.DictReader parse of a log with freq and grid columns"""
+    grids_by_band = collections.defaultdict(collections.Counter)
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            if mm.is_valid_grid(row['grid']):
+                grids_by_band[mm.freq_to_band(row['freq'])][row['grid'].upper()] += 1
+    return {band: dict(grids) for band, grids in grids_by_band.items()}
+
+
+@pytest.mark.parametrize('name', ['example_contest.csv', 'test_bands.csv'])
+def test_csv_matches_dict_reader_parse(name):
+    path = os.path.join(REPO_DIR, name)
+    grids_by_band, _ = mm.parse_log(path)
+    assert counts(grids_by_band) == reference_csv(path)
+
+
+def test_csv_preamble_and_gzip(tmp_path):
+    path = os.path.join(REPO_DIR, 'example_contest.csv')
+    with open(path, 'rb') as f:
+        log = f.read()
+    with gzip.open(tmp_path / 'log.csv.gz', 'wb') as out:
+        out.write(b'Log of K1TO exported for ARRL-VHF-SEP\n\n' + log)
+    grids_by_band, callsign = mm.parse_log(str(tmp_path / 'log.csv.gz'))
+    assert counts(grids_by_band) == reference_csv(path)
+    assert callsign == 'K1TO'
@@ -0,0 +1,35 @@
+import numpy as np
+
+import maidenhead_map as mm
+
+
+def test_raster_is_exact_when_it_fits():
+    grids = mm.as_grid_counts({'FN31': 1, 'FN31pr': 3, 'FN31pr12': 5})
+    raster, extent = mm.grid_count_raster(grids, (-74, -72, 41, 42))
+    # 8-character cells over 2°×1°: 240 each way
+    assert raster.shape == (240, 240)
+    assert extent == (-74.0, -72.0, 41.0, 42.0)
+    assert np.nansum(raster == 5) == 1
+    assert np.nansum(raster == 3) == 10 * 10 - 1
+    assert np.nansum(raster == 1) == 240 * 240 - 100
+
+
+def test_one_extended_square_does_not_blow_up_the_raster():
+    grids = mm.as_grid_counts({'FN31AB12': 3, 'EM12CD45': 1, 'DN70': 2, 'CN87': 1})
+    extent = mm.get_optimal_bounds(grids.ids)
+    raster, cell_extent = mm.grid_count_raster(grids, extent)
+    assert raster.shape[0] <= mm.RASTER_MAX_SHAPE[0]
+    assert raster.shape[1] <= mm.RASTER_MAX_SHAPE[1]
+    assert cell_extent[0] <= extent[0] and cell_extent[1] >= extent[1]
+    assert cell_extent[2] <= extent[2] and cell_extent[3] >= extent[3]
+    # The extended squares still show, merged into the cells that hold them
+    assert np.nanmax(raster) == 3
+    assert set(np.unique(raster[~np.isnan(raster)])) == {1, 2, 3}
+
+
+def test_raster_max_shape():
+    grids = mm.as_grid_counts({'FN31pr': 1, 'EM12cd': 4, 'EM12ce': 2})
+    raster, _ = mm.grid_count_raster(grids, (-100, -70, 30, 45), max_shape=(20, 20))
+    assert raster.shape[0] <= 20 and raster.shape[1] <= 20
+    # Two subsquares in one cell show the larger count
+    assert np.nanmax(raster) == 4
@@ -0,0 +1,67 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+import maidenhead_service as ms
+from conftest import cabrillo
+
+QSOS = [(50125, 'EM90'), (50125, 'EL97'), (144200, 'EL98')]
+
+
+@pytest.fixture(scope='module')
+def service():
+    service = ms.RenderService(workers=1)
+    service.start_workers()
+    yield service
+    service.shutdown()
+
+
+def request(service, target, body):
+    return asyncio.run(service.dispatch('POST', target, body))
+
+
+def test_render_png(service):
+    status, content_type, body, _ = request(service, '/render?band=6m', cabrillo('K1TO', QSOS))
+    assert (status, content_type) == (200, 'image/png')
+    assert body.startswith(b'\x89PNG')
+
+
+def test_stats(service):
+    status, _, body, _ = request(service, '/stats', cabrillo('K1TO', QSOS))
+    assert status == 200
+    stats = json.loads(body)
+    assert stats['callsign'] == 'K1TO'
+    assert set(stats['bands']) == {'6m', '2m'}
+
+
+def test_rover_callsign(service):
+    status, content_type, _, _ = request(service, '/render?band=2m', cabrillo('K1TO/R', QSOS))
+    assert (status, content_type) == (200, 'image/png')
+
+
+def test_callsign_cannot_escape_output_dir(service, tmp_path):
+    target = tmp_path / 'escape'
+    target.mkdir()
+    callsign = '../' * 32 + str(target).lstrip(os.sep) + '/pwn'
+    status, _, _, _ = request(service, '/render?band=6m', cabrillo(callsign, QSOS))
+    assert status == 200
+    assert os.listdir(target) == []
+
+
+def test_corrupt_gzip_upload(service):
+    status, content_type, body, _ = request(service, '/render?format=cabrillo', b'\x1f\x8b\x08\x00garbage')
+    assert (status, content_type) == (400, 'application/json')
+    assert 'error' in json.loads(body)
+
+
+def test_band_required(service):
+    status, _, body, _ = request(service, '/render', cabrillo('K1TO', QSOS))
+    assert status == 400
+    assert set(json.loads(body)['bands']) == {'6m', '2m'}
+
+
+def test_render_with_lod(service):
+    status, content_type, _, _ = request(service, '/render?band=6m&lod=1', cabrillo('K1TO', QSOS))
+    assert (status, content_type) == (200, 'image/png')